@@ -0,0 +1,85 @@
+"""Compares the compiled mesh kernels against the pure-Python versions.
+
+Example:
+    cd ~/mwe/maturin/mesh-kernels
+    maturin develop --release
+    python bench.py
+"""
+
+import pathlib
+import sys
+import time
+
+import numpy as np
+
+ROOT = pathlib.Path(__file__).resolve().parents[2]
+sys.path[:0] = [str(ROOT / "python" / "pattern"), str(ROOT / "python" / "cicd_release")]
+
+# pylint: disable=wrong-import-position
+import pattern  # noqa: E402
+from cicd_example import command_line as cl  # noqa: E402
+
+
+def seconds(function, repeat: int = 3) -> float:
+    """Returns the best wall time of repeat calls of function."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def cases():
+    """Yields (name, function) pairs of the benchmarked operations."""
+    quilt = pattern.quilt(nex=2000, ney=2000, vectorized=True)
+    yield "connectivity", lambda: pattern.connectivity(quilt)
+
+    n = 100  # n**3 hexes
+    yield "lattice_connectivity", lambda: sum(
+        len(x) for x in pattern.lattice_connectivity(nex=n, ney=n, nez=n)
+    )
+
+    rng = np.random.default_rng(seed=0)
+    old = rng.permutation(2 * 10**6) + 1
+    rmap_dense = cl.RenumberMap(old=old, new=np.arange(1, old.size + 1))
+    rmap_sorted = cl.RenumberMap(old=old * 10**6, new=np.arange(1, old.size + 1))
+    source = rng.choice(old, size=8 * 10**6)
+    _ = rmap_dense.arrays, rmap_sorted.arrays  # build outside the timing
+    yield "renumber (dense)", lambda: rmap_dense(source)
+    yield "renumber (sorted)", lambda: rmap_sorted(source * 10**6)
+
+    mesh = tuple(
+        (block, *rng.integers(1, 10**7, size=(10**4, 8))) for block in range(1, 101)
+    )
+    yield "compact_mesh", lambda: cl.compact_mesh(mesh)
+
+
+def use(kernels) -> None:
+    """Routes pattern and command_line through kernels, or None for the
+    pure-Python versions."""
+    pattern.kernels = kernels
+    cl.compiled_kernels = lambda: kernels
+
+
+def main():
+    """Prints the pure-Python and compiled timings of every case."""
+    compiled = cl.compiled_kernels()
+    if compiled is None:
+        print("mesh_kernels is not installed; run `maturin develop --release`.")
+
+    print(f"{'case':<22}{'python (s)':>12}{'compiled (s)':>14}{'speedup':>10}")
+    for name, function in cases():
+        use(None)
+        python_time = seconds(function)
+        if compiled is None:
+            print(f"{name:<22}{python_time:>12.4f}")
+            continue
+        use(compiled)
+        compiled_time = seconds(function)
+        speedup = python_time / compiled_time
+        print(f"{name:<22}{python_time:>12.4f}{compiled_time:>14.4f}{speedup:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+//! Pure Rust kernels, independent of Python, so they can be tested with
+//! `cargo test`.  All numbers are one-based, as in the Python modules.
+
+/// Returns the index of the first key equal to value, if any.
+fn find(keys: &[i64], value: i64) -> Option<usize> {
+    let idx = keys.partition_point(|&key| key < value);
+    (idx < keys.len() && keys[idx] == value).then_some(idx)
+}
+
+/// The number of columns of `fill_grid` rows: 5 for nez = 0, else 9.
+pub fn grid_columns(nez: i64) -> usize {
+    if nez == 0 {
+        5
+    } else {
+        9
+    }
+}
+
+/// Fills `out`, of shape (n, grid_columns(nez)), with the element number and
+/// the Exodus II ordered global node numbers of the n structured grid
+/// elements starting at the zero-based element `start`.
+pub fn fill_grid(nex: i64, ney: i64, nez: i64, start: i64, out: &mut [i64]) {
+    let nx = nex + 1;
+    let nxy = nx * (ney + 1);
+    let quad = [0, 1, nx + 1, nx];
+    let mut offsets = quad.to_vec();
+    if nez > 0 {
+        offsets.extend(quad.iter().map(|x| x + nxy));
+    }
+
+    for (r, row) in out.chunks_exact_mut(grid_columns(nez)).enumerate() {
+        let e = start + r as i64;
+        let i = e % nex;
+        let j = (e / nex) % ney;
+        let k = e / (nex * ney);
+        let sw = 1 + i + (j + k * (ney + 1)) * nx;
+        row[0] = e + 1;
+        for (value, offset) in row[1..].iter_mut().zip(&offsets) {
+            *value = sw + offset;
+        }
+    }
+}
+
+/// Maps each source number through the sorted `keys` into `values`.  Returns
+/// false if a source number is not a key.
+pub fn map_sorted(source: &[i64], keys: &[i64], values: &[i64], out: &mut [i64]) -> bool {
+    for (value, &item) in out.iter_mut().zip(source) {
+        match find(keys, item) {
+            Some(idx) => *value = values[idx],
+            None => return false,
+        }
+    }
+    true
+}
+
+/// Maps each source number n to values[n].  Returns false if a source number
+/// is out of range or present[n] is 0.
+pub fn map_dense(source: &[i64], present: &[u8], values: &[i64], out: &mut [i64]) -> bool {
+    for (value, &item) in out.iter_mut().zip(source) {
+        match usize::try_from(item) {
+            Ok(n) if n < present.len() && present[n] != 0 => *value = values[n],
+            _ => return false,
+        }
+    }
+    true
+}
+
+/// Writes the sorted unique numbers of `flat` into the front of `nodes`, and
+/// the one-based position of each number of `flat` among them into
+/// `inverse`.  Returns the number of unique numbers.
+pub fn compact(flat: &[i64], nodes: &mut [i64], inverse: &mut [i64]) -> usize {
+    nodes.copy_from_slice(flat);
+    nodes.sort_unstable();
+    let mut count = 0;
+    for idx in 0..nodes.len() {
+        if idx == 0 || nodes[idx] != nodes[count - 1] {
+            nodes[count] = nodes[idx];
+            count += 1;
+        }
+    }
+
+    let unique = &nodes[..count];
+    for (value, &item) in inverse.iter_mut().zip(flat) {
+        *value = unique.partition_point(|&key| key < item) as i64 + 1;
+    }
+    count
+}
+
+#[cfg(test)]
+mod tests {
+    use super::*;
+
+    #[test]
+    fn quilt_connectivity() {
+        // nex=3, ney=2, see pattern.connectivity
+        let mut out = vec![0; 6 * 5];
+        fill_grid(3, 2, 0, 0, &mut out);
+        assert_eq!(&out[..10], &[1, 1, 2, 6, 5, 2, 2, 3, 7, 6]);
+        assert_eq!(&out[25..], &[6, 7, 8, 12, 11]);
+    }
+
+    #[test]
+    fn lattice_connectivity() {
+        // nex=1, ney=1, nez=2, from the second element on
+        let mut out = vec![0; 9];
+        fill_grid(1, 1, 2, 1, &mut out);
+        assert_eq!(out, vec![2, 5, 6, 8, 7, 9, 10, 12, 11]);
+    }
+
+    #[test]
+    fn renumber() {
+        let mut out = vec![0; 3];
+        assert!(map_sorted(
+            &[300, 22, 1],
+            &[1, 22, 40, 300],
+            &[42, 2, 1000, 9],
+            &mut out
+        ));
+        assert_eq!(out, vec![9, 2, 42]);
+        assert!(!map_sorted(&[7], &[1, 22], &[42, 2], &mut out[..1]));
+
+        let present = [0, 1, 1, 0];
+        assert!(map_dense(&[2, 1], &present, &[0, 10, 20, 0], &mut out[..2]));
+        assert_eq!(&out[..2], &[20, 10]);
+        assert!(!map_dense(&[3], &present, &[0, 10, 20, 0], &mut out[..1]));
+        assert!(!map_dense(&[-1], &present, &[0, 10, 20, 0], &mut out[..1]));
+    }
+
+    #[test]
+    fn compact_nodes() {
+        let flat = [11, 12, 15, 14, 2, 3, 6, 5];
+        let (mut nodes, mut inverse) = (vec![0; 8], vec![0; 8]);
+        assert_eq!(compact(&flat, &mut nodes, &mut inverse), 8);
+        assert_eq!(nodes, vec![2, 3, 5, 6, 11, 12, 14, 15]);
+        assert_eq!(inverse, vec![5, 6, 8, 7, 1, 2, 4, 3]);
+
+        let flat = [4, 4, 1];
+        let (mut nodes, mut inverse) = (vec![0; 3], vec![0; 3]);
+        assert_eq!(compact(&flat, &mut nodes, &mut inverse), 2);
+        assert_eq!(&nodes[..2], &[1, 4]);
+        assert_eq!(inverse, vec![2, 2, 1]);
+    }
+}
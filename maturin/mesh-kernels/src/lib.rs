@@ -0,0 +1,152 @@
+use pyo3::buffer::{Element, PyBuffer};
+use pyo3::exceptions::PyValueError;
+use pyo3::prelude::*;
+
+mod kernels;
+
+/// A C-contiguous buffer, as a raw address and length, so that it can be
+/// used after the GIL is released.  The Python caller keeps the buffer alive
+/// for the duration of the call, and output buffers must not alias inputs.
+struct Slice {
+    address: usize,
+    len: usize,
+}
+
+impl Slice {
+    fn new<T: Element>(buffer: &PyBuffer<T>, writable: bool) -> PyResult<Self> {
+        if !buffer.is_c_contiguous() {
+            return Err(PyValueError::new_err("buffer must be C-contiguous"));
+        }
+        if writable && buffer.readonly() {
+            return Err(PyValueError::new_err("output buffer must be writable"));
+        }
+        Ok(Slice {
+            address: buffer.buf_ptr() as usize,
+            len: buffer.item_count(),
+        })
+    }
+
+    unsafe fn get<T>(&self) -> &[T] {
+        std::slice::from_raw_parts(self.address as *const T, self.len)
+    }
+
+    #[allow(clippy::mut_from_ref)]
+    unsafe fn get_mut<T>(&self) -> &mut [T] {
+        std::slice::from_raw_parts_mut(self.address as *mut T, self.len)
+    }
+}
+
+fn mismatch() -> PyErr {
+    PyValueError::new_err("buffers must have matching lengths")
+}
+
+/// Fills `out`, of shape (n, 5) for nez = 0 or (n, 9) for nez >= 1, with the
+/// element number and the Exodus II ordered global node numbers of the n
+/// structured grid elements starting at the zero-based element `start`.
+/// Same as pattern.connectivity and pattern.lattice_connectivity.
+#[pyfunction]
+fn grid_connectivity(
+    py: Python<'_>,
+    nex: i64,
+    ney: i64,
+    nez: i64,
+    start: i64,
+    out: PyBuffer<i64>,
+) -> PyResult<()> {
+    if nex < 1 || ney < 1 || nez < 0 || start < 0 {
+        return Err(PyValueError::new_err(
+            "nex, ney >= 1 and nez, start >= 0 required",
+        ));
+    }
+    let out = Slice::new(&out, true)?;
+    if out.len % kernels::grid_columns(nez) != 0 {
+        return Err(PyValueError::new_err(
+            "out must have 5 (2D) or 9 (3D) columns",
+        ));
+    }
+
+    py.allow_threads(|| kernels::fill_grid(nex, ney, nez, start, unsafe { out.get_mut() }));
+    Ok(())
+}
+
+/// Maps each source number through the sorted `keys` into `values`, writing
+/// the result into `out`.  Returns false if a source number is not a key.
+#[pyfunction]
+fn renumber_sorted(
+    py: Python<'_>,
+    source: PyBuffer<i64>,
+    keys: PyBuffer<i64>,
+    values: PyBuffer<i64>,
+    out: PyBuffer<i64>,
+) -> PyResult<bool> {
+    let source = Slice::new(&source, false)?;
+    let keys = Slice::new(&keys, false)?;
+    let values = Slice::new(&values, false)?;
+    let out = Slice::new(&out, true)?;
+    if source.len != out.len || keys.len != values.len {
+        return Err(mismatch());
+    }
+
+    Ok(py.allow_threads(|| unsafe {
+        kernels::map_sorted(source.get(), keys.get(), values.get(), out.get_mut())
+    }))
+}
+
+/// Maps each source number n to values[n], writing the result into `out`.
+/// Returns false if a source number is out of range or present[n] is 0.
+#[pyfunction]
+fn renumber_dense(
+    py: Python<'_>,
+    source: PyBuffer<i64>,
+    present: PyBuffer<u8>,
+    values: PyBuffer<i64>,
+    out: PyBuffer<i64>,
+) -> PyResult<bool> {
+    let source = Slice::new(&source, false)?;
+    let present = Slice::new(&present, false)?;
+    let values = Slice::new(&values, false)?;
+    let out = Slice::new(&out, true)?;
+    if source.len != out.len || present.len != values.len {
+        return Err(mismatch());
+    }
+
+    Ok(py.allow_threads(|| unsafe {
+        kernels::map_dense(source.get(), present.get(), values.get(), out.get_mut())
+    }))
+}
+
+/// Compacts the lattice node numbers in `flat`: writes the sorted unique
+/// numbers into the front of `nodes` and the one-based position of each
+/// number of `flat` among them into `inverse`.  Returns the number of unique
+/// nodes.  Same as np.unique(flat, return_inverse=True), plus one.
+#[pyfunction]
+fn compact(
+    py: Python<'_>,
+    flat: PyBuffer<i64>,
+    nodes: PyBuffer<i64>,
+    inverse: PyBuffer<i64>,
+) -> PyResult<usize> {
+    let flat = Slice::new(&flat, false)?;
+    let nodes = Slice::new(&nodes, true)?;
+    let inverse = Slice::new(&inverse, true)?;
+    if flat.len != nodes.len || flat.len != inverse.len {
+        return Err(mismatch());
+    }
+
+    Ok(py.allow_threads(|| unsafe {
+        kernels::compact(flat.get(), nodes.get_mut(), inverse.get_mut())
+    }))
+}
+
+/// Compiled mesh kernels.  The name of this function must match the
+/// `lib.name` setting in the `Cargo.toml`, else Python will not be able to
+/// import the module.
+#[pymodule]
+fn mesh_kernels(m: &Bound<'_, PyModule>) -> PyResult<()> {
+    m.add_function(wrap_pyfunction!(grid_connectivity, m)?)?;
+    m.add_function(wrap_pyfunction!(renumber_sorted, m)?)?;
+    m.add_function(wrap_pyfunction!(renumber_dense, m)?)?;
+    m.add_function(wrap_pyfunction!(compact, m)?)?;
+
+    Ok(())
+}
@@ -0,0 +1,223 @@
+"""Benchmarks of mesh generation and renumbering.
+
+Each case is timed, and its peak resident set size (RSS) and peak traced
+allocations are recorded, at element counts from 10 to 10^7.  Every
+measurement runs in a fresh worker process, so the peak RSS of one case does
+not carry over into the next.
+
+Example:
+    cd ~/mwe/python/benchmark
+    python benchmark.py                # print a table, sizes up to 10^5
+    python benchmark.py --max-size 10000000
+    python benchmark.py --save         # store the baseline for the gate
+    pytest                             # the regression gate, see test_benchmark.py
+"""
+
+import argparse
+import gc
+import json
+import math
+import pathlib
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Final, NamedTuple
+
+import numpy as np
+
+HERE: Final[pathlib.Path] = pathlib.Path(__file__).resolve().parent
+sys.path[:0] = [str(HERE.parent / "pattern"), str(HERE.parent / "cicd_release")]
+
+# pylint: disable=wrong-import-position
+import pattern  # noqa: E402
+from cicd_example import command_line as cl  # noqa: E402
+
+BASELINE: Final[pathlib.Path] = HERE / "baseline.json"
+SIZES: Final[tuple] = (10, 10**3, 10**5, 10**7)
+MIN_SECONDS: Final[float] = 0.05  # the minimum total time of a timing loop
+
+
+class Result(NamedTuple):
+    """The measurements of one case at one size."""
+
+    case: str
+    size: int  # the nominal number of elements, one of SIZES
+    seconds: float  # the best time of one call
+    throughput: float  # elements per second
+    peak_rss: int  # bytes, of the process that ran the case
+    peak_traced: int  # bytes, the peak of the allocations traced in the call
+
+
+def grid_2d(size: int) -> tuple:
+    """Returns (nex, ney) with nex * ney close to size."""
+    nex = math.ceil(math.sqrt(size))
+    return nex, max(size // nex, 1)
+
+
+def grid_3d(size: int) -> tuple:
+    """Returns (nex, ney, nez) with nex * ney * nez close to size."""
+    nex = math.ceil(size ** (1 / 3))
+    ney, nez = grid_2d(max(size // nex, 1))
+    return nex, ney, nez
+
+
+def lattice_mesh(size: int, blocks: int = 4) -> tuple:
+    """Returns a mesh of about size hex elements in lattice connectivity,
+    split into blocks, in the tuple format of cicd_example.command_line."""
+    nex, ney, nez = grid_3d(size)
+    conn = np.concatenate(list(pattern.lattice_connectivity(nex=nex, ney=ney, nez=nez)))
+    # leave gaps in the node numbers, as a lattice with removed elements does
+    elements = [tuple(x) for x in (conn[:, 1:] * 3).tolist()]
+    step = math.ceil(len(elements) / blocks)
+    return tuple(
+        (block + 1, *elements[block * step : (block + 1) * step])
+        for block in range(blocks)
+    )
+
+
+def setup_quilt(size: int):
+    """Benchmarks pattern.quilt, vectorized."""
+    nex, ney = grid_2d(size)
+    return lambda: pattern.quilt(nex=nex, ney=ney, vectorized=True), nex * ney
+
+
+def setup_connectivity(size: int):
+    """Benchmarks pattern.connectivity, vectorized."""
+    nex, ney = grid_2d(size)
+    qq = pattern.quilt(nex=nex, ney=ney, vectorized=True)
+    return lambda: pattern.connectivity(qq), nex * ney
+
+
+def setup_lattice(size: int):
+    """Benchmarks pattern.lattice_connectivity, every chunk."""
+    nex, ney, nez = grid_3d(size)
+
+    def run():
+        for _ in pattern.lattice_connectivity(nex=nex, ney=ney, nez=nez):
+            pass
+
+    return run, nex * ney * nez
+
+
+def setup_renumber(size: int):
+    """Benchmarks command_line.renumber of 8 nodes per element."""
+    rng = np.random.default_rng(seed=0)
+    old = tuple((rng.permutation(size) * 3 + 1).tolist())
+    new = tuple(range(1, size + 1))
+    source = rng.choice(np.asarray(old), size=8 * size)
+    return lambda: cl.renumber(source=source, old=old, new=new), size
+
+
+def setup_mesh_element_connectivity(size: int):
+    """Benchmarks command_line.mesh_element_connectivity."""
+    mesh = lattice_mesh(size)
+    return lambda: cl.mesh_element_connectivity(mesh), sum(len(x) - 1 for x in mesh)
+
+
+def setup_elements_without_block_ids(size: int):
+    """Benchmarks command_line.elements_without_block_ids."""
+    mesh = lattice_mesh(size)
+    return lambda: cl.elements_without_block_ids(mesh), sum(len(x) - 1 for x in mesh)
+
+
+# the setup of each case, given about how many elements, returns the callable
+# and the actual number of elements
+CASES: Final[dict] = {
+    "quilt": setup_quilt,
+    "connectivity": setup_connectivity,
+    "lattice": setup_lattice,
+    "renumber": setup_renumber,
+    "mesh_element_connectivity": setup_mesh_element_connectivity,
+    "elements_without_block_ids": setup_elements_without_block_ids,
+}
+
+
+def _measure(case: str, size: int) -> Result:
+    """Measures the case in the current process."""
+    function, elements = CASES[case](size)
+
+    # time, repeating until the loop takes at least MIN_SECONDS, and without
+    # garbage collection, as timeit does
+    best, total = float("inf"), 0.0
+    gc.disable()
+    try:
+        while total < MIN_SECONDS or best == float("inf"):
+            start = time.perf_counter()
+            function()
+            elapsed = time.perf_counter() - start
+            best, total = min(best, elapsed), total + elapsed
+    finally:
+        gc.enable()
+
+    # allocations, in a separate call because tracing slows the timing
+    tracemalloc.start()
+    function()
+    _, peak_traced = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss *= 1 if sys.platform == "darwin" else 1024  # KiB on Linux
+
+    return Result(
+        case=case,
+        size=size,
+        seconds=best,
+        throughput=elements / best,
+        peak_rss=peak_rss,
+        peak_traced=peak_traced,
+    )
+
+
+def measure(case: str, size: int) -> Result:
+    """Measures the case at size elements in a fresh worker process."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("fork")) as pool:
+        return pool.submit(_measure, case, size).result()
+
+
+def load_baseline(path=BASELINE) -> dict:
+    """Returns the stored baseline, keyed by "case/size", or {} if none."""
+    path = pathlib.Path(path)
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_baseline(results, path=BASELINE) -> None:
+    """Stores the results as the baseline, merged into any existing one."""
+    baseline = load_baseline(path)
+    baseline.update({f"{x.case}/{x.size}": x._asdict() for x in results})
+    pathlib.Path(path).write_text(
+        json.dumps(baseline, indent=2, sort_keys=True) + "\n", encoding="utf-8"
+    )
+
+
+def main():
+    """Runs every case at every size up to --max-size and prints a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-size", type=int, default=10**5)
+    parser.add_argument("--save", action="store_true", help="store the baseline")
+    args = parser.parse_args()
+
+    results = []
+    print(
+        f"{'case':<28}{'size':>10}{'elem/s':>12}{'rss (MiB)':>11}{'traced (MiB)':>14}"
+    )
+    for case in CASES:
+        for size in (x for x in SIZES if x <= args.max_size):
+            result = measure(case, size)
+            results.append(result)
+            print(
+                f"{case:<28}{size:>10}{result.throughput:>12.3e}"
+                f"{result.peak_rss / 2**20:>11.1f}{result.peak_traced / 2**20:>14.1f}"
+            )
+
+    if args.save:
+        save_baseline(results)
+        print(f"baseline saved to {BASELINE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Cold-start times of the command line entry points.
+
+Each entry point runs in a fresh interpreter, as from a batch script, and
+the wall time of the whole process is compared with that of a bare
+interpreter, python -c pass.  See also the import time gates,
+cicd_release/tests/test_importtime.py and
+command_line/mypackage/tests/test_importtime.py.
+
+Example:
+    cd ~/mwe/python/benchmark
+    python coldstart.py            # 20 runs of each entry point
+    python coldstart.py --runs 100
+"""
+
+import argparse
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import time
+from typing import Final
+
+HERE: Final[pathlib.Path] = pathlib.Path(__file__).resolve().parent
+PATHS: Final[tuple] = (HERE.parent / "cicd_release", HERE.parent / "command_line")
+
+# name -> the statement run by the entry point of that name
+ENTRY_POINTS: Final[dict] = {
+    "python -c pass": "pass",
+    "hello": "from cicd_example.command_line import hello; hello()",
+    "cicd_example": "from cicd_example.command_line import mymodule; mymodule()",
+    "mypackage hello": "from mypackage.command_line import hello; hello()",
+    "mypackage": "from mypackage.command_line import mymodule; mymodule()",
+}
+
+
+def wall_times(statement: str, runs: int) -> list:
+    """Returns the wall time, in seconds, of each of runs fresh interpreters
+    that execute the statement."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(x) for x in PATHS] + [env.get("PYTHONPATH", "")]
+    )
+    result = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-c", statement],
+            env=env,
+            stdout=subprocess.DEVNULL,
+            check=True,
+        )
+        result.append(time.perf_counter() - start)
+    return result
+
+
+def main(argv=None) -> None:
+    """Prints the minimum and median cold-start time of each entry point."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20, help="runs per entry point")
+    args = parser.parse_args(argv)
+    assert args.runs >= 1, f"Error: runs={args.runs}, but runs>=1 required."
+
+    print(f"{'entry point':>16} {'min ms':>8} {'median ms':>10} {'over bare ms':>13}")
+    bare = None
+    for name, statement in ENTRY_POINTS.items():
+        times = wall_times(statement, args.runs)
+        best, median = min(times) * 1e3, statistics.median(times) * 1e3
+        bare = best if bare is None else bare
+        print(f"{name:>16} {best:8.1f} {median:10.1f} {best - bare:13.1f}")
+
+
+if __name__ == "__main__":
+    main()
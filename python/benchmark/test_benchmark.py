@@ -0,0 +1,62 @@
+"""The throughput regression gate, run with plain pytest, offline.
+
+Each case is compared to the stored baseline (see benchmark.py --save), and
+fails if its throughput drops by more than THRESHOLD in each of ATTEMPTS
+measurements.  Cases without a
+baseline are skipped.
+
+Example:
+    cd ~/mwe/python/benchmark
+    pytest -v
+    MWE_BENCH_MAX_SIZE=10000000 MWE_BENCH_THRESHOLD=0.1 pytest -v
+"""
+
+import os
+
+import pytest
+
+import benchmark as bm
+
+MAX_SIZE = int(os.environ.get("MWE_BENCH_MAX_SIZE", 10**5))
+THRESHOLD = float(os.environ.get("MWE_BENCH_THRESHOLD", 0.25))
+ATTEMPTS = 3
+
+
+@pytest.mark.parametrize("size", [x for x in bm.SIZES if x <= MAX_SIZE])
+@pytest.mark.parametrize("case", list(bm.CASES))
+def test_throughput(case, size):
+    """Tests that the throughput has not regressed against the baseline."""
+    baseline = bm.load_baseline().get(f"{case}/{size}")
+    if baseline is None:
+        pytest.skip(f"no baseline for {case}/{size}; run python benchmark.py --save")
+
+    # a slow measurement is retried in a fresh process, to rule out noise
+    minimum = (1 - THRESHOLD) * baseline["throughput"]
+    for _ in range(ATTEMPTS):
+        result = bm.measure(case, size)
+        if result.throughput >= minimum:
+            break
+
+    assert result.throughput >= minimum, (
+        f"{case} at {size} elements: {result.throughput:.3e} elements/s, "
+        f"below {minimum:.3e} ({THRESHOLD:.0%} under the baseline)"
+    )
+
+
+def test_measure():
+    """Tests that a measurement records time, peak RSS, and allocations."""
+    result = bm.measure("quilt", 10**3)
+
+    assert result.case == "quilt" and result.size == 10**3
+    assert result.seconds > 0 and result.throughput > 0
+    assert result.peak_rss > 0 and result.peak_traced > 0
+
+
+def test_baseline_round_trip(tmp_path):
+    """Tests that a stored baseline loads back by case and size."""
+    path = tmp_path / "baseline.json"
+    result = bm.Result("quilt", 10, 1e-6, 1e7, 2**20, 2**10)
+
+    bm.save_baseline([result], path=path)
+
+    assert bm.load_baseline(path=path) == {"quilt/10": result._asdict()}
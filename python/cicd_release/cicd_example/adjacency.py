@@ -0,0 +1,256 @@
+"""Sparse adjacency and assembly patterns of meshes, in CSR form.
+
+Given a connectivity array of one-based node numbers, as from
+pattern.connectivity without the element numbers, builds the compressed
+sparse row (CSR) adjacency of
+
+    node_nodes:      nodes that share an element (the assembly pattern),
+    element_elements: elements that share a side (edge in 2D, face in 3D),
+    node_elements:   the elements attached to each node.
+
+Rows and columns are zero-based, and the column indices of each row are
+sorted, so (indptr, indices) may be passed unchanged to
+scipy.sparse.csr_array.  For the structured lattices of pattern.quilt and
+pattern.lattice, lattice_node_nodes builds the node-node pattern in closed
+form, from the 9- or 27-point stencil, optionally over a thread pool.
+
+Example:
+    graph = node_nodes(conn)  # conn of shape (nel, nodes per element)
+    matrix = graph.matrix()  # requires scipy
+    graph = lattice_node_nodes(nex=100, ney=100, nez=100, max_workers=4)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+# Exodus II local node numbers of the element sides, as pattern.QuadMesh.sides
+# and pattern.HexMesh.sides, which are outside this package, see test_sides
+SIDES = {
+    4: ((1, 2), (2, 3), (3, 4), (4, 1)),
+    8: (
+        (1, 2, 6, 5),
+        (2, 3, 7, 6),
+        (3, 4, 8, 7),
+        (1, 5, 8, 4),
+        (1, 4, 3, 2),
+        (5, 6, 7, 8),
+    ),
+}
+
+CHUNK_ROWS = 1 << 18  # the rows of a lattice stencil built per unit of work
+
+
+class Adjacency(NamedTuple):
+    """A zero-based CSR sparsity pattern: the columns of row i are
+    indices[indptr[i]:indptr[i + 1]], in ascending order."""
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    shape: tuple  # (rows, columns)
+
+    @property
+    def degree(self) -> np.ndarray:
+        """The number of columns of each row."""
+        return np.diff(self.indptr)
+
+    def matrix(self):
+        """Returns the pattern as a scipy.sparse.csr_array of ones."""
+        from scipy import sparse  # pylint: disable=import-outside-toplevel
+
+        data = np.ones(len(self.indices), dtype=np.int8)
+        return sparse.csr_array((data, self.indices, self.indptr), shape=self.shape)
+
+
+def as_blocks(connectivity) -> list:
+    """Returns the connectivity as a list of 2D block arrays."""
+    if isinstance(connectivity, np.ndarray):
+        return [connectivity]
+    return [np.asarray(x) for x in connectivity]
+
+
+def _counting_order(keys: np.ndarray, size: int) -> np.ndarray:
+    """Returns the stable order of integer keys in [0, size), by one counting
+    sort per 16 bits of the keys, which NumPy sorts in linear time."""
+    order = np.arange(len(keys))
+    shift = 0
+    while shift == 0 or (size - 1) >> shift > 0:
+        digits = ((keys[order] >> shift) & 0xFFFF).astype(np.uint16)
+        order = order[np.argsort(digits, kind="stable")]
+        shift += 16
+    return order
+
+
+def _csr(rows: np.ndarray, cols: np.ndarray, shape: tuple) -> Adjacency:
+    """Returns the Adjacency of the (row, column) pairs, without duplicates,
+    in O(nnz): a counting sort of the pairs, then the row offsets from the
+    cumulative sum of the row counts."""
+    keys = rows.astype(np.int64) * shape[1] + cols
+    keys = keys[_counting_order(keys, shape[0] * shape[1])]
+    keys = keys[np.diff(keys, prepend=-1) != 0]
+    rows, indices = np.divmod(keys, shape[1]) if shape[1] else (keys, keys)
+    indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=shape[0]), out=indptr[1:])
+    return Adjacency(indptr=indptr, indices=indices, shape=shape)
+
+
+def _nnp(blocks: list, nnp: Optional[int]) -> int:
+    """Returns nnp, or else the largest node number of the blocks."""
+    if nnp is None:
+        nnp = max((int(x.max()) for x in blocks if x.size), default=0)
+    return nnp
+
+
+def node_nodes(
+    connectivity, nnp: Optional[int] = None, diagonal: bool = False
+) -> Adjacency:
+    """Returns the node-node Adjacency of a connectivity array, or tuple of
+    block arrays, of one-based node numbers.  Nodes are adjacent if they share
+    an element.  With diagonal=True, every node is adjacent to itself, which
+    is the sparsity pattern of an assembled finite element matrix.
+
+    Args:
+        connectivity: The (nel, nodes per element) array, or a tuple of
+            such arrays, one per block, e.g., CompactMesh.connectivity.
+        nnp: The number of nodes, by default the largest node number.
+        diagonal: Include the diagonal, i.e., the pairs (i, i).
+    """
+    blocks = as_blocks(connectivity)
+    nnp = _nnp(blocks, nnp)
+    rows, cols = [], []
+    for block in blocks:
+        if block.size:
+            zero = block.astype(np.int64) - 1
+            npe = zero.shape[1]
+            # every ordered pair of nodes of each element
+            rows.append(np.repeat(zero, npe, axis=1).ravel())
+            cols.append(np.tile(zero, (1, npe)).ravel())
+    if diagonal:
+        rows.append(np.arange(nnp))
+        cols.append(np.arange(nnp))
+    rows = np.concatenate(rows or [np.empty(0, np.int64)])
+    cols = np.concatenate(cols or [np.empty(0, np.int64)])
+    if not diagonal:
+        rows, cols = rows[rows != cols], cols[rows != cols]
+    return _csr(rows, cols, (nnp, nnp))
+
+
+def node_elements(connectivity, nnp: Optional[int] = None) -> Adjacency:
+    """Returns the node-element Adjacency of a connectivity array, or tuple of
+    block arrays, of one-based node numbers.  Elements are numbered
+    consecutively across the blocks, zero-based."""
+    blocks = [x for x in as_blocks(connectivity) if x.size]
+    nnp = _nnp(blocks, nnp)
+    empty = [np.empty(0, np.int64)]
+    nodes = np.concatenate([x.astype(np.int64).ravel() - 1 for x in blocks] or empty)
+    offsets = np.cumsum([0] + [len(x) for x in blocks])
+    elements = np.concatenate(
+        [np.repeat(np.arange(len(x)) + a, x.shape[1]) for x, a in zip(blocks, offsets)]
+        or empty
+    )
+    # a stable counting sort by node keeps the elements of each row ascending
+    order = _counting_order(nodes, nnp)
+    indptr = np.zeros(nnp + 1, dtype=np.int64)
+    np.cumsum(np.bincount(nodes, minlength=nnp), out=indptr[1:])
+    return Adjacency(
+        indptr=indptr, indices=elements[order], shape=(nnp, int(offsets[-1]))
+    )
+
+
+def element_elements(connectivity) -> Adjacency:
+    """Returns the element-element Adjacency of a connectivity array, or tuple
+    of block arrays, of one-based node numbers, in which elements are adjacent
+    if they share a side: an edge of a quadrilateral, or a face of a
+    hexahedron, in the Exodus II side order.  Elements are numbered
+    consecutively across the blocks, zero-based."""
+    blocks = [x for x in as_blocks(connectivity) if x.size]
+    npes = {x.shape[1] for x in blocks}
+    err = f"Error: nodes per element {npes}, but one of {tuple(SIDES)} required."
+    assert len(npes) <= 1 and npes <= set(SIDES), err
+    nel = sum(len(x) for x in blocks)
+    if not blocks:
+        return _csr(np.empty(0, np.int64), np.empty(0, np.int64), (nel, nel))
+
+    local = np.array(SIDES[npes.pop()]) - 1
+    faces = np.concatenate([x[:, local] for x in blocks])  # (nel, nsides, k)
+    faces = np.sort(faces.reshape(-1, local.shape[1]), axis=1)
+    order = np.lexsort(faces.T[::-1])
+    faces = faces[order]
+    shared = (faces[1:] == faces[:-1]).all(axis=1)
+    first = order[:-1][shared] // len(local)
+    second = order[1:][shared] // len(local)
+    rows = np.concatenate([first, second])
+    cols = np.concatenate([second, first])
+    return _csr(rows, cols, (nel, nel))
+
+
+def _stencil_rows(shape: tuple, start: int, stop: int, diagonal: bool) -> tuple:
+    """Returns the row lengths and column indices of the node-node stencil of
+    the zero-based rows start through stop - 1 of a structured grid of
+    (nx, ny, nz) nodes, numbered with x fastest."""
+    nx, ny, nz = shape
+    rows = np.arange(start, stop, dtype=np.int64)
+    jj, ii = np.divmod(rows, nx)
+    kk, jj = np.divmod(jj, ny)
+    # ascending offsets give ascending column indices within each row
+    steps = [
+        (di, dj, dk)
+        for dk in ((-1, 0, 1) if nz > 1 else (0,))
+        for dj in (-1, 0, 1)
+        for di in (-1, 0, 1)
+        if diagonal or (di, dj, dk) != (0, 0, 0)
+    ]
+    columns = np.stack([rows + di + dj * nx + dk * nx * ny for di, dj, dk in steps], 1)
+    valid = np.stack(
+        [
+            (0 <= ii + di)
+            & (ii + di < nx)
+            & (0 <= jj + dj)
+            & (jj + dj < ny)
+            & (0 <= kk + dk)
+            & (kk + dk < nz)
+            for di, dj, dk in steps
+        ],
+        axis=1,
+    )
+    return valid.sum(axis=1), columns[valid]
+
+
+def lattice_node_nodes(
+    *,
+    nex: int,
+    ney: int,
+    nez: int = 0,
+    diagonal: bool = False,
+    max_workers: Optional[int] = None,
+) -> Adjacency:
+    """Returns the node-node Adjacency of the quilt (nez=0) or lattice of
+    nex, ney, and nez elements along the x-, y-, and z-axis, from the 9- or
+    27-point stencil of each node, without building the connectivity.  Same
+    as node_nodes of pattern.connectivity or pattern.lattice_connectivity.
+
+    Args:
+        nex: The number of elements in the x-axis.
+        ney: The number of elements in the y-axis.
+        nez: The number of elements in the z-axis, or 0 for a quilt.
+        diagonal: Include the diagonal, i.e., the pairs (i, i).
+        max_workers: The number of threads, by default a single thread,
+            each building CHUNK_ROWS rows at a time.
+    """
+    err = f"Error: nex={nex}, ney={ney}, nez={nez}, but nex, ney>=1, nez>=0 required."
+    assert nex >= 1 and ney >= 1 and nez >= 0, err
+    shape = (nex + 1, ney + 1, nez + 1)
+    nnp = int(np.prod(shape))
+    bounds = list(range(0, nnp, CHUNK_ROWS)) + [nnp]
+    args = [(shape, a, b, diagonal) for a, b in zip(bounds[:-1], bounds[1:])]
+    if max_workers is None:
+        parts = [_stencil_rows(*x) for x in args]
+    else:
+        # the stencil arithmetic runs in NumPy, which releases the GIL
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            parts = list(pool.map(lambda x: _stencil_rows(*x), args))
+    indptr = np.zeros(nnp + 1, dtype=np.int64)
+    np.cumsum(np.concatenate([x for x, _ in parts]), out=indptr[1:])
+    indices = np.concatenate([x for _, x in parts])
+    return Adjacency(indptr=indptr, indices=indices, shape=(nnp, nnp))
@@ -0,0 +1,101 @@
+"""Thin client of the cicd_example daemon, see cicd_example.daemon.
+
+The client forwards its command line arguments, and its working directory,
+to the daemon over a Unix domain socket, prints the reply, and exits with
+its status.  It imports only the standard library, so it starts in about
+the time of a bare interpreter.  If no daemon is running, a file command,
+e.g., renumber, compact, or strip-blocks, runs in this process instead.
+The client connects only to a socket of its own user, so that another user
+cannot listen at the socket path first, in a shared temporary directory.
+
+Example:
+    cicd_example_daemon &  # once, e.g., at the start of a build script
+    cicd_example_client compact lattice.mesh compact.mesh
+    cicd_example_client renumber compact.mesh renumbered.mesh --map map.txt
+    cicd_example_client shutdown
+"""
+
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+from typing import Final, NamedTuple, Optional
+
+# the commands that run in the client process if no daemon is running
+FILE_COMMANDS: Final[tuple] = ("renumber", "compact", "strip-blocks")
+
+
+class Reply(NamedTuple):
+    """The result of a command."""
+
+    status: int  # the exit status, 0 on success
+    output: str  # the text printed by the command
+
+
+def socket_path() -> str:
+    """Returns the path of the daemon socket, from the CICD_EXAMPLE_SOCKET
+    environment variable, or else in the runtime directory of the user."""
+    path = os.environ.get("CICD_EXAMPLE_SOCKET")
+    if path:
+        return path
+    directory = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return os.path.join(directory, f"cicd_example-{os.getuid()}.sock")
+
+
+def check_owner(path: str) -> None:
+    """Checks that path is a socket of this user, so that no other user, who
+    may create it first in a shared temporary directory, sees the requests
+    or forges the replies.
+
+    Raises:
+        FileNotFoundError: If there is no file at the path.
+        PermissionError: If the file is not a socket, or of another user.
+    """
+    status = os.lstat(path)
+    if not stat.S_ISSOCK(status.st_mode) or status.st_uid != os.getuid():
+        raise PermissionError(f"Error: {path} is not a socket of this user.")
+
+
+def request(argv: list, path: Optional[str] = None) -> Reply:
+    """Sends the command line arguments to the daemon at the socket path,
+    and returns its Reply.
+
+    Raises:
+        OSError: If no daemon of this user listens at the path.
+    """
+    path = path or socket_path()
+    check_owner(path)
+    message = {"argv": list(argv), "cwd": os.getcwd()}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+        connection.connect(path)
+        connection.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        with connection.makefile("rb") as stream:
+            line = stream.readline()
+    if not line:
+        raise ConnectionResetError("Error: the daemon closed the connection.")
+    reply = json.loads(line)
+    return Reply(status=reply["status"], output=reply["output"])
+
+
+def client(argv: Optional[list] = None) -> int:
+    """The entry point of the client; returns the exit status."""
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        reply = request(argv)
+    except (FileNotFoundError, ConnectionRefusedError):
+        if not argv or argv[0] not in FILE_COMMANDS:
+            print(f"Error: no cicd_example daemon at {socket_path()}.")
+            return 1
+        # pylint: disable-next=import-outside-toplevel,cyclic-import
+        from cicd_example.daemon import run
+
+        reply = run(argv)
+    except PermissionError as error:
+        print(error)
+        return 1
+
+    if reply.output:
+        print(reply.output, end="" if reply.output.endswith("\n") else "\n")
+    return reply.status
@@ -1,6 +1,50 @@
-"""Illustration of command line entry points."""
+"""Illustration of command line entry points.
+
+The entry points run thousands of times from batch scripts, so this module
+imports only the standard library at startup: numpy is loaded on first
+use, see lazy_import, and the compiled kernels on first call, see
+compiled_kernels.
+"""
+
+from __future__ import annotations
+
+import functools
+import importlib.util
+import itertools
+import sys
+from typing import Final, NamedTuple, Optional
+
+
+def lazy_import(name: str):
+    """Returns the module name, to be executed on its first attribute access,
+    or None if it is not installed."""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return None
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+np = lazy_import("numpy")
+
+
+@functools.lru_cache(maxsize=None)
+def compiled_kernels():
+    """Returns the compiled kernels, see ~/mwe/maturin/mesh-kernels, imported
+    on the first call, or None if they are missing or fail to load, so that
+    the pure-Python paths are used instead."""
+    try:
+        import mesh_kernels  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    return mesh_kernels
 
-from typing import Final
 
 BANNER: Final[
     str
@@ -18,6 +62,12 @@ CLI_DOCS: Final[
 hello
     Runs the 'Hello world!' example.
 
+cicd_example_daemon
+    Serves the renumber, compact, and strip-blocks file commands.
+
+cicd_example_client
+    Runs a file command on the daemon, e.g., 'cicd_example_client --help'.
+
 pytest
     Runs the test suite (non-verbose option).
 
@@ -42,72 +92,248 @@ def hello() -> str:
     return "Hello world!"
 
 
+class RenumberMap:
+    """A lookup of `old` numbers that map into `new` numbers, built once and
+    then applied to any number of sources in linear time.
+
+    Sources that are tuples are mapped through a dictionary and returned as
+    tuples.  Sources that are NumPy arrays are mapped through a dense array
+    when the `old` numbers are non-negative integers of bounded size, and
+    through a sorted search otherwise, and are returned as arrays.
+    """
+
+    # `old` numbers up to DENSE_FACTOR * len(old) + DENSE_MIN use a dense array
+    DENSE_FACTOR: Final[int] = 4
+    DENSE_MIN: Final[int] = 1024
+
+    def __init__(self, old: tuple, new: tuple):
+        # the old and the new tuples musts have the same length
+        err = "Tuples `old` and `new` must have equal length."
+        assert len(old) == len(new), err
+
+        self.old = old
+        self.new = new
+
+    @functools.cached_property
+    def lookup(self) -> dict:
+        """The old to new dictionary.  The first occurrence of a repeated
+        `old` number wins, as with `old.index`."""
+        return dict(zip(reversed(self.old), reversed(self.new)))
+
+    @functools.cached_property
+    def arrays(self) -> tuple:
+        """The (kind, keys, values) NumPy lookup.  For kind "dense", values
+        is indexed by the old number and keys flags the old numbers present.
+        For kind "sorted", keys are the sorted old numbers and values the
+        corresponding new numbers."""
+        old = np.asarray(self.old)
+        new = np.asarray(self.new)
+        bound = self.DENSE_FACTOR * len(old) + self.DENSE_MIN
+        integers = old.dtype.kind in "iu" and old.size > 0
+        if integers and 0 <= old.min() and old.max() < bound:
+            size = int(old.max()) + 1
+            present = np.zeros(size, dtype=bool)
+            present[old] = True
+            values = np.zeros(size, dtype=new.dtype)
+            values[old[::-1]] = new[::-1]
+            return "dense", present, values
+
+        order = np.argsort(old, kind="stable")
+        return "sorted", old[order], new[order]
+
+    def __call__(self, source):
+        """Returns the source with the `new` numbers.
+
+        Raises:
+            ValueError: if an item of the source is not in `old`.
+        """
+        if isinstance(source, np.ndarray):
+            return self._map_array(source)
+
+        lookup = self.lookup
+        try:
+            return tuple(lookup[item] for item in source)
+        except KeyError as error:
+            raise ValueError(f"{error.args[0]} is not in `old`") from error
+
+    def _map_array(self, source: np.ndarray) -> np.ndarray:
+        kind, keys, values = self.arrays
+        integers = source.dtype.kind in "iu" and values.dtype.kind in "iu"
+        # dense keys are integers, but sorted float keys would be truncated
+        integers = integers and (kind == "dense" or keys.dtype.kind in "iu")
+        if integers and compiled_kernels() is not None:
+            return self._map_array_compiled(source)
+
+        if kind == "dense" and source.dtype.kind in "iu":
+            inside = (source >= 0) & (source < len(keys))
+            if inside.all() and keys[source].all():
+                return values[source]
+        else:
+            if kind == "dense":
+                # a float source cannot index, so search the present numbers
+                keys, values = np.flatnonzero(keys), values[keys]
+            idx = np.searchsorted(keys, source)
+            found = idx < len(keys)
+            found[found] = keys[idx[found]] == source[found]
+            if found.all():
+                return values[idx]
+
+        raise ValueError("source contains numbers that are not in `old`")
+
+    def _map_array_compiled(self, source: np.ndarray) -> np.ndarray:
+        kind, keys, values = self.arrays
+        kernels = compiled_kernels()
+        source = np.ascontiguousarray(source, dtype=np.int64)
+        out = np.empty_like(source)
+        if kind == "dense":
+            found = kernels.renumber_dense(
+                source, keys.view(np.uint8), values.astype(np.int64, copy=False), out
+            )
+        else:
+            found = kernels.renumber_sorted(
+                source,
+                keys.astype(np.int64, copy=False),
+                values.astype(np.int64, copy=False),
+                out,
+            )
+        if not found:
+            raise ValueError("source contains numbers that are not in `old`")
+
+        return out.astype(values.dtype, copy=False)
+
+
 def renumber(source: tuple, old: tuple, new: tuple) -> tuple:
     """Given a source tuple, composed of a list of positive integers,
     a tuple of `old` numbers that maps into `new` numbers, return the
-    source tuple with the `new` numbers."""
+    source tuple with the `new` numbers.  A NumPy array source returns
+    a NumPy array.  To map many sources with the same `old` and `new`,
+    build a RenumberMap once instead."""
+
+    return RenumberMap(old=old, new=new)(source)
+
+
+class CompactMesh(NamedTuple):
+    """A mesh with compact finite element connectivity, numbered 1 through
+    the number of unique nodes."""
+
+    blocks: tuple  # the block numbers
+    connectivity: tuple  # per block, an array of the renumbered elements
+    node_map: RenumberMap  # the lattice to finite element node number map
+
+    @property
+    def nodes(self) -> np.ndarray:
+        """The lattice node numbers, node n at n - 1."""
+        return self.node_map.old
+
+
+def node_map(nodes: np.ndarray) -> RenumberMap:
+    """Returns the map of the lattice node numbers into 1, 2, ..., by
+    position, e.g., for a CompactMesh."""
+    return RenumberMap(old=nodes, new=np.arange(1, len(nodes) + 1))
+
+
+def block_elements(item: tuple) -> np.ndarray:
+    """Given a block, a block number followed by its elements, returns the
+    elements as an integer array.  An empty block has shape (0,)."""
+    if len(item) == 1:
+        return np.empty(0, dtype=np.int64)
+    return np.asarray(item[1:])
+
+
+def compact_mesh(
+    mesh_lattice_connectivity: tuple, max_workers: Optional[int] = None
+) -> CompactMesh:
+    """Given a mesh with lattice connectivity, return the CompactMesh with
+    finite element connectivity.  All blocks are renumbered in one pass.
+    If max_workers is given, the blocks are instead renumbered concurrently
+    on a pool of max_workers processes; see cicd_example.parallel.
+    """
+    if max_workers is not None:
+        # pylint: disable-next=import-outside-toplevel,cyclic-import
+        from cicd_example.parallel import compact_mesh_parallel
 
-    # the old and the new tuples musts have the same length
-    err = "Tuples `old` and `new` must have equal length."
-    assert len(old) == len(new), err
+        return compact_mesh_parallel(mesh_lattice_connectivity, max_workers)
 
-    result = ()
-    for item in source:
-        idx = old.index(item)
-        new_value = new[idx]
-        result = result + (new_value,)
+    blocks = tuple(item[0] for item in mesh_lattice_connectivity)
+    # The second and onward items of each block are the elements
+    elements = [block_elements(item) for item in mesh_lattice_connectivity]
 
-    return result
+    # the sorted unique lattice node numbers map into 1, 2, ..., by position
+    flat = np.concatenate([x.ravel() for x in elements] or [np.empty(0, int)])
+    kernels = compiled_kernels() if flat.dtype.kind in "iu" else None
+    if kernels is not None:
+        flat64 = flat.astype(np.int64, copy=False)
+        nodes, inverse = np.empty_like(flat64), np.empty_like(flat64)
+        count = kernels.compact(flat64, nodes, inverse)
+        nodes = nodes[:count].astype(flat.dtype, copy=False)
+        inverse = inverse.astype(flat.dtype, copy=False)
+    else:
+        nodes, inverse = np.unique(flat, return_inverse=True)
+        inverse = inverse.astype(flat.dtype) + 1
 
+    splits = np.cumsum([x.size for x in elements])[:-1]
+    connectivity = tuple(
+        np.ascontiguousarray(y.reshape(x.shape))
+        for x, y in zip(elements, np.split(inverse, splits))
+    )
 
-def mesh_element_connectivity(mesh_lattice_connectivity: tuple):
+    return CompactMesh(
+        blocks=blocks, connectivity=connectivity, node_map=node_map(nodes)
+    )
+
+
+def mesh_element_connectivity(
+    mesh_lattice_connectivity: tuple, max_workers: Optional[int] = None
+):
     """Given a mesh with lattice connectivity, return a mesh with finite
-    element connectivity.
+    element connectivity.  See compact_mesh for max_workers.
     """
-    # create a list of unordered lattice node numbers
-    ln = []
-    for item in mesh_lattice_connectivity:
-        print(f"item is {item}")
-        # The first item is the block number
-        # block = item[0]
-        # The second and onward items are the elements
-        elements = item[1:]
-        for element in elements:
-            ln += list(element)
-
-    ln_set = set(ln)  # sets are not necessarily ordered
-    ln_ordered = tuple(sorted(ln_set))  # now these unique integers are ordered
-
-    # and they will map into the new compressed unique interger list `mapsto`
-    mapsto = tuple(range(1, len(ln_ordered)+1))
-
-    # now build a mesh_with_element_connectivity
-    mesh = ()  # empty tuple
-    # breakpoint()
-    for item in mesh_lattice_connectivity:
-        # The first item is the block number
-        block_number = item[0]
-        block_and_elements = ()  # empty tuple
-        # insert the block number
-        block_and_elements = block_and_elements + (block_number,)
-        for element in item[1:]:
-            new_element = renumber(source=element, old=ln_ordered, new=mapsto)
-            # overwrite
-            block_and_elements = block_and_elements + (new_element,)
-
-        mesh = mesh + (block_and_elements,)  # overwrite
-
-    return mesh
-
-
-def elements_without_block_ids(mesh: tuple) -> tuple:
+    mesh = compact_mesh(mesh_lattice_connectivity, max_workers=max_workers)
+
+    return tuple(
+        (block_number,) + tuple(tuple(x) for x in elements.tolist())
+        for block_number, elements in zip(mesh.blocks, mesh.connectivity)
+    )
+
+
+class BlockMesh(NamedTuple):
+    """A mesh stored as one flat connectivity buffer and block offsets, in
+    compressed sparse row (CSR) style.  The elements of block blocks[i] are
+    the rows offsets[i] through offsets[i + 1] - 1 of the connectivity."""
+
+    blocks: tuple  # the block numbers
+    offsets: np.ndarray  # the first element of each block, and the total
+    connectivity: np.ndarray  # the (elements, nodes per element) buffer
+
+    def block(self, index: int) -> np.ndarray:
+        """Returns the elements of the block at position index, as a view of
+        the connectivity buffer."""
+        return self.connectivity[self.offsets[index] : self.offsets[index + 1]]
+
+
+def block_mesh(mesh: tuple) -> BlockMesh:
+    """Given a mesh of blocks, each a block number followed by elements with
+    the same number of nodes, returns the BlockMesh, copying each element
+    into the buffer exactly once."""
+    blocks = tuple(item[0] for item in mesh)
+    counts = [len(item) - 1 for item in mesh]
+    offsets = np.zeros(len(mesh) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+
+    elements = [item[1:] for item in mesh if len(item) > 1]
+    err = "Elements must have the same number of nodes."
+    assert len({len(x) for x in itertools.chain.from_iterable(elements)}) <= 1, err
+    connectivity = np.array(list(itertools.chain.from_iterable(elements)))
+
+    return BlockMesh(blocks=blocks, offsets=offsets, connectivity=connectivity)
+
+
+def elements_without_block_ids(mesh):
     """Given a mesh, removes the block ids and returns only just the
-    element connectivities.
+    element connectivities.  For a BlockMesh, returns a view of the
+    connectivity buffer, without a copy.
     """
+    if isinstance(mesh, BlockMesh):
+        return mesh.connectivity.view()
 
-    aa = ()
-    for item in mesh:
-        bb = item[1:]
-        aa = aa + bb
-
-    return aa
+    return tuple(itertools.chain.from_iterable(item[1:] for item in mesh))
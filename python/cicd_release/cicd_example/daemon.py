@@ -0,0 +1,385 @@
+"""A long-lived local server of the cicd_example file commands, so that a
+build script that runs hundreds of commands pays for interpreter startup,
+and for importing numpy, once.
+
+The daemon listens on a Unix domain socket, see client.socket_path, that
+only its user may connect to, and serves each connection on an asyncio
+event loop.  A request is one line of JSON, {"argv": [...], "cwd": ...},
+and its reply one line of JSON, {"status": ..., "output": ...}; a
+connection may send many requests.  Commands run on a thread pool, and
+share warm caches between requests: the memory-mapped input meshes, their
+compacted meshes, and the RenumberMap of each map file, each keyed by
+path and checked against the modification time and size of the file.
+
+Commands, with relative paths taken from the working directory of the
+client:
+    renumber INPUT OUTPUT --map MAP
+        Renumbers the nodes of the mesh file INPUT with the two-column
+        text file MAP of old and new node numbers, and writes OUTPUT.
+    compact INPUT OUTPUT
+        Renumbers the lattice connectivity of INPUT into finite element
+        connectivity, see command_line.compact_mesh, and writes OUTPUT.
+    strip-blocks INPUT OUTPUT
+        Writes the elements of every block of INPUT, without the block
+        numbers, as one .npy array.
+    ping, stats, shutdown
+        Daemon status, cache statistics, and stop the daemon.
+
+Outputs are written to a temporary file, then renamed, so an output may
+replace an input, and readers never see a partial file.
+
+Example:
+    cicd_example_daemon --workers 4 &
+    cicd_example_client compact lattice.mesh compact.mesh
+"""
+
+import argparse
+import asyncio
+import collections
+import contextlib
+import io
+import json
+import os
+import pathlib
+import signal
+import socket
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Final, NamedTuple, Optional
+
+from cicd_example import command_line as cl
+from cicd_example.client import Reply, check_owner, socket_path
+from cicd_example.command_line import lazy_import
+
+np = lazy_import("numpy")
+mesh_file = lazy_import("cicd_example.mesh_file")
+
+MAX_ENTRIES: Final[int] = 64  # the cached files, per kind, least recent first
+
+
+class CacheStats(NamedTuple):
+    """The use of a Cache."""
+
+    entries: int
+    hits: int
+    misses: int
+
+
+class Cache:
+    """A least recently used cache of values built from files, keyed by kind
+    and path.  A value is rebuilt when its file changes.  Safe to share
+    between threads.
+
+    Args:
+        max_entries: The number of values kept, per kind.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        assert max_entries >= 1, f"Error: max_entries={max_entries} < 1."
+        self.max_entries = max_entries
+        self.entries = collections.defaultdict(collections.OrderedDict)
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, kind: str, path, build: Callable):
+        """Returns the value of kind for the file at path, built with
+        build(path) if it is not cached or the file has changed."""
+        path = str(pathlib.Path(path).resolve())
+        stat = os.stat(path)
+        key = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            entries = self.entries[kind]
+            cached = entries.get(path)
+            if cached is not None and cached[0] == key:
+                entries.move_to_end(path)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        value = build(path)
+        with self.lock:
+            entries[path] = (key, value)
+            entries.move_to_end(path)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+        return value
+
+    def stats(self) -> CacheStats:
+        """Returns the CacheStats."""
+        with self.lock:
+            entries = sum(len(x) for x in self.entries.values())
+            return CacheStats(entries=entries, hits=self.hits, misses=self.misses)
+
+
+def _replace(path: str, write: Callable) -> None:
+    """Writes a new file at path with write(temporary path), then renames it
+    over path."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        write(temp)
+        os.replace(temp, path)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+def _write_mesh(path: str, blocks: tuple, connectivity: tuple, coordinates) -> None:
+    """Writes the blocks, and (dim, num_nodes) coordinates, to a mesh file."""
+    mesh = tuple((b, x) if x.size else (b,) for b, x in zip(blocks, connectivity))
+    _replace(path, lambda x: mesh_file.write_mesh(x, mesh, coordinates.T))
+
+
+def _node_map(path: str):
+    """Returns the RenumberMap of a two-column text file of old and new node
+    numbers, with its lookup arrays built."""
+    pairs = np.loadtxt(path, dtype=np.int64, ndmin=2)
+    assert pairs.shape[1:] == (2,), f"Error: {path} needs two columns, old new."
+    node_map = cl.RenumberMap(old=pairs[:, 0], new=pairs[:, 1])
+    _ = node_map.arrays  # warm
+    return node_map
+
+
+def _compact(path: str):
+    """Returns the CompactMesh of the mesh file at path."""
+    mesh = mesh_file.read_mesh(path)
+    lattice = tuple((b, *c) for b, c in zip(mesh.blocks, mesh.connectivity))
+    return cl.compact_mesh(lattice)
+
+
+def renumber(args, cache: Cache) -> str:
+    """The renumber command.  Coordinates move with their nodes, so a map of
+    a mesh with coordinates must permute the node numbers it names."""
+    mesh = cache.get("mesh", args.input, mesh_file.read_mesh)
+    node_map = cache.get("map", args.map, _node_map)
+    connectivity = tuple(node_map(np.asarray(x)) for x in mesh.connectivity)
+
+    coordinates = mesh.coordinates
+    if coordinates.shape[1]:
+        old, new = np.asarray(node_map.old), np.asarray(node_map.new)
+        err = "Error: with coordinates, the map must permute nodes 1 to num_nodes."
+        assert (np.sort(old) == np.sort(new)).all(), err
+        assert old.min(initial=1) >= 1, err
+        assert old.max(initial=0) <= coordinates.shape[1], err
+        coordinates = np.array(coordinates)
+        coordinates[:, new - 1] = mesh.coordinates[:, old - 1]
+
+    _write_mesh(args.output, mesh.blocks, connectivity, coordinates)
+    return f"renumbered {len(node_map.old)} nodes into {args.output}"
+
+
+def compact(args, cache: Cache) -> str:
+    """The compact command.  The coordinates of the lattice nodes, if any,
+    are kept for the nodes of the compact mesh."""
+    mesh = cache.get("compact", args.input, _compact)
+    coordinates = cache.get("mesh", args.input, mesh_file.read_mesh).coordinates
+    if coordinates.shape[1]:
+        err = f"Error: {args.input} has fewer coordinates than nodes."
+        assert mesh.nodes.max(initial=0) <= coordinates.shape[1], err
+        coordinates = coordinates[:, mesh.nodes - 1]
+
+    _write_mesh(args.output, mesh.blocks, mesh.connectivity, coordinates)
+    return f"compacted {len(mesh.nodes)} nodes into {args.output}"
+
+
+def strip_blocks(args, cache: Cache) -> str:
+    """The strip-blocks command."""
+    mesh = cache.get("mesh", args.input, mesh_file.read_mesh)
+    blocks = [x for x in mesh.connectivity if x.size]
+    err = f"Error: the elements of {args.input} differ in number of nodes."
+    assert len({x.shape[1] for x in blocks}) <= 1, err
+    elements = np.concatenate(blocks) if blocks else np.empty((0, 0), np.int64)
+
+    def write(path):
+        with open(path, mode="wb") as stream:
+            np.save(stream, elements)
+
+    _replace(args.output, write)
+    return f"wrote {len(elements)} elements into {args.output}"
+
+
+COMMANDS: Final[dict] = {
+    "renumber": renumber,
+    "compact": compact,
+    "strip-blocks": strip_blocks,
+}
+
+
+def parser() -> argparse.ArgumentParser:
+    """Returns the parser of the command line of a request."""
+    result = argparse.ArgumentParser(
+        prog="cicd_example_client",
+        description="Runs a cicd_example file command on the daemon.",
+    )
+    commands = result.add_subparsers(dest="command", required=True)
+    for name, help_text in (
+        ("renumber", "renumbers the nodes of a mesh file with a map file"),
+        ("compact", "compacts the lattice connectivity of a mesh file"),
+        ("strip-blocks", "writes the elements of a mesh file as one .npy array"),
+    ):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("input", help="the input mesh file")
+        command.add_argument("output", help="the output file")
+        if name == "renumber":
+            command.add_argument(
+                "--map", required=True, help="the text file of old and new numbers"
+            )
+    commands.add_parser("ping", help="replies if the daemon is running")
+    commands.add_parser("stats", help="prints the cache statistics")
+    commands.add_parser("shutdown", help="stops the daemon")
+    return result
+
+
+def parse(argv: list, cwd: Optional[str] = None):
+    """Returns the parsed arguments of a request, with absolute paths, or
+    the Reply of a request that does not parse, e.g., --help."""
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            args = parser().parse_args(argv)
+    except SystemExit as error:
+        return Reply(status=error.code or 0, output=output.getvalue())
+
+    for name in ("input", "output", "map"):
+        if getattr(args, name, None) is not None:
+            setattr(args, name, os.path.join(cwd or os.getcwd(), getattr(args, name)))
+    return args
+
+
+def execute(args, cache: Cache) -> Reply:
+    """Runs the file command of the parsed arguments, and returns its Reply.
+    A failing command is reported in the Reply, and does not raise, so
+    that a malformed input cannot drop the connection to the daemon."""
+    try:
+        return Reply(status=0, output=COMMANDS[args.command](args, cache))
+    except (AssertionError, OSError, ValueError) as error:
+        return Reply(status=1, output=f"{args.command}: {error}")
+    except Exception as error:  # pylint: disable=broad-exception-caught
+        # e.g., struct.error or KeyError from a truncated or foreign file
+        message = f"{args.command}: {type(error).__name__}: {error}"
+        return Reply(status=1, output=message)
+
+
+def run(argv: list, cache: Optional[Cache] = None) -> Reply:
+    """Runs a file command in this process, as the daemon would."""
+    args = parse(argv)
+    if isinstance(args, Reply):
+        return args
+    assert args.command in COMMANDS, f"Error: {args.command} needs the daemon."
+    return execute(args, cache or Cache())
+
+
+class Daemon:
+    """The server of requests on a Unix domain socket.
+
+    Args:
+        path: The socket path.
+        workers: The number of threads that run commands.
+    """
+
+    def __init__(self, path: str, workers: Optional[int] = None):
+        self.path = path
+        self.cache = Cache()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.requests = 0
+        self.stop = None  # the asyncio.Event of shutdown, set by serve
+
+    async def respond(self, message: bytes) -> Reply:
+        """Returns the Reply of one request."""
+        try:
+            request = json.loads(message)
+            argv, cwd = list(request["argv"]), request.get("cwd")
+        except (ValueError, KeyError, TypeError):
+            return Reply(status=2, output="Error: invalid request.")
+
+        self.requests += 1
+        args = parse(argv, cwd)
+        if isinstance(args, Reply):
+            return args
+        if args.command == "ping":
+            return Reply(status=0, output=f"pong {os.getpid()}")
+        if args.command == "stats":
+            stats = {"requests": self.requests, **self.cache.stats()._asdict()}
+            return Reply(status=0, output=json.dumps(stats))
+        if args.command == "shutdown":
+            self.stop.set()
+            return Reply(status=0, output="shutting down")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, execute, args, self.cache)
+
+    async def handle(self, reader, writer) -> None:
+        """Serves the requests of one connection, one line each."""
+        try:
+            while line := await reader.readline():
+                reply = await self.respond(line)
+                writer.write(json.dumps(reply._asdict()).encode("utf-8") + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            pass  # an idle connection, at shutdown
+        finally:
+            writer.close()
+
+    async def serve(self) -> None:
+        """Serves requests until shutdown, SIGINT, or SIGTERM."""
+        self.stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for number in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(number, self.stop.set)
+
+        _remove_stale(self.path)
+        old_umask = os.umask(0o077)  # only this user may connect
+        try:
+            server = await asyncio.start_unix_server(self.handle, path=self.path)
+        finally:
+            os.umask(old_umask)
+        try:
+            async with server:
+                await self.stop.wait()
+        finally:
+            self.executor.shutdown(wait=True)
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.path)
+
+
+def _remove_stale(path: str) -> None:
+    """Removes the socket at path if no daemon listens on it.
+
+    Raises:
+        FileExistsError: If a daemon already listens on it.
+        PermissionError: If the path is not a socket of this user.
+    """
+    try:
+        check_owner(path)
+    except FileNotFoundError:
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(path)
+        except ConnectionRefusedError:
+            os.unlink(path)
+            return
+    raise FileExistsError(f"Error: a daemon already listens at {path}.")
+
+
+def daemon(argv: Optional[list] = None) -> int:
+    """The entry point of the daemon; returns the exit status."""
+    arguments = argparse.ArgumentParser(
+        prog="cicd_example_daemon", description="Serves cicd_example commands."
+    )
+    arguments.add_argument("--socket", default=None, help="the socket path")
+    arguments.add_argument("--workers", type=int, default=None, help="threads")
+    args = arguments.parse_args(argv)
+    path = args.socket or socket_path()
+
+    np.zeros(1)  # warm, before the first request
+    try:
+        asyncio.run(Daemon(path, workers=args.workers).serve())
+    except (FileExistsError, PermissionError) as error:
+        print(error)
+        return 1
+    return 0
@@ -0,0 +1,184 @@
+"""Streaming writer and memory-mapped reader of binary mesh files.
+
+The layout follows the Exodus II ordering: nodal coordinates are stored by
+component (all x, then all y, then all z), followed by the element blocks in
+order, each a (number of elements, nodes per element) array of one-based
+global node numbers.  Elements are numbered consecutively across the blocks.
+
+File layout, all little-endian:
+
+    header      MAGIC, then uint32 version, uint32 reserved, uint64 offset
+                of the table of contents
+    coordinates float64, dim components of num_nodes values each
+    blocks      the connectivity of each block, one after the other
+    contents    a UTF-8 JSON table of contents with the shape, dtype, and
+                offset of every section
+
+Coordinates and connectivity are written in chunks, so meshes larger than
+memory can be produced, e.g., from pattern.lattice_connectivity.  The reader
+maps each section with np.memmap, with no parse step.  Only local files are
+read or written.
+
+Example:
+    with MeshWriter("cube.mesh", num_nodes=8, dim=3) as writer:
+        writer.write_coordinates(coordinates)
+        writer.write_block(1, (chunk[:, 1:] for chunk in chunks))
+    mesh = read_mesh("cube.mesh")
+"""
+
+import json
+import struct
+from typing import Final, Iterable, NamedTuple, Optional
+
+import numpy as np
+
+MAGIC: Final[bytes] = b"MWEMESH\0"
+VERSION: Final[int] = 1
+HEADER: Final[struct.Struct] = struct.Struct("<8sIIQ")
+
+
+class MeshFile(NamedTuple):
+    """A mesh file opened with read_mesh, with memory-mapped sections."""
+
+    coordinates: np.ndarray  # shape (dim, num_nodes), by component
+    blocks: tuple  # the block numbers
+    connectivity: tuple  # per block, shape (elements, nodes per element)
+
+
+class MeshWriter:
+    """Writes a mesh file in chunks.  Use as a context manager; the table of
+    contents is written on exit.
+
+    Args:
+        path: The file to write.
+        num_nodes: The number of nodal points.
+        dim: The number of coordinate components, 2 or 3.
+    """
+
+    def __init__(self, path, *, num_nodes: int, dim: int):
+        assert dim in (2, 3), f"Error: dim={dim}, but dim of 2 or 3 required."
+        self.num_nodes = num_nodes
+        self.dim = dim
+        self.nodes_written = 0
+        self.blocks = []
+        self.stream = open(path, mode="wb")  # pylint: disable=consider-using-with
+
+        # reserve the header and the coordinates, which are filled in place
+        self.stream.write(HEADER.pack(MAGIC, VERSION, 0, 0))
+        self.stream.truncate(HEADER.size + 8 * dim * num_nodes)
+        self.end = self.stream.seek(0, 2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.stream.close()
+
+    def write_coordinates(self, chunk) -> None:
+        """Writes the coordinates of the next len(chunk) nodes, given as an
+        array of shape (len(chunk), dim)."""
+        chunk = np.asarray(chunk, dtype="<f8").reshape(-1, self.dim)
+        stop = self.nodes_written + len(chunk)
+        err = f"Error: {stop} nodes written, but num_nodes={self.num_nodes}."
+        assert stop <= self.num_nodes, err
+
+        for component in range(self.dim):
+            offset = HEADER.size + 8 * (component * self.num_nodes + self.nodes_written)
+            self.stream.seek(offset)
+            self.stream.write(np.ascontiguousarray(chunk[:, component]).tobytes())
+        self.nodes_written = stop
+
+    def write_block(
+        self,
+        block: int,
+        chunks: Iterable,
+        nodes_per_element: Optional[int] = None,
+        dtype="<i8",
+    ) -> None:
+        """Writes an element block from an iterable of connectivity chunks,
+        each an array of shape (elements, nodes_per_element).  The
+        nodes_per_element is taken from the first chunk if not given."""
+        self.stream.seek(self.end)
+        offset = self.end
+        num_elements = 0
+        for chunk in chunks:
+            chunk = np.asarray(chunk, dtype=dtype)
+            if nodes_per_element is None:
+                nodes_per_element = chunk.shape[-1]
+            chunk = chunk.reshape(-1, nodes_per_element)
+            self.stream.write(chunk.tobytes())
+            num_elements += len(chunk)
+
+        self.end = self.stream.tell()
+        self.blocks.append(
+            {
+                "id": block,
+                "offset": offset,
+                "shape": [num_elements, nodes_per_element or 0],
+                "dtype": np.dtype(dtype).str,
+            }
+        )
+
+    def close(self) -> None:
+        """Writes the table of contents and closes the file.  An incomplete
+        file is closed without a table of contents, so read_mesh rejects it.
+        """
+        try:
+            err = f"Error: {self.nodes_written} of {self.num_nodes} nodes written."
+            assert self.nodes_written == self.num_nodes, err
+
+            contents = {
+                "coordinates": {
+                    "offset": HEADER.size,
+                    "shape": [self.dim, self.num_nodes],
+                    "dtype": "<f8",
+                },
+                "blocks": self.blocks,
+            }
+            self.stream.seek(self.end)
+            self.stream.write(json.dumps(contents).encode("utf-8"))
+            self.stream.seek(0)
+            self.stream.write(HEADER.pack(MAGIC, VERSION, 0, self.end))
+        finally:
+            self.stream.close()
+
+
+def _section(path, section: dict) -> np.ndarray:
+    shape = tuple(section["shape"])
+    if 0 in shape:  # np.memmap cannot map an empty section
+        return np.empty(shape, dtype=section["dtype"])
+    return np.memmap(
+        path, mode="r", dtype=section["dtype"], offset=section["offset"], shape=shape
+    )
+
+
+def read_mesh(path) -> MeshFile:
+    """Opens a mesh file written by MeshWriter, memory-mapping the coordinates
+    and the connectivity of every block, read-only."""
+    with open(path, mode="rb") as stream:
+        magic, version, _, toc = HEADER.unpack(stream.read(HEADER.size))
+        err = f"Error: {path} is not a mesh file of version {VERSION}."
+        assert magic == MAGIC and version == VERSION and toc > 0, err
+        stream.seek(toc)
+        contents = json.loads(stream.read().decode("utf-8"))
+
+    return MeshFile(
+        coordinates=_section(path, contents["coordinates"]),
+        blocks=tuple(x["id"] for x in contents["blocks"]),
+        connectivity=tuple(_section(path, x) for x in contents["blocks"]),
+    )
+
+
+def write_mesh(path, mesh: tuple, coordinates=None) -> None:
+    """Writes a mesh of blocks, each a block number followed by its elements,
+    as in cicd_example.command_line, with optional (num_nodes, dim)
+    coordinates."""
+    coordinates = np.zeros((0, 3)) if coordinates is None else np.asarray(coordinates)
+    num_nodes, dim = coordinates.shape
+    with MeshWriter(path, num_nodes=num_nodes, dim=dim) as writer:
+        writer.write_coordinates(coordinates)
+        for item in mesh:
+            writer.write_block(item[0], [item[1:]] if len(item) > 1 else [])
@@ -0,0 +1,104 @@
+"""Block-parallel renumbering of meshes over a process pool.
+
+The lattice connectivity of every block is copied once into shared memory,
+together with the sorted global set of lattice node numbers.  Each worker
+attaches to the shared buffers by name, renumbers the elements of one
+block, and writes them into a shared output buffer, so no connectivity is
+pickled between processes.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from cicd_example.command_line import CompactMesh, block_elements, node_map
+
+
+class SharedArray(NamedTuple):
+    """The description of a one-dimensional array in shared memory."""
+
+    name: str
+    size: int
+    dtype: str
+
+
+def _share(array: np.ndarray):
+    """Copies the array into a new shared memory block, and returns the
+    block and its SharedArray description."""
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm, SharedArray(name=shm.name, size=array.size, dtype=array.dtype.str)
+
+
+def _attach(shared: SharedArray):
+    """Attaches to a shared memory block created by the parent process, and
+    returns the block and its array view.  The parent owns, and unlinks, the
+    block; the pool workers share the parent's resource tracker."""
+    shm = shared_memory.SharedMemory(name=shared.name)
+    return shm, np.ndarray((shared.size,), dtype=shared.dtype, buffer=shm.buf)
+
+
+def _renumber_block(
+    flat: SharedArray, nodes: SharedArray, out: SharedArray, start: int, stop: int
+) -> None:
+    """Renumbers the entries start through stop - 1 of the flat lattice
+    connectivity into the output buffer."""
+    blocks = [_attach(x) for x in (flat, nodes, out)]
+    try:
+        (_, ff), (_, nn), (_, oo) = blocks
+        oo[start:stop] = np.searchsorted(nn, ff[start:stop]) + 1
+        del ff, nn, oo
+    finally:
+        for shm, _ in blocks:
+            shm.close()
+
+
+def _renumber_blocks(
+    shared: tuple, bounds: np.ndarray, max_workers: Optional[int]
+) -> None:
+    """Renumbers each block, bounded by consecutive entries of bounds, of the
+    shared (flat, nodes, out) arrays on a process pool."""
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            executor.submit(_renumber_block, *shared, start, stop)
+            for start, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist())
+            if stop > start
+        ]
+        for future in futures:
+            future.result()
+
+
+def compact_mesh_parallel(
+    mesh_lattice_connectivity: tuple, max_workers: Optional[int] = None
+) -> CompactMesh:
+    """Given a mesh with lattice connectivity, return the CompactMesh with
+    finite element connectivity, renumbering the blocks concurrently on a
+    pool of max_workers processes.  The result is the same as compact_mesh.
+    """
+    blocks = tuple(item[0] for item in mesh_lattice_connectivity)
+    elements = [block_elements(item) for item in mesh_lattice_connectivity]
+    flat = np.concatenate([x.ravel() for x in elements] or [np.empty(0, int)])
+    nodes = np.unique(flat)  # the global node set, shared by all workers
+    bounds = np.zeros(len(elements) + 1, dtype=np.int64)
+    np.cumsum([x.size for x in elements], out=bounds[1:])
+
+    owned = [_share(array) for array in (flat, nodes, np.empty_like(flat))]
+    try:
+        _renumber_blocks(tuple(x for _, x in owned), bounds, max_workers)
+        out_shm = owned[-1][0]
+        out = np.ndarray(flat.shape, dtype=flat.dtype, buffer=out_shm.buf).copy()
+    finally:
+        for shm, _ in owned:
+            shm.close()
+            shm.unlink()
+
+    connectivity = tuple(
+        out[start:stop].reshape(x.shape)
+        for x, start, stop in zip(elements, bounds[:-1], bounds[1:])
+    )
+
+    return CompactMesh(
+        blocks=blocks, connectivity=connectivity, node_map=node_map(nodes)
+    )
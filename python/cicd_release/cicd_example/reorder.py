@@ -0,0 +1,189 @@
+"""Bandwidth-reducing node and element reordering of meshes.
+
+Row-major node numbering, as generated by pattern.quilt or pattern.lattice,
+gives a node-node matrix bandwidth of about nex + 1 in 2D and
+(nex + 1)(ney + 1) in 3D.  Reordering the nodes with reverse Cuthill-McKee
+(RCM), or along a Morton (Z-order) space-filling curve, reduces the
+bandwidth and profile of the sparse matrix and improves cache locality.
+Elements are then reordered by their smallest new node number, within
+each block.
+
+Example:
+    result = reorder(conn)  # conn of shape (nel, nodes per element)
+    print(result.before, result.after)
+    mesh, result = reorder_mesh(compact_mesh(mesh_lattice_connectivity))
+"""
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from cicd_example.adjacency import as_blocks, node_nodes
+from cicd_example.command_line import CompactMesh, node_map
+
+
+class Band(NamedTuple):
+    """The bandwidth and profile of the node-node matrix of a mesh."""
+
+    bandwidth: int  # the largest |i - j| of connected nodes i and j
+    profile: int  # the sum over rows i of i - (smallest j connected to i)
+
+
+class Reordering(NamedTuple):
+    """A node and element reordering, with the band before and after."""
+
+    connectivity: object  # the renumbered, reordered array or tuple of arrays
+    node_order: np.ndarray  # node_order[new - 1] is the old node number
+    element_order: object  # per block, element_order[new - 1] is the old
+    before: Band
+    after: Band
+
+
+def band(connectivity, nnp: Optional[int] = None) -> Band:
+    """Returns the bandwidth and profile of the node-node matrix of a
+    connectivity array, or tuple of block arrays, of one-based node numbers.
+    """
+    blocks = [x for x in as_blocks(connectivity) if x.size]
+    if nnp is None:
+        nnp = max((int(x.max()) for x in blocks), default=0)
+    bandwidth = 0
+    smallest = np.arange(1, nnp + 1)  # the smallest node connected to each row
+    for block in blocks:
+        low, high = block.min(axis=1), block.max(axis=1)
+        bandwidth = max(bandwidth, int((high - low).max()))
+        for column in block.T:
+            np.minimum.at(smallest, column - 1, low)
+    profile = int((np.arange(1, nnp + 1) - smallest).sum())
+    return Band(bandwidth=bandwidth, profile=profile)
+
+
+def _levels(indptr: np.ndarray, indices: np.ndarray, start: int, visited) -> list:
+    """Returns the breadth-first level sets from start, in Cuthill-McKee
+    order: the children of earlier nodes first, then by ascending degree."""
+    degree = np.diff(indptr)
+    visited[start] = True
+    levels = [np.array([start])]
+    while True:
+        frontier = levels[-1]
+        counts = degree[frontier]
+        parents = np.repeat(np.arange(len(frontier)), counts)
+        starts = np.repeat(indptr[frontier] - np.cumsum(counts) + counts, counts)
+        children = indices[starts + np.arange(counts.sum())]
+        fresh = ~visited[children]
+        parents, children = parents[fresh], children[fresh]
+        if children.size == 0:
+            return levels
+        # each child goes with its first parent, as parents are ascending
+        children, idx = np.unique(children, return_index=True)
+        children = children[np.lexsort((children, degree[children], parents[idx]))]
+        visited[children] = True
+        levels.append(children)
+
+
+def rcm(
+    connectivity, nnp: Optional[int] = None, *, peripheral: bool = True
+) -> np.ndarray:
+    """Returns the reverse Cuthill-McKee node order of a connectivity array,
+    or tuple of block arrays: order[new - 1] is the old node number.  Each
+    connected component starts from a pseudo-peripheral node, or, if not
+    peripheral, from its node of least degree, as
+    scipy.sparse.csgraph.reverse_cuthill_mckee does."""
+    indptr, indices, _ = node_nodes(connectivity, nnp)
+    nnp = len(indptr) - 1
+    degree = np.diff(indptr)
+    visited = np.zeros(nnp, dtype=bool)
+    order = []
+    for seed in np.argsort(degree, kind="stable"):
+        if visited[seed]:
+            continue
+        # find a pseudo-peripheral node, the far end of the longest level set
+        start, depth = int(seed), 0
+        while peripheral:
+            levels = _levels(indptr, indices, start, np.zeros(nnp, dtype=bool))
+            last = levels[-1]
+            if len(levels) <= depth:
+                break
+            depth = len(levels)
+            candidate = int(last[np.argmin(degree[last])])
+            if candidate == start:
+                break
+            start = candidate
+        order.extend(_levels(indptr, indices, start, visited))
+    order = np.concatenate(order or [np.empty(0, np.int64)])
+    return order[::-1] + 1
+
+
+def morton(coordinates) -> np.ndarray:
+    """Returns the Morton (Z-order) node order of (nnp, dim) coordinates:
+    order[new - 1] is the old node number."""
+    coordinates = np.asarray(coordinates, dtype=float)
+    dim = coordinates.shape[1]
+    bits = 63 // dim
+    low, high = coordinates.min(axis=0), coordinates.max(axis=0)
+    span = np.where(high > low, high - low, 1)
+    cells = ((coordinates - low) / span * (2**bits - 1)).astype(np.uint64)
+    codes = np.zeros(len(coordinates), dtype=np.uint64)
+    for bit in range(bits):
+        for axis in range(dim):
+            value = (cells[:, axis] >> np.uint64(bit)) & np.uint64(1)
+            codes |= value << np.uint64(bit * dim + axis)
+    return np.argsort(codes, kind="stable") + 1
+
+
+def reorder(connectivity, *, method: str = "rcm", coordinates=None) -> Reordering:
+    """Given a connectivity array, or tuple of block arrays, of one-based node
+    numbers, returns the Reordering of its nodes and elements.
+
+    Args:
+        connectivity: The (nel, nodes per element) array, or a tuple of
+            such arrays, one per block, e.g., CompactMesh.connectivity.
+        method: "rcm" for reverse Cuthill-McKee, or "morton" for a Morton
+            space-filling curve, which requires coordinates.
+        coordinates: The (nnp, dim) coordinates, node n in row n - 1.
+    """
+    assert method in ("rcm", "morton"), f"Error: method={method} is unknown."
+    blocks = as_blocks(connectivity)
+    nnp = None if coordinates is None else len(coordinates)
+    before = band(blocks, nnp)
+
+    if method == "rcm":
+        node_order = rcm(blocks, nnp)
+    else:
+        assert coordinates is not None, "Error: method=morton needs coordinates."
+        node_order = morton(coordinates)
+
+    new_number = np.empty(len(node_order) + 1, dtype=np.int64)
+    new_number[node_order] = np.arange(1, len(node_order) + 1)
+
+    renumbered, element_orders = [], []
+    for block in blocks:
+        block = new_number[block]
+        order = np.empty(0, dtype=np.int64)
+        if block.size:
+            order = np.lexsort((block.max(axis=1), block.min(axis=1)))
+        element_orders.append(order + 1)
+        renumbered.append(block[order])
+
+    single = isinstance(connectivity, np.ndarray)
+    return Reordering(
+        connectivity=renumbered[0] if single else tuple(renumbered),
+        node_order=node_order,
+        element_order=element_orders[0] if single else tuple(element_orders),
+        before=before,
+        after=band(renumbered, nnp),
+    )
+
+
+def reorder_mesh(mesh: CompactMesh, **kwargs) -> tuple:
+    """Given a CompactMesh, e.g., from compact_mesh, returns the reordered
+    CompactMesh and the Reordering; see reorder for the keyword arguments."""
+    result = reorder(mesh.connectivity, **kwargs)
+    nodes = mesh.nodes[result.node_order - 1]
+    return (
+        CompactMesh(
+            blocks=mesh.blocks,
+            connectivity=result.connectivity,
+            node_map=node_map(nodes),
+        ),
+        result,
+    )
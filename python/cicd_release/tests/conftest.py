@@ -0,0 +1,38 @@
+"""Shared fixtures of the tests: row-major quad and hex connectivity, as
+pattern.connectivity and pattern.lattice_connectivity, without the element
+numbers."""
+
+from typing import Callable
+
+import numpy as np
+import pytest
+
+
+def quilt_connectivity(nex: int, ney: int) -> np.ndarray:
+    """Returns the (nex * ney, 4) quad connectivity of a quilt."""
+    ns = np.arange(1, (nex + 1) * (ney + 1) + 1).reshape(ney + 1, nex + 1)
+    return np.stack(
+        [ns[:-1, :-1], ns[:-1, 1:], ns[1:, 1:], ns[1:, :-1]], axis=-1
+    ).reshape(-1, 4)
+
+
+def lattice_connectivity(nex: int, ney: int, nez: int) -> np.ndarray:
+    """Returns the (nex * ney * nez, 8) hex connectivity of a lattice."""
+    ns = np.arange(1, (nex + 1) * (ney + 1) * (nez + 1) + 1)
+    ns = ns.reshape(nez + 1, ney + 1, nex + 1)
+    lower = [ns[:-1, :-1, :-1], ns[:-1, :-1, 1:], ns[:-1, 1:, 1:], ns[:-1, 1:, :-1]]
+    upper = [x[1:, ...] for x in (ns[:, :-1, :-1], ns[:, :-1, 1:])]
+    upper += [ns[1:, 1:, 1:], ns[1:, 1:, :-1]]
+    return np.stack(lower + upper, axis=-1).reshape(-1, 8)
+
+
+@pytest.fixture(name="quilt_connectivity")
+def fixture_quilt_connectivity() -> Callable[[int, int], np.ndarray]:
+    """Returns quilt_connectivity."""
+    return quilt_connectivity
+
+
+@pytest.fixture(name="lattice_connectivity")
+def fixture_lattice_connectivity() -> Callable[[int, int, int], np.ndarray]:
+    """Returns lattice_connectivity."""
+    return lattice_connectivity
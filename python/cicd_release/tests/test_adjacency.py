@@ -0,0 +1,114 @@
+"""This module tests the sparse adjacency services.
+
+Example:
+    To run
+    cd ~/mwe/python/cicd_release
+    pytest tests/test_adjacency.py -v
+"""
+
+import importlib.util
+import pathlib
+
+import numpy as np
+import pytest
+
+from cicd_example import adjacency as ad
+
+
+def test_quilt():
+    """Tests the three adjacencies of a 2 x 1 quilt, see pattern.connectivity."""
+    conn = np.array([[1, 2, 5, 4], [2, 3, 6, 5]])
+
+    graph = ad.node_nodes(conn)
+    assert graph.shape == (6, 6)
+    assert graph.indptr.tolist() == [0, 3, 8, 11, 14, 19, 22]
+    assert graph.indices[3:8].tolist() == [0, 2, 3, 4, 5]  # node 2
+
+    assert ad.node_nodes(conn, diagonal=True).degree.tolist() == [4, 6, 4, 4, 6, 4]
+
+    incidence = ad.node_elements(conn)
+    assert incidence.shape == (6, 2)
+    assert incidence.degree.tolist() == [1, 2, 1, 1, 2, 1]
+    assert incidence.indices[1:3].tolist() == [0, 1]
+
+    neighbors = ad.element_elements(conn)
+    assert neighbors.indptr.tolist() == [0, 1, 2]
+    assert neighbors.indices.tolist() == [1, 0]
+
+
+def test_blocks():
+    """Tests that blocks are numbered consecutively, and may be empty."""
+    conn = (
+        np.array([[1, 2, 5, 4]]),
+        np.empty((0, 4), dtype=int),
+        np.array([[2, 3, 6, 5]]),
+    )
+    assert ad.element_elements(conn).indices.tolist() == [1, 0]
+    assert ad.node_elements(conn).indices.tolist() == [0, 0, 1, 1, 0, 0, 1, 1]
+    single = ad.node_nodes(np.concatenate([conn[0], conn[2]]))
+    assert ad.node_nodes(conn).indices.tolist() == single.indices.tolist()
+
+
+@pytest.mark.parametrize("max_workers", [None, 3])
+def test_lattice(max_workers, monkeypatch, lattice_connectivity):
+    """Tests the closed-form lattice stencil against the connectivity."""
+    monkeypatch.setattr(ad, "CHUNK_ROWS", 7)
+    nex, ney, nez = 4, 3, 2
+    conn = lattice_connectivity(nex, ney, nez)
+    for diagonal in (False, True):
+        known = ad.node_nodes(conn, diagonal=diagonal)
+        found = ad.lattice_node_nodes(
+            nex=nex,
+            ney=ney,
+            nez=nez,
+            diagonal=diagonal,
+            max_workers=max_workers,
+        )
+        assert found.shape == known.shape
+        assert np.array_equal(found.indptr, known.indptr)
+        assert np.array_equal(found.indices, known.indices)
+
+    # corner hexes have three face neighbors, interior hexes six
+    neighbors = ad.element_elements(lattice_connectivity(3, 3, 3))
+    assert neighbors.degree.min() == 3 and neighbors.degree[13] == 6
+    assert ad.lattice_node_nodes(nex=2, ney=2).degree.tolist() == [
+        3, 5, 3, 5, 8, 5, 3, 5, 3
+    ]  # fmt: skip
+
+
+def test_scipy(lattice_connectivity):
+    """Tests that the patterns are valid SciPy CSR arrays."""
+    sparse = pytest.importorskip("scipy.sparse")
+    conn = lattice_connectivity(3, 2, 2)
+    incidence = ad.node_elements(conn).matrix()
+    graph = ad.node_nodes(conn, diagonal=True).matrix()
+    assert isinstance(graph, sparse.csr_array) and graph.has_sorted_indices
+    # nodes are adjacent when they share an element
+    product = (incidence @ incidence.T).astype(bool).astype(np.int8)
+    assert (product != graph).nnz == 0
+    assert (graph != graph.T).nnz == 0
+
+
+def test_csr():
+    """Tests that the counting sort orders and dedupes pairs whose keys
+    span more than one 16-bit digit."""
+    nnp = 70_000
+    rows = np.array([nnp - 1, 0, nnp - 1, 5, 0, 5, 5])
+    cols = np.array([0, nnp - 1, 0, 70, 3, 70, 1])
+    graph = ad._csr(rows, cols, (nnp, nnp))  # pylint: disable=protected-access
+    assert graph.indices.tolist() == [3, nnp - 1, 1, 70, 0]
+    assert graph.degree[[0, 5, nnp - 1]].tolist() == [2, 2, 1]
+    assert graph.indptr[-1] == 5
+
+
+def test_sides():
+    """Tests that SIDES matches the side order of pattern.QuadMesh and
+    pattern.HexMesh, when the pattern module is in the source tree."""
+    path = pathlib.Path(__file__).parents[2] / "pattern" / "pattern.py"
+    if not path.exists():
+        pytest.skip(f"no {path}")
+    spec = importlib.util.spec_from_file_location("pattern", path)
+    pattern = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(pattern)
+    assert ad.SIDES == {4: pattern.QuadMesh.sides, 8: pattern.HexMesh.sides}
+    assert set(pattern.Adjacency._fields) <= set(ad.Adjacency._fields)
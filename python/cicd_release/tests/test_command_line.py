@@ -13,6 +13,10 @@ Example:
     pytest tests/test_command_line.py::test_hello_world -v
 """
 
+import sys
+import types
+
+import numpy as np
 import pytest
 
 from cicd_example import command_line as cl
@@ -111,3 +115,137 @@ def test_elements_no_block_ids():
     result = cl.elements_without_block_ids(mesh=known_input)
 
     assert result == gold_output
+
+
+def test_renumber_map():
+    """Tests that a RenumberMap maps tuples and arrays, with dense and sorted
+    lookups, consistent with renumber."""
+    source = (300, 22, 1)
+    old = (1, 22, 300, 40)
+    new = (42, 2, 9, 1000)
+
+    rmap = cl.RenumberMap(old=old, new=new)
+    assert rmap(source) == (9, 2, 42)
+    assert rmap((40, 40)) == (1000, 1000)
+    assert rmap.arrays[0] == "dense"
+    assert rmap(np.array(source)).tolist() == [9, 2, 42]
+
+    # large, sparse ids use the sorted lookup
+    old_sparse = tuple(x * 10**9 for x in old)
+    rmap = cl.RenumberMap(old=old_sparse, new=new)
+    assert rmap.arrays[0] == "sorted"
+    found = rmap(np.array([300 * 10**9, 22 * 10**9, 10**9]))
+    assert found.tolist() == [9, 2, 42]
+
+    # the first occurrence of a repeated `old` number wins, as with old.index
+    assert cl.renumber(source=(5,), old=(5, 5), new=(1, 2)) == (1,)
+    assert cl.renumber(source=np.array([5]), old=(5, 5), new=(1, 2)).tolist() == [1]
+
+    # numbers not in `old` raise a ValueError, as with old.index
+    with pytest.raises(ValueError):
+        _ = cl.renumber(source=(7,), old=old, new=new)
+    for kind_old in (old, old_sparse):
+        with pytest.raises(ValueError):
+            _ = cl.RenumberMap(old=kind_old, new=new)(np.array([7, -1]))
+
+    # a float source maps on either lookup, as a tuple of floats does
+    assert cl.renumber((1.0, 2.0), (1, 2), (10, 20)) == (10, 20)
+    for kind_old in (old, old_sparse):
+        rmap = cl.RenumberMap(old=kind_old, new=new)
+        assert rmap(np.array(kind_old[:2], dtype=float)).tolist() == [42, 2]
+        with pytest.raises(ValueError):
+            _ = rmap(np.array([1.5]))
+
+
+def test_compact_mesh():
+    """Tests the array form of the mesh with element connectivity and the
+    reusable lattice to finite element node map."""
+    mesh_lattice_connectivity = (
+        (2, (2, 3, 6, 5), (4, 5, 8, 7)),
+        (31, (11, 12, 15, 14)),
+    )
+
+    result = cl.compact_mesh(mesh_lattice_connectivity)
+
+    assert result.blocks == (2, 31)
+    assert [x.tolist() for x in result.connectivity] == [
+        [[1, 2, 5, 4], [3, 4, 7, 6]],
+        [[8, 9, 11, 10]],
+    ]
+    assert all(x.flags.c_contiguous for x in result.connectivity)
+    assert result.nodes.tolist() == [2, 3, 4, 5, 6, 7, 8, 11, 12, 14, 15]
+    assert result.node_map((15, 2)) == (11, 1)
+    assert result.node_map(np.array([11, 8])).tolist() == [8, 7]
+    node_map = result.node_map
+    assert result.node_map is node_map  # built once, and reused
+
+
+def test_compact_mesh_empty_block():
+    """Tests that a block with no elements keeps integer node numbers."""
+    mesh_lattice_connectivity = ((1, (4, 5, 8, 7)), (2,), (3, (2, 3, 6, 5)))
+
+    result = cl.compact_mesh(mesh_lattice_connectivity)
+
+    assert result.blocks == (1, 2, 3)
+    assert result.nodes.dtype.kind == "i"
+    assert result.nodes.tolist() == [2, 3, 4, 5, 6, 7, 8]
+    assert [x.tolist() for x in result.connectivity] == [
+        [[3, 4, 7, 6]],
+        [],
+        [[1, 2, 5, 4]],
+    ]
+    assert result.connectivity[0].dtype.kind == "i"
+
+
+def test_block_mesh():
+    """Tests that block stripping and per-block access of a BlockMesh are
+    views of the flat connectivity buffer."""
+    known_input = (
+        (2, (2, 3, 6, 5), (4, 5, 8, 7)),
+        (31, (11, 12, 15, 14)),
+        (44,),
+        (82, (1, 2, 5, 4)),
+    )
+
+    mesh = cl.block_mesh(mesh=known_input)
+
+    assert mesh.blocks == (2, 31, 44, 82)
+    assert mesh.offsets.tolist() == [0, 2, 3, 3, 4]
+
+    result = cl.elements_without_block_ids(mesh=mesh)
+    gold_output = cl.elements_without_block_ids(mesh=known_input)
+    assert result.tolist() == [list(x) for x in gold_output]
+    assert np.shares_memory(result, mesh.connectivity)
+
+    assert mesh.block(0).tolist() == [[2, 3, 6, 5], [4, 5, 8, 7]]
+    assert mesh.block(2).shape == (0, 4)
+    assert np.shares_memory(mesh.block(3), mesh.connectivity)
+
+
+def test_broken_kernels(monkeypatch):
+    """Tests that compiled kernels that fail to import fall back to the
+    pure-Python paths."""
+    monkeypatch.setitem(sys.modules, "mesh_kernels", None)  # import fails
+    cl.compiled_kernels.cache_clear()
+    try:
+        assert cl.compiled_kernels() is None
+        mesh = cl.compact_mesh(((1, (4, 5, 8, 7)), (2, (2, 3, 6, 5))))
+        assert mesh.nodes.tolist() == [2, 3, 4, 5, 6, 7, 8]
+        assert mesh.node_map(np.array([8, 2])).tolist() == [7, 1]
+    finally:
+        cl.compiled_kernels.cache_clear()
+
+
+def test_float_keys(monkeypatch):
+    """Tests that float `old` numbers are not truncated by the compiled
+    kernels, which take integer buffers only."""
+    monkeypatch.setitem(sys.modules, "mesh_kernels", types.SimpleNamespace())
+    cl.compiled_kernels.cache_clear()
+    try:
+        assert cl.compiled_kernels() is not None
+        node_map = cl.RenumberMap(old=(1.5, 2.0), new=(10, 20))
+        assert node_map(np.array([2])).tolist() == [20]
+        with pytest.raises(ValueError, match="not in `old`"):
+            node_map(np.array([1]))
+    finally:
+        cl.compiled_kernels.cache_clear()
@@ -0,0 +1,190 @@
+"""This module tests the daemon of file commands, and its thin client.
+
+Example:
+    To run
+    cd ~/mwe/python/cicd_release
+    pytest tests/test_daemon.py -v
+"""
+
+import os
+import pathlib
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pytest
+
+from cicd_example import client as cc
+from cicd_example import command_line as cl
+from cicd_example import daemon as dd
+from cicd_example import mesh_file as mf
+
+# two blocks of a 1 by 1 by 3 lattice, with lattice node numbers that skip
+LATTICE = (
+    (1, (1, 2, 4, 3, 5, 6, 8, 7)),
+    (2, (5, 6, 8, 7, 9, 10, 12, 11), (9, 10, 12, 11, 13, 14, 16, 15)),
+)
+
+
+@pytest.fixture(name="lattice")
+def fixture_lattice(tmp_path) -> pathlib.Path:
+    """Returns the path of a mesh file of LATTICE, with the coordinates of
+    16 lattice nodes, so that node n has x = n."""
+    path = tmp_path / "lattice.mesh"
+    coordinates = np.stack([np.arange(1, 17), np.zeros(16), np.zeros(16)], axis=1)
+    mf.write_mesh(path, LATTICE, coordinates)
+    return path
+
+
+def test_compact(lattice):
+    """Tests that compact matches compact_mesh, and keeps the coordinates."""
+    output = lattice.with_name("compact.mesh")
+    reply = dd.run(["compact", str(lattice), str(output)])
+    assert reply == cc.Reply(status=0, output=f"compacted 16 nodes into {output}")
+
+    fiducial = cl.compact_mesh(LATTICE)
+    found = mf.read_mesh(output)
+    assert found.blocks == (1, 2)
+    for x, y in zip(found.connectivity, fiducial.connectivity):
+        assert (x == y).all()
+    assert (found.coordinates[0] == fiducial.nodes).all()
+
+
+def test_renumber(lattice, tmp_path):
+    """Tests that renumber maps the connectivity, and moves the coordinates
+    with their nodes."""
+    map_file = tmp_path / "reverse.txt"
+    pairs = np.stack([np.arange(1, 17), np.arange(16, 0, -1)], axis=1)
+    np.savetxt(map_file, pairs, fmt="%d")
+    output = tmp_path / "renumbered.mesh"
+
+    reply = dd.run(["renumber", str(lattice), str(output), "--map", str(map_file)])
+    assert reply.status == 0, reply.output
+
+    found = mf.read_mesh(output)
+    assert found.connectivity[0].tolist() == [[16, 15, 13, 14, 12, 11, 9, 10]]
+    assert found.coordinates[0].tolist() == list(range(16, 0, -1))
+
+
+def test_strip_blocks(lattice, tmp_path):
+    """Tests that strip-blocks writes the elements of every block."""
+    output = tmp_path / "elements.npy"
+    assert dd.run(["strip-blocks", str(lattice), str(output)]).status == 0
+    fiducial = cl.elements_without_block_ids(LATTICE)
+    assert np.load(output).tolist() == [list(x) for x in fiducial]
+
+
+def test_errors(lattice, tmp_path):
+    """Tests that failing commands are reported, and do not raise."""
+    reply = dd.run(["compact", str(tmp_path / "missing.mesh"), "out.mesh"])
+    assert reply.status == 1 and "missing.mesh" in reply.output
+
+    map_file = tmp_path / "partial.txt"
+    map_file.write_text("1 2\n2 3\n", encoding="utf-8")
+    reply = dd.run(["renumber", str(lattice), "out.mesh", "--map", str(map_file)])
+    assert reply.status == 1 and "not in `old`" in reply.output
+
+    assert dd.run(["--help"]).status == 0
+    assert dd.run(["unknown"]).status == 2
+    assert not (tmp_path / "out.mesh").exists()
+
+
+@pytest.mark.parametrize("content", [b"xy", b"MWEMESH\0" + bytes(16), b"\0" * 64])
+def test_malformed_mesh(tmp_path, content):
+    """Tests that a truncated or foreign mesh file fails with status 1."""
+    path = tmp_path / "bad.mesh"
+    path.write_bytes(content)
+    for command in ("compact", "strip-blocks"):
+        reply = dd.run([command, str(path), str(tmp_path / "out")])
+        assert reply.status == 1 and reply.output.startswith(f"{command}: ")
+    assert not (tmp_path / "out").exists()
+
+
+def test_cache(tmp_path):
+    """Tests that the cache rebuilds the value of a changed file."""
+    path = tmp_path / "data.txt"
+    path.write_text("one", encoding="utf-8")
+    cache = dd.Cache(max_entries=1)
+
+    def build(x):
+        return pathlib.Path(x).read_text(encoding="utf-8")
+
+    assert cache.get("text", path, build) == "one"
+    assert cache.get("text", path, build) == "one"
+    path.write_text("three", encoding="utf-8")
+    assert cache.get("text", path, build) == "three"
+    assert cache.stats() == dd.CacheStats(entries=1, hits=1, misses=2)
+
+
+def test_client_without_daemon(lattice, monkeypatch, capsys):
+    """Tests that file commands run in the client if no daemon is running."""
+    monkeypatch.setenv("CICD_EXAMPLE_SOCKET", str(lattice.with_name("none.sock")))
+    output = lattice.with_name("compact.mesh")
+
+    assert cc.client(["compact", str(lattice), str(output)]) == 0
+    assert output.exists()
+    assert cc.client(["ping"]) == 1
+    assert "no cicd_example daemon" in capsys.readouterr().out
+
+
+def test_foreign_socket(lattice, monkeypatch, capsys):
+    """Tests that the client and the daemon refuse a socket path that is not
+    a socket, or that another user owns."""
+    path = lattice.with_name("foreign.sock")
+    monkeypatch.setenv("CICD_EXAMPLE_SOCKET", str(path))
+    path.write_text("not a socket", encoding="utf-8")
+    assert cc.client(["compact", str(lattice), "out.mesh"]) == 1
+    assert "not a socket of this user" in capsys.readouterr().out
+    with pytest.raises(PermissionError):
+        dd._remove_stale(str(path))  # pylint: disable=protected-access
+    path.unlink()
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as server:
+        server.bind(str(path))
+        server.listen()
+        monkeypatch.setattr(os, "getuid", lambda: os.stat(path).st_uid + 1)
+        with pytest.raises(PermissionError):
+            cc.request(["ping"])
+        assert dd.daemon(["--socket", str(path)]) == 1
+    assert path.exists() and not lattice.with_name("out.mesh").exists()
+
+
+def test_daemon(lattice, monkeypatch):
+    """Tests a daemon process that serves many requests with warm caches."""
+    address = str(lattice.with_name("daemon.sock"))
+    monkeypatch.setenv("CICD_EXAMPLE_SOCKET", address)
+    monkeypatch.chdir(lattice.parent)
+    env = dict(os.environ, PYTHONPATH=str(pathlib.Path(cl.__file__).parents[1]))
+    statement = "from cicd_example.daemon import daemon; raise SystemExit(daemon())"
+    with subprocess.Popen([sys.executable, "-c", statement], env=env) as process:
+        try:
+            deadline = time.monotonic() + 30
+            while not os.path.exists(address):
+                assert process.poll() is None and time.monotonic() < deadline
+                time.sleep(0.01)
+            assert cc.request(["ping"]).output == f"pong {process.pid}"
+
+            # relative paths are taken from the working directory of the client
+            for _ in range(3):
+                reply = cc.request(["compact", "lattice.mesh", "compact.mesh"])
+                assert reply.status == 0, reply.output
+            assert cc.request(["strip-blocks", "compact.mesh", "x.npy"]).status == 0
+            assert np.load("x.npy").max() == 16
+
+            stats = cc.request(["stats"]).output
+            assert '"hits": 4' in stats and '"misses": 3' in stats
+            assert cc.request(["compact", "missing.mesh", "y.mesh"]).status == 1
+
+            # a malformed input is reported, and the daemon keeps serving
+            pathlib.Path("bad.mesh").write_bytes(b"xy")
+            reply = cc.request(["strip-blocks", "bad.mesh", "z.npy"])
+            assert reply.status == 1 and reply.output.startswith("strip-blocks: ")
+            assert cc.request(["ping"]).status == 0
+
+            assert cc.request(["shutdown"]).status == 0
+            assert process.wait(timeout=30) == 0
+        finally:
+            process.kill()
+    assert not os.path.exists(address)
@@ -0,0 +1,69 @@
+"""This module tests the import time of the command line entry points, which
+batch scripts launch thousands of times.
+
+Each test imports an entry point module in a fresh interpreter with
+python -X importtime.  Heavy modules must not be imported at startup, and
+the cumulative import time must stay within a budget, in microseconds,
+that the MWE_IMPORT_BUDGET_US environment variable overrides.
+
+Example:
+    To run
+    cd ~/mwe/python/cicd_release
+    pytest tests/test_importtime.py -v
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+HEAVY = ("numpy", "mesh_kernels", "pdbp", "yaml", "scipy")
+BUDGET_US = int(os.environ.get("MWE_IMPORT_BUDGET_US", "100000"))
+
+
+def importtime(statement: str) -> dict:
+    """Returns the cumulative import time, in microseconds, of every module
+    imported by a fresh interpreter that runs the statement."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "from cicd_example.command_line import hello; hello()",
+        "from cicd_example.command_line import mymodule",
+        "from cicd_example.client import client",
+    ],
+)
+def test_entry_points(statement):
+    """Tests that the entry points import no heavy modules, within budget."""
+    times = importtime(statement)
+    heavy = sorted(x for x in times if x.split(".")[0] in HEAVY)
+    assert heavy == []
+    assert max(t for x, t in times.items() if x.startswith("cicd_example.")) < BUDGET_US
+
+
+def test_lazy_numpy():
+    """Tests that numpy is loaded on first use."""
+    statement = "\n".join(
+        [
+            "import sys",
+            "from cicd_example import command_line as cl",
+            "assert cl.renumber((2, 1), (1, 2), (10, 20)) == (20, 10)",
+            "assert 'numpy.linalg' in sys.modules",
+        ]
+    )
+    assert any(x.startswith("numpy.") for x in importtime(statement))
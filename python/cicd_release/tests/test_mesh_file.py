@@ -0,0 +1,72 @@
+"""This module tests the mesh file writer and reader.
+
+Example:
+    To run
+    cd ~/mwe/python/cicd_release
+    pytest tests/test_mesh_file.py -v
+"""
+
+import numpy as np
+import pytest
+
+from cicd_example import mesh_file as mf
+
+
+def test_streamed_lattice(tmp_path):
+    """Tests a hex lattice written in chunks and read back memory-mapped."""
+    path = tmp_path / "lattice.mesh"
+    # a 1 by 1 by 2 lattice, as from pattern.lattice_connectivity
+    chunks = (
+        np.array([[1, 1, 2, 4, 3, 5, 6, 8, 7]]),
+        np.array([[2, 5, 6, 8, 7, 9, 10, 12, 11]]),
+    )
+    kji = np.indices((3, 2, 2)).reshape(3, -1)  # node n at column n - 1
+    coordinates = kji[::-1].T
+
+    with mf.MeshWriter(path, num_nodes=12, dim=3) as writer:
+        writer.write_coordinates(coordinates[:5])
+        writer.write_coordinates(coordinates[5:])
+        writer.write_block(1, (chunk[:, 1:] for chunk in chunks))
+
+    mesh = mf.read_mesh(path)
+
+    assert isinstance(mesh.coordinates, np.memmap)
+    assert mesh.coordinates.shape == (3, 12)
+    assert (mesh.coordinates.T == coordinates).all()
+    assert mesh.blocks == (1,)
+    assert isinstance(mesh.connectivity[0], np.memmap)
+    assert mesh.connectivity[0].tolist() == [
+        [1, 2, 4, 3, 5, 6, 8, 7],
+        [5, 6, 8, 7, 9, 10, 12, 11],
+    ]
+
+
+def test_write_mesh_blocks(tmp_path):
+    """Tests a mesh of numbered blocks, including an empty block."""
+    path = tmp_path / "blocks.mesh"
+    mesh = (
+        (2, (2, 3, 6, 5), (4, 5, 8, 7)),
+        (44,),
+        (82, (1, 2, 5, 4)),
+    )
+
+    mf.write_mesh(path, mesh)
+    found = mf.read_mesh(path)
+
+    assert found.coordinates.shape == (3, 0)
+    assert found.blocks == (2, 44, 82)
+    assert [x.tolist() for x in found.connectivity] == [
+        [[2, 3, 6, 5], [4, 5, 8, 7]],
+        [],
+        [[1, 2, 5, 4]],
+    ]
+
+
+def test_incomplete_coordinates(tmp_path):
+    """Tests that closing before all coordinates are written is an error."""
+    writer = mf.MeshWriter(tmp_path / "bad.mesh", num_nodes=4, dim=2)
+    writer.write_coordinates([[0, 0], [1, 0]])
+    with pytest.raises(AssertionError, match="2 of 4 nodes written"):
+        writer.close()
+    with pytest.raises(AssertionError, match="is not a mesh file"):
+        _ = mf.read_mesh(tmp_path / "bad.mesh")
@@ -0,0 +1,46 @@
+"""This module tests the block-parallel renumbering services.
+
+Example:
+    To run
+    cd ~/mwe/python/cicd_release
+    pytest tests/test_parallel.py -v
+"""
+
+import numpy as np
+
+from cicd_example import command_line as cl
+from cicd_example import parallel
+
+
+def test_compact_mesh_parallel():
+    """Tests that the parallel path matches the serial path, for many blocks
+    of random lattice connectivity."""
+    rng = np.random.default_rng(seed=42)
+    mesh = tuple(
+        (block, *map(tuple, rng.integers(1, 10**6, size=(nel, 8)).tolist()))
+        for block, nel in enumerate((5, 0, 100, 1, 37), start=1)
+    )
+
+    serial = cl.compact_mesh(mesh)
+    found = parallel.compact_mesh_parallel(mesh, max_workers=2)
+
+    assert found.blocks == serial.blocks
+    assert (found.nodes == serial.nodes).all()
+    for x, y in zip(found.connectivity, serial.connectivity):
+        assert x.shape == y.shape and (x == y).all()
+    # the empty second block keeps the node numbers integer
+    assert found.nodes.dtype.kind == "i" and found.connectivity[1].size == 0
+    assert all(x.dtype.kind == "i" for x in found.connectivity)
+
+
+def test_mesh_element_connectivity_parallel():
+    """Tests the opt-in parallel mode against the serial gold data."""
+    mesh_lattice_connectivity = (
+        (2, (2, 3, 6, 5, 11, 12, 15, 14), (4, 5, 8, 7, 13, 14, 17, 16)),
+        (31, (11, 12, 15, 14, 20, 21, 24, 23)),
+        (82, (1, 2, 5, 4, 10, 11, 14, 13)),
+    )
+
+    found = cl.mesh_element_connectivity(mesh_lattice_connectivity, max_workers=2)
+
+    assert found == cl.mesh_element_connectivity(mesh_lattice_connectivity)
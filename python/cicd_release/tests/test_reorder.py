@@ -0,0 +1,81 @@
+"""This module tests the bandwidth-reducing reordering services.
+
+Example:
+    To run
+    cd ~/mwe/python/cicd_release
+    pytest tests/test_reorder.py -v
+"""
+
+import numpy as np
+import pytest
+
+from cicd_example import adjacency as ad
+from cicd_example import command_line as cl
+from cicd_example import reorder as ro
+
+
+def test_band(quilt_connectivity):
+    """Tests the bandwidth and profile of a row-major quilt."""
+    # nex=3, ney=2, see pattern.connectivity
+    assert ro.band(quilt_connectivity(3, 2)) == ro.Band(bandwidth=5, profile=41)
+
+
+@pytest.mark.parametrize("method", ["rcm", "morton"])
+def test_reorder_quilt(method, quilt_connectivity):
+    """Tests that reordering a wide quilt is a relabeling of the same mesh,
+    and that it reduces the profile."""
+    nex, ney = 30, 4
+    conn = quilt_connectivity(nex, ney)
+    jj, ii = np.divmod(np.arange((nex + 1) * (ney + 1)), nex + 1)
+
+    result = ro.reorder(conn, method=method, coordinates=np.stack([ii, jj], axis=1))
+
+    nnp = (nex + 1) * (ney + 1)
+    assert sorted(result.node_order.tolist()) == list(range(1, nnp + 1))
+    assert sorted(result.element_order.tolist()) == list(range(1, nex * ney + 1))
+    old = result.node_order[result.connectivity - 1]
+    assert (old == conn[result.element_order - 1]).all()
+    assert result.before == ro.band(conn)
+    assert result.after == ro.band(result.connectivity)
+    assert result.after.profile < result.before.profile
+    if method == "rcm":
+        assert result.after.bandwidth < result.before.bandwidth
+
+
+@pytest.mark.parametrize("nex, ney", [(3, 2), (30, 4), (4, 30)])
+def test_rcm_scipy(nex, ney, quilt_connectivity):
+    """Tests that RCM, seeded at the node of least degree, matches scipy's
+    reverse_cuthill_mckee.  A bar element hangs a pendant node off the last
+    node of the quilt, so that the seed is unique."""
+    csgraph = pytest.importorskip("scipy.sparse.csgraph")
+    nnp = (nex + 1) * (ney + 1)
+    conn = (quilt_connectivity(nex, ney), np.array([[nnp, nnp + 1]]))
+    matrix = ad.node_nodes(conn).matrix()
+
+    fiducial = csgraph.reverse_cuthill_mckee(matrix, symmetric_mode=True) + 1
+    found = ro.rcm(conn, peripheral=False)
+
+    assert found.tolist() == fiducial.tolist()
+
+
+def test_reorder_mesh():
+    """Tests reordering the blocks of a mesh with element connectivity, where
+    elements are reordered only within their block."""
+    mesh_lattice_connectivity = (
+        (2, (2, 3, 6, 5), (4, 5, 8, 7), (5, 6, 9, 8)),
+        (31,),
+        (82, (1, 2, 5, 4)),
+    )
+    mesh = cl.compact_mesh(mesh_lattice_connectivity)
+
+    found, result = ro.reorder_mesh(mesh)
+
+    assert found.blocks == mesh.blocks
+    assert [len(x) for x in found.connectivity] == [3, 0, 1]
+    for old_block, new_block, order in zip(
+        mesh.connectivity, found.connectivity, result.element_order
+    ):
+        assert (result.node_order[new_block - 1] == old_block[order - 1]).all()
+    assert found.connectivity[1].size == 0
+    # the lattice node numbers follow their nodes
+    assert (found.nodes[found.connectivity[2] - 1] == [1, 2, 5, 4]).all()
@@ -0,0 +1,30 @@
+"""This module tests that the command line entry points start quickly, by
+importing only the standard library.
+
+Example:
+    To run
+    cd ~/mwe/python/command_line
+    pytest mypackage/tests/test_importtime.py -v
+"""
+
+import subprocess
+import sys
+
+HEAVY = ("numpy", "pdbp", "yaml", "scipy")
+
+
+def test_entry_points():
+    """Tests that the entry point module imports no heavy modules."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import mypackage.command_line"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    names = [
+        x.split("|")[-1].strip()
+        for x in result.stderr.splitlines()
+        if x.startswith("import time:")
+    ]
+    assert "mypackage.command_line" in names
+    assert [x for x in names if x.split(".")[0] in HEAVY] == []
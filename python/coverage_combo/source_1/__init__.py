@@ -3,6 +3,6 @@
 # https://stackoverflow.com/questions/1260792/import-a-file-from-a-subdirectory
 # https://packaging.python.org/tutorials/packaging-projects/#a-simple-project
 
-# Add import pdbp to an __init__.py of your project, which
-# will automatically make Pdb+ the default debugger at breakpoints
-import pdbp
+# To make Pdb+ the default debugger at breakpoints, without importing pdbp
+# when this package is imported, set it in the shell that runs the tests:
+# export PYTHONBREAKPOINT=pdbp.set_trace
@@ -0,0 +1,218 @@
+"""This module caches the quilt, lattice, and connectivity patterns of the
+pattern module, keyed by (nex, ney, nez), for pipelines that ask for the
+same few grid shapes many times.
+
+Cached results are immutable: their arrays are read-only, and the same
+arrays are returned on every hit.  The in-memory tier is a least recently
+used (LRU) cache bounded by the total bytes of its arrays.  An optional
+on-disk tier stores every generated result as .npy files, which are
+memory-mapped on a later miss, so a warm restart skips generation.
+
+Example:
+    cache = GridCache(max_bytes=2**28, directory="~/scratch/grid_cache")
+    qq = cache.quilt(nex=4000, ney=4000)
+    conn = cache.connectivity(nex=4000, ney=4000)
+    print(cache.stats())
+"""
+
+import collections
+import os
+import pathlib
+import tempfile
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+import pattern
+
+
+class CacheStats(NamedTuple):
+    """The counters and memory use of a GridCache."""
+
+    hits: int  # in-memory hits
+    disk_hits: int  # misses in memory, found on disk
+    misses: int  # generated from scratch
+    evictions: int
+    entries: int
+    nbytes: int
+    max_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        """The fraction of requests served without generation."""
+        requests = self.hits + self.disk_hits + self.misses
+        return (self.hits + self.disk_hits) / requests if requests else 0.0
+
+
+def _readonly(arrays: tuple) -> tuple:
+    for array in arrays:
+        array.flags.writeable = False
+    return arrays
+
+
+class GridCache:
+    """A byte-bounded LRU cache of grid patterns, with an optional on-disk
+    tier.
+
+    Args:
+        max_bytes: The maximum total bytes of the arrays held in memory.
+        directory: If given, the directory of the on-disk tier.
+    """
+
+    def __init__(self, max_bytes: int = 2**28, directory=None):
+        self.max_bytes = max_bytes
+        self.directory = None
+        if directory is not None:
+            self.directory = pathlib.Path(directory).expanduser()
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.entries = collections.OrderedDict()  # key -> (arrays, nbytes)
+        self.nbytes = 0
+        self.hits = self.disk_hits = self.misses = self.evictions = 0
+
+    def quilt(self, *, nex: int, ney: int) -> pattern.QuiltArrays:
+        """Returns pattern.quilt(nex=nex, ney=ney, vectorized=True)."""
+        arrays = self._get(
+            ("quilt", nex, ney, 0),
+            lambda: tuple(pattern.quilt(nex=nex, ney=ney, vectorized=True)),
+        )
+        return pattern.QuiltArrays(*arrays)
+
+    def connectivity(self, *, nex: int, ney: int) -> np.ndarray:
+        """Returns the connectivity array of the nex by ney quilt."""
+        (conn,) = self._get(
+            ("connectivity", nex, ney, 0),
+            lambda: (pattern.connectivity(self.quilt(nex=nex, ney=ney)),),
+        )
+        return conn
+
+    def lattice(self, *, nex: int, ney: int, nez: int) -> pattern.LatticeArrays:
+        """Returns pattern.lattice(nex=nex, ney=ney, nez=nez, vectorized=True)."""
+        arrays = self._get(
+            ("lattice", nex, ney, nez),
+            lambda: tuple(pattern.lattice(nex=nex, ney=ney, nez=nez, vectorized=True)),
+        )
+        return pattern.LatticeArrays(*arrays)
+
+    def lattice_connectivity(self, *, nex: int, ney: int, nez: int) -> np.ndarray:
+        """Returns the connectivity array of the nex by ney by nez lattice,
+        all chunks of pattern.lattice_connectivity concatenated."""
+        (conn,) = self._get(
+            ("lattice_connectivity", nex, ney, nez),
+            lambda: (
+                np.concatenate(
+                    list(pattern.lattice_connectivity(nex=nex, ney=ney, nez=nez))
+                ),
+            ),
+        )
+        return conn
+
+    def stats(self) -> CacheStats:
+        """Returns the hit and miss counters and the memory use."""
+        return CacheStats(
+            hits=self.hits,
+            disk_hits=self.disk_hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            entries=len(self.entries),
+            nbytes=self.nbytes,
+            max_bytes=self.max_bytes,
+        )
+
+    def clear(self) -> None:
+        """Empties the in-memory tier.  The on-disk tier is kept."""
+        self.entries.clear()
+        self.nbytes = 0
+
+    def _get(self, key: tuple, generate) -> tuple:
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+        arrays = self._load(key)
+        if arrays is None:
+            self.misses += 1
+            arrays = _readonly(generate())
+            self._store(key, arrays)
+        else:
+            self.disk_hits += 1
+
+        self._insert(key, arrays)
+        return arrays
+
+    def _insert(self, key: tuple, arrays: tuple) -> None:
+        nbytes = sum(x.nbytes for x in arrays)
+        if nbytes > self.max_bytes:
+            return  # too large to hold, but still returned to the caller
+        self.entries[key] = (arrays, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            _, (_, evicted) = self.entries.popitem(last=False)
+            self.nbytes -= evicted
+            self.evictions += 1
+
+    def _paths(self, key: tuple) -> Optional[list]:
+        if self.directory is None:
+            return None
+        stem = "-".join(str(x) for x in key)
+        count = 1 if key[0].endswith("connectivity") else 2
+        return [self.directory / f"{stem}.{i}.npy" for i in range(count)]
+
+    def _load(self, key: tuple) -> Optional[tuple]:
+        paths = self._paths(key)
+        if paths is None or not all(x.exists() for x in paths):
+            return None
+        return tuple(np.load(x, mmap_mode="r") for x in paths)
+
+    def _store(self, key: tuple, arrays: tuple) -> None:
+        paths = self._paths(key)
+        if paths is None:
+            return
+        for path, array in zip(paths, arrays):
+            # write to a temporary file, then rename, so readers never see a
+            # partial file
+            fd, temp = tempfile.mkstemp(dir=self.directory, suffix=".npy")
+            with os.fdopen(fd, "wb") as stream:
+                np.save(stream, array)
+            os.replace(temp, path)
+
+
+if __name__ == "__main__":
+
+    cache = GridCache(max_bytes=10_000)
+
+    r1 = cache.quilt(nex=3, ney=2)
+    assert r1.tolist() == pattern.quilt(nex=3, ney=2)
+    assert cache.quilt(nex=3, ney=2).nodes is r1.nodes  # a hit
+    assert not r1.nodes.flags.writeable
+
+    r2 = cache.connectivity(nex=3, ney=2)
+    assert r2.tolist() == pattern.connectivity(pattern.quilt(nex=3, ney=2))
+    r2 = cache.lattice_connectivity(nex=1, ney=1, nez=2)
+    assert r2.tolist() == [[1, 1, 2, 4, 3, 5, 6, 8, 7], [2, 5, 6, 8, 7, 9, 10, 12, 11]]
+    r1 = cache.lattice(nex=1, ney=1, nez=1)
+    assert r1.tolist() == [[[[1]]], [[[1, 2], [3, 4]], [[5, 6], [7, 8]]]]
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses) == (2, 4)  # connectivity hits the quilt
+    assert stats.nbytes <= stats.max_bytes
+
+    # the byte bound evicts the least recently used shapes
+    for n in range(1, 30):
+        _ = cache.connectivity(nex=n, ney=n)
+    stats = cache.stats()
+    assert stats.evictions > 0 and stats.nbytes <= 10_000
+    assert ("connectivity", 29, 29, 0) not in cache.entries  # too large
+
+    # the on-disk tier survives a restart
+    with tempfile.TemporaryDirectory() as scratch:
+        cache = GridCache(directory=scratch)
+        r2 = cache.connectivity(nex=40, ney=30)
+        cache = GridCache(directory=scratch)  # a warm restart
+        found = cache.connectivity(nex=40, ney=30)
+        assert isinstance(found, np.memmap) and (found == r2).all()
+        assert cache.stats().disk_hits == 1 and cache.stats().misses == 0
+        del found
+
+    print(stats)
+    print(f"hit rate: {stats.hit_rate:.2f}")
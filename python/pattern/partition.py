@@ -0,0 +1,252 @@
+"""This module generates one partition of a quilt or lattice per rank, for
+distributed runs in which no rank builds the whole grid.
+
+The element grid is cut into a brick of ranks, counts[0] by counts[1]
+(by counts[2]) along the x-, y- (and z-) axis, as chosen by decompose, so a
+single count greater than one gives slabs.  Rank r has brick position
+(r % cx, r // cx % cy, r // (cx * cy)).  Each rank owns the elements of its
+brick, and the nodes from the lower bound of its brick up to, but not
+including, the upper bound along each axis; the last brick along an axis
+also owns the nodes on the upper boundary. Element and node numbers are the
+global one-based numbers of pattern.GridIndex, so every rank computes its
+partition, its ghosts, and its communication maps in closed form, without
+communicating.
+
+Example:
+    nex=4, ney=1, two ranks, no ghost element layers
+        6 . 7 . 8 . 9 . 10
+        . 1 . 2 | 3 . 4 .
+        1 . 2 . 3 . 4 . 5
+    rank 0 owns elements 1, 2 and nodes 1, 2, 6, 7; it holds ghost nodes 3
+    and 8, which it receives from rank 1, and sends nothing.
+
+    part = partition(nex=400, ney=400, nez=400, rank=3, size=64, layers=1)
+    parts = partitions(nex=40, ney=40, nez=40, size=8)  # a process pool
+"""
+
+import functools
+import itertools
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+import pattern
+
+
+class Partition(NamedTuple):
+    """The elements, nodes, ghosts, and communication maps of one rank.
+
+    Local node numbers are one-based positions in nodes.  The connectivity
+    rows are the owned elements, then the ghost elements, in local node
+    numbers; nodes[connectivity - 1] gives the global node numbers.
+    """
+
+    rank: int
+    size: int
+    elements: np.ndarray  # ascending global numbers of the owned elements
+    ghost_elements: np.ndarray  # ascending, within layers of the brick
+    nodes: np.ndarray  # global numbers, the owned nodes then the ghost nodes
+    num_owned: int  # nodes[:num_owned] are owned, each part ascending
+    connectivity: np.ndarray  # (elements + ghost elements, 4 or 8)
+    owners: np.ndarray  # the owning rank of each ghost node
+    receives: dict  # rank -> local numbers of the ghost nodes it owns
+    sends: dict  # rank -> local numbers of owned nodes that it holds as ghosts
+
+    @property
+    def ghosts(self) -> np.ndarray:
+        """The ascending global numbers of the ghost nodes."""
+        return self.nodes[self.num_owned :]
+
+
+def decompose(size: int, shape: tuple) -> tuple:
+    """Returns the number of ranks along each axis of an element grid of the
+    given shape, (nex, ney) or (nex, ney, nez), whose product is size, and
+    which minimizes the total area of the cuts between the bricks.  Ties cut
+    the slowest-varying axis, so slabs are along z (or y in 2D)."""
+    err = f"Error: size={size}, but 1<=size<={math.prod(shape)} required."
+    assert 1 <= size <= math.prod(shape), err
+    divisors = [x for x in range(1, size + 1) if size % x == 0]
+    best = None
+    for counts in itertools.product(divisors, repeat=len(shape)):
+        if math.prod(counts) != size or any(c > n for c, n in zip(counts, shape)):
+            continue
+        area = sum((c - 1) * math.prod(shape) // n for c, n in zip(counts, shape))
+        if best is None or (area, counts) < best:
+            best = (area, counts)
+    assert best is not None, f"Error: size={size} does not divide shape={shape}."
+    return best[1]
+
+
+def _bounds(n: int, count: int) -> np.ndarray:
+    """Returns the count + 1 element bounds of count nearly equal pieces of n."""
+    return np.arange(count + 1) * n // count
+
+
+def _box(lower: tuple, upper: tuple, strides: tuple) -> np.ndarray:
+    """Returns the ascending one-based numbers of the zero-based grid
+    positions lower <= ijk < upper of a row-major grid with the strides."""
+    numbers = np.ones(1, dtype=np.int64)
+    for lo, hi, stride in zip(lower, upper, strides):
+        axis = np.arange(lo, hi, dtype=np.int64) * stride
+        numbers = (axis[:, np.newaxis] + numbers).ravel()
+    return numbers
+
+
+def partition(
+    *, nex: int, ney: int, nez: int = 0, rank: int, size: int, layers: int = 1
+) -> Partition:
+    """Returns the Partition of a rank of the quilt (nez=0) or lattice of nex,
+    ney, and nez elements along the x-, y-, and z-axis.
+
+    Args:
+        nex: The number of elements in the x-axis.
+        ney: The number of elements in the y-axis.
+        nez: The number of elements in the z-axis, or 0 for a quilt.
+        rank: The rank, 0 <= rank < size.
+        size: The number of ranks.
+        layers: The number of ghost element layers around the brick.  With
+            layers=0, the ghost nodes are those of the owned elements that
+            other ranks own.
+    """
+    assert 0 <= rank < size, f"Error: rank={rank}, but 0<=rank<{size} required."
+    assert layers >= 0, f"Error: layers={layers}, but layers>=0 required."
+    grid = pattern.GridIndex(nex=nex, ney=ney, nez=nez)
+    shape = (nex, ney, nez) if nez else (nex, ney)
+    counts = decompose(size, shape)
+    bounds = [_bounds(n, c) for n, c in zip(shape, counts)]
+    estrides = tuple(math.prod(shape[:a]) for a in range(len(shape)))
+    nstrides = tuple(math.prod(n + 1 for n in shape[:a]) for a in range(len(shape)))
+
+    def brick(r: int, width: int) -> tuple:
+        """Returns the element range of rank r, widened by width layers."""
+        ijk = np.unravel_index(r, counts[::-1])[::-1]
+        lower = tuple(max(b[p] - width, 0) for b, p in zip(bounds, ijk))
+        upper = tuple(min(b[p + 1] + width, n) for b, p, n in zip(bounds, ijk, shape))
+        return lower, upper
+
+    lower, upper = brick(rank, 0)
+    elements = _box(lower, upper, estrides)
+    wide_lower, wide_upper = brick(rank, layers)
+    ghost_elements = np.setdiff1d(_box(wide_lower, wide_upper, estrides), elements)
+
+    # the nodes of the widened brick, and their owners
+    nodes = _box(wide_lower, tuple(x + 1 for x in wide_upper), nstrides)
+    ijk = grid.node_ijk_array(nodes)
+    owners = np.zeros(len(nodes), dtype=np.int64)
+    for a, (b, c) in enumerate(zip(bounds, counts)):
+        piece = np.minimum(np.searchsorted(b, ijk[:, a], side="right") - 1, c - 1)
+        owners += piece * math.prod(counts[:a])
+    owned = owners == rank
+    order = np.concatenate([np.flatnonzero(owned), np.flatnonzero(~owned)])
+    local = np.empty(len(nodes), dtype=np.int64)
+    local[order] = np.arange(1, len(nodes) + 1)
+
+    conn = grid.element_nodes_array(np.concatenate([elements, ghost_elements]))
+    connectivity = local[np.searchsorted(nodes, conn)]
+    owners, num_owned = owners[~owned], int(owned.sum())
+    receives = {
+        int(q): np.flatnonzero(owners == q) + num_owned + 1 for q in np.unique(owners)
+    }
+
+    # the owned nodes inside the widened brick of another rank are its ghosts
+    sends = {}
+    mine = ijk[owned]
+    for q in range(size):
+        q_lower, q_upper = brick(q, layers)
+        inside = np.ones(len(mine), dtype=bool)
+        for a, (lo, hi) in enumerate(zip(q_lower, q_upper)):
+            inside &= (lo <= mine[:, a]) & (mine[:, a] <= hi)
+        if q != rank and inside.any():
+            sends[q] = np.flatnonzero(inside) + 1
+
+    return Partition(
+        rank=rank,
+        size=size,
+        elements=elements,
+        ghost_elements=ghost_elements,
+        nodes=nodes[order],
+        num_owned=num_owned,
+        connectivity=connectivity,
+        owners=owners,
+        receives=receives,
+        sends=sends,
+    )
+
+
+def partitions(
+    *, nex: int, ney: int, nez: int = 0, size: int, layers: int = 1, max_workers=None
+) -> list:
+    """Returns the Partition of every rank, each generated independently in a
+    process pool that stands in for the ranks of a distributed run.  See
+    partition for the arguments; max_workers bounds the processes."""
+    work = functools.partial(
+        partition, nex=nex, ney=ney, nez=nez, size=size, layers=layers
+    )
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_call, itertools.repeat(work), range(size)))
+
+
+def _call(work, rank: int) -> Partition:
+    """Calls work with the keyword rank, in a pool worker."""
+    return work(rank=rank)
+
+
+def check(parts: list, grid: Optional[pattern.GridIndex] = None) -> None:
+    """Asserts that the partitions of all ranks are consistent: the owned
+    elements and nodes cover the grid exactly once, and every send of one
+    rank matches the receive of the other, node for node."""
+    elements = np.concatenate([p.elements for p in parts])
+    owned = np.concatenate([p.nodes[: p.num_owned] for p in parts])
+    if grid is not None:
+        assert np.array_equal(np.sort(elements), np.arange(1, grid.nel + 1))
+        assert np.array_equal(np.sort(owned), np.arange(1, grid.nnp + 1))
+    assert len(np.unique(elements)) == len(elements), "Error: elements overlap."
+    assert len(np.unique(owned)) == len(owned), "Error: owned nodes overlap."
+    for p in parts:
+        for q, local in p.sends.items():
+            received = parts[q].nodes[parts[q].receives[p.rank] - 1]
+            assert np.array_equal(p.nodes[local - 1], received), "Error: maps differ."
+        assert sum(len(x) for x in p.receives.values()) == len(p.ghosts)
+
+
+if __name__ == "__main__":
+
+    assert decompose(4, (8, 8, 8)) == (1, 2, 2)
+    assert decompose(4, (64, 8, 8)) == (4, 1, 1)  # slabs across the long axis
+    assert decompose(3, (6, 2)) == (3, 1)
+    assert decompose(1, (1, 1)) == (1, 1)
+
+    # the module documentation example
+    p0 = partition(nex=4, ney=1, rank=0, size=2, layers=0)
+    assert p0.elements.tolist() == [1, 2] and p0.ghost_elements.tolist() == []
+    assert p0.nodes.tolist() == [1, 2, 6, 7, 3, 8] and p0.num_owned == 4
+    assert p0.connectivity.tolist() == [[1, 2, 4, 3], [2, 5, 6, 4]]
+    assert p0.owners.tolist() == [1, 1]
+    assert {q: x.tolist() for q, x in p0.receives.items()} == {1: [5, 6]}
+    assert p0.sends == {}
+    p1 = partition(nex=4, ney=1, rank=1, size=2, layers=0)
+    assert p1.nodes.tolist() == [3, 4, 5, 8, 9, 10] and p1.num_owned == 6
+    assert {q: x.tolist() for q, x in p1.sends.items()} == {0: [1, 4]}
+    check([p0, p1], pattern.GridIndex(nex=4, ney=1))
+
+    # one ghost element layer
+    p0 = partition(nex=4, ney=1, rank=0, size=2, layers=1)
+    assert p0.ghost_elements.tolist() == [3]
+    assert p0.ghosts.tolist() == [3, 4, 8, 9]
+    conn = pattern.GridIndex(nex=4, ney=1).element_nodes_array([1, 2, 3])
+    assert np.array_equal(p0.nodes[p0.connectivity - 1], conn)
+
+    # every rank in its own process, bricks of a lattice
+    for layers in (0, 1, 2):
+        grid = pattern.GridIndex(nex=5, ney=4, nez=3)
+        parts = partitions(nex=5, ney=4, nez=3, size=6, layers=layers, max_workers=2)
+        check(parts, grid)
+        for part in parts:
+            ee = np.concatenate([part.elements, part.ghost_elements])
+            conn = part.nodes[part.connectivity - 1]
+            assert np.array_equal(conn, grid.element_nodes_array(ee))
+            assert len(part.ghost_elements) == 0 or layers > 0
+
+    print("partition: all tests passed")
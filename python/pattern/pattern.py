@@ -103,7 +103,7 @@ Examples:
 
     nex=2 ney=1, nez=1
         lattice:
-                3---4---6
+                4---5---6
               / | 1/| 2/|
              /  1-/-2-/-3
             /  / / / / /
@@ -112,7 +112,7 @@ Examples:
             7---8---9
             Return: [[[[1, 2]]], [[[1, 2, 3], [4, 5, 6]], [[7, 8, 9], [10, 11, 12]]]]
         connectivity:
-            Return: [[1, 1, 2, 4, 3, 7, 8, 11, 12], [2, 2, 3, 6, 4, 8, 9, 12, 11]]
+            Return: [[1, 1, 2, 5, 4, 7, 8, 11, 10], [2, 2, 3, 6, 5, 8, 9, 12, 11]]
 
     nex=1, ney=2, nez=1
         lattice:
@@ -152,10 +152,19 @@ Reference:
     https://github.com/autotwin/automesh/blob/main/doc/exodus.md
 """
 
+import functools
 import itertools
+import os
+import time
 from typing import NamedTuple
 
-import pdbp  # colorized debugging
+import numpy as np
+
+try:
+    # compiled kernels, see ~/mwe/maturin/mesh-kernels
+    import mesh_kernels as kernels
+except ImportError:
+    kernels = None
 
 
 class Point2D(NamedTuple):
@@ -190,18 +199,173 @@ class Hex(NamedTuple):
     """A single hexahedral element."""
 
     # The 'a' set
-    swa: Point2D
-    sea: Point2D
-    nea: Point2D
-    nwa: Point2D
+    swa: Point3D
+    sea: Point3D
+    nea: Point3D
+    nwa: Point3D
     # The 'b' set
-    swb: Point2D
-    seb: Point2D
-    neb: Point2D
-    nwb: Point2D
+    swb: Point3D
+    seb: Point3D
+    neb: Point3D
+    nwb: Point3D
+
+
+class RecordArray:
+    """A struct-of-arrays container of NamedTuple records.  Each field of the
+    record is stored as a column, either an integer array or a nested
+    RecordArray, so a million records cost a few contiguous arrays instead of
+    a million tuples.
+
+    Indexing with an integer returns a single record, e.g., a Quad.  Indexing
+    with a slice or an index array returns a container of the same type,
+    whose columns are views for a slice.  Fields are accessed as columns,
+    e.g., quads.sw.x is the array of x coordinates of the southwest corners.
+    """
+
+    __slots__ = ()
+    record: type  # the NamedTuple type of a single record
+    column_type = None  # the RecordArray type of nested columns, if any
+
+    def __init__(self, **columns):
+        fields = self.record._fields
+        err = f"Columns {tuple(columns)} must be the fields {fields}."
+        assert tuple(columns) == fields, err
+        for name in fields:
+            column = columns[name]
+            if not isinstance(column, RecordArray):
+                column = np.asarray(column)
+            setattr(self, name, column)
+        err = "Columns must have equal length."
+        assert len({len(self.column(x)) for x in fields}) == 1, err
+
+    @classmethod
+    def from_records(cls, records):
+        """Returns the container of a sequence of records."""
+        columns = tuple(zip(*records)) or ((),) * len(cls.record._fields)
+        if cls.column_type is not None:
+            columns = tuple(cls.column_type.from_records(x) for x in columns)
+        return cls(**dict(zip(cls.record._fields, columns)))
+
+    def column(self, name: str):
+        """Returns the column of the field name."""
+        return getattr(self, name)
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes held by the columns."""
+        return sum(self.column(x).nbytes for x in self.record._fields)
+
+    def __len__(self) -> int:
+        return len(self.column(self.record._fields[0]))
+
+    def __getitem__(self, idx):
+        if isinstance(idx, (int, np.integer)):
+            values = (self.column(x)[idx] for x in self.record._fields)
+            return self.record(
+                *(x.item() if isinstance(x, np.generic) else x for x in values)
+            )
+        return type(self)(**{x: self.column(x)[idx] for x in self.record._fields})
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(len={len(self)})"
+
+
+class Point2DArray(RecordArray):
+    """A struct-of-arrays container of Point2D records."""
+
+    __slots__ = Point2D._fields
+    record = Point2D
+
+
+class Point3DArray(RecordArray):
+    """A struct-of-arrays container of Point3D records."""
+
+    __slots__ = Point3D._fields
+    record = Point3D
+
+
+class QuadArray(RecordArray):
+    """A struct-of-arrays container of Quad records."""
+
+    __slots__ = Quad._fields
+    record = Quad
+    column_type = Point2DArray
+
+
+class HexArray(RecordArray):
+    """A struct-of-arrays container of Hex records."""
+
+    __slots__ = Hex._fields
+    record = Hex
+    column_type = Point3DArray
 
 
-def quilt(*, nex: int, ney: int):
+def quads(*, nex: int, ney: int) -> QuadArray:
+    """Returns the integer corner coordinates of the nex by ney quilt, in
+    element order, as a QuadArray."""
+    jj, ii = np.divmod(np.arange(nex * ney, dtype=index_dtype(nex * ney)), nex)
+    return QuadArray(
+        sw=Point2DArray(x=ii, y=jj),
+        se=Point2DArray(x=ii + 1, y=jj),
+        ne=Point2DArray(x=ii + 1, y=jj + 1),
+        nw=Point2DArray(x=ii, y=jj + 1),
+    )
+
+
+def hexes(*, nex: int, ney: int, nez: int) -> HexArray:
+    """Returns the integer corner coordinates of the nex by ney by nez lattice,
+    in element order, as a HexArray."""
+    nel = nex * ney * nez
+    jj, ii = np.divmod(np.arange(nel, dtype=index_dtype(nel)), nex)
+    kk, jj = np.divmod(jj, ney)
+    return HexArray(
+        swa=Point3DArray(x=ii, y=jj, z=kk),
+        sea=Point3DArray(x=ii + 1, y=jj, z=kk),
+        nea=Point3DArray(x=ii + 1, y=jj + 1, z=kk),
+        nwa=Point3DArray(x=ii, y=jj + 1, z=kk),
+        swb=Point3DArray(x=ii, y=jj, z=kk + 1),
+        seb=Point3DArray(x=ii + 1, y=jj, z=kk + 1),
+        neb=Point3DArray(x=ii + 1, y=jj + 1, z=kk + 1),
+        nwb=Point3DArray(x=ii, y=jj + 1, z=kk + 1),
+    )
+
+
+class QuiltArrays(NamedTuple):
+    """The quilt data structure stored as contiguous integer arrays."""
+
+    elements: np.ndarray  # shape (ney, nex)
+    nodes: np.ndarray  # shape (ney + 1, nex + 1)
+
+    def tolist(self) -> list:
+        """Returns the quilt in the nested list format of the module
+        documentation, e.g., [[[1]], [[1, 2], [3, 4]]] for nex=1, ney=1."""
+        return [self.elements.tolist(), self.nodes.tolist()]
+
+
+class LatticeArrays(NamedTuple):
+    """The lattice data structure stored as contiguous integer arrays."""
+
+    elements: np.ndarray  # shape (nez, ney, nex)
+    nodes: np.ndarray  # shape (nez + 1, ney + 1, nex + 1)
+
+    def tolist(self) -> list:
+        """Returns the lattice in the nested list format of the module
+        documentation."""
+        return [self.elements.tolist(), self.nodes.tolist()]
+
+
+def index_dtype(n: int) -> np.dtype:
+    """Returns the smallest signed integer type, int32 or int64, that can hold
+    the global numbers 1 through n."""
+    if n <= np.iinfo(np.int32).max:
+        return np.dtype(np.int32)
+    return np.dtype(np.int64)
+
+
+def quilt(*, nex: int, ney: int, vectorized: bool = False):
     """Given a grid of nex elements in the x-axis and ney elements in the
     y-axis, returns the element numbers and connectivity as combined quilt
     data structure.  See examples in the module documentation.
@@ -209,6 +373,9 @@ def quilt(*, nex: int, ney: int):
     Args:
         nex: The number of elements in the x-axis.
         ney: The number of elements in the y-axis.
+        vectorized: If True, returns a QuiltArrays of contiguous integer
+            arrays instead of lists.  Use QuiltArrays.tolist() to recover
+            the list format.
 
     Returns:
         A list of lists.  The first sublist is the list of element numbers.
@@ -232,28 +399,20 @@ def quilt(*, nex: int, ney: int):
     assert nex >= 1, f"Error: nex={nex}, but nex>=1 required."
     assert ney >= 1, f"Error: ney={ney}, but ney>=1 required."
 
-    count = 0
-    elements = []
-    for _ in range(ney):
-        row = []
-        for _ in range(nex):
-            count += 1
-            row.append(count)
-        elements.append(row)
+    nnp = (nex + 1) * (ney + 1)  # number of nodal points
+    dtype = index_dtype(nnp)
+
+    elements = np.arange(1, nex * ney + 1, dtype=dtype).reshape(ney, nex)
+    nodes = np.arange(1, nnp + 1, dtype=dtype).reshape(ney + 1, nex + 1)
+    result = QuiltArrays(elements=elements, nodes=nodes)
 
-    count = 0
-    nodes = []
-    for _ in range(ney + 1):
-        row = []
-        for _ in range(nex + 1):
-            count += 1
-            row.append(count)
-        nodes.append(row)
+    if vectorized:
+        return result
 
-    return [elements, nodes]
+    return result.tolist()
 
 
-def lattice(*, nex: int, ney: int, nez: int):
+def lattice(*, nex: int, ney: int, nez: int, vectorized: bool = False):
     """Given a lattice composed of nez layered quilts, returns the element
     numbers and connectivity as a combined lattice data structure.  See
     examples in the module documentation.
@@ -262,6 +421,9 @@ def lattice(*, nex: int, ney: int, nez: int):
         nex: The number of elements in the x-axis.
         ney: The number of elements in the y-axis.
         nez: The number of elements in the z-axis.
+        vectorized: If True, returns a LatticeArrays of contiguous integer
+            arrays instead of lists.  Use LatticeArrays.tolist() to recover
+            the list format.
 
     Returns:
         A list of lists, subdivided into quilt structures.  The first sublist
@@ -318,14 +480,21 @@ def lattice(*, nex: int, ney: int, nez: int):
     assert ney >= 1, f"Error: ney={ney}, but ney>=1 required."
     assert nez >= 1, f"Error: nez={nez}, but nez>=1 required."
 
-    breakpoint()
+    # each layer is a quilt, offset by the layers below it
+    qq = quilt(nex=nex, ney=ney, vectorized=True)
+    nel = nex * ney  # number of elements per quilt
+    nnp = (nex + 1) * (ney + 1)  # number of nodal points per quilt
+    dtype = index_dtype(nnp * (nez + 1))
+    layers = np.arange(nez + 1, dtype=dtype)[:, np.newaxis, np.newaxis]
 
-    count = 0
-    elements = []
-    quilts = []
-    # for _ in range(nez):
+    elements = qq.elements.astype(dtype) + layers[:-1] * nel
+    nodes = qq.nodes.astype(dtype) + layers * nnp
+    result = LatticeArrays(elements=elements, nodes=nodes)
 
-    aa = 4
+    if vectorized:
+        return result
+
+    return result.tolist()
 
 
 def connectivity(qq):
@@ -334,37 +503,503 @@ def connectivity(qq):
 
     Args:
         A mesh in a quilt format, see module documentation for more information.
+        The quilt may be the list format or the QuiltArrays format.
 
     Returns:
         A list with an element number and the elements global node numbers in
-            order of the local element numbering scheme.
+            order of the local element numbering scheme.  If the quilt is a
+            QuiltArrays, the connectivity is returned as an integer array of
+            shape (nex * ney, 5) instead; use .tolist() for the list format.
     """
-    elements = []
-    e = 0
-    ney = len(qq[0])
-    nex = len(qq[0][0])
-    ns = qq[1]  # nodes, as a list of global node numbers
-    # nel = nex * ney
-
-    for j in range(ney):
-        # row = []
-        for i in range(nex):
-            e += 1  # global element number
-            # row.append([e, ns[j][i], ns[j][i + 1], ns[j + 1][i + 1], ns[j + 1][i]])
-            # local element numbers
-            sw = ns[j][i]  # southwest
-            se = ns[j][i + 1]  # southeast
-            ne = ns[j + 1][i + 1]  # northeast
-            nw = ns[j + 1][i]  # northwest
-            # elements.append([e, ns[j][i], ns[j][i + 1], ns[j + 1][i + 1], ns[j + 1][i]])
-            elements.append([e, sw, se, ne, nw])
-        # elements.append(row)
-
-    return elements
+    vectorized = isinstance(qq, QuiltArrays)
+    ns = np.asarray(qq[1])  # nodes, as an array of global node numbers
+    ney = ns.shape[0] - 1
+    nex = ns.shape[1] - 1
+    nel = nex * ney
+
+    dtype = index_dtype(max(nel, ns.max()))
+    if kernels is not None and np.array_equal(ns.ravel(), np.arange(1, ns.size + 1)):
+        # the row-major node numbers of quilt(), as the kernel generates them
+        elements = np.empty((nel, 5), dtype=np.int64)
+        kernels.grid_connectivity(nex, ney, 0, 0, elements)
+        elements = elements.astype(dtype, copy=False)
+    else:
+        elements = np.empty((nel, 5), dtype=dtype)
+        elements[:, 0] = np.arange(1, nel + 1)  # global element number
+        # local element numbers
+        elements[:, 1] = ns[:-1, :-1].ravel()  # southwest
+        elements[:, 2] = ns[:-1, 1:].ravel()  # southeast
+        elements[:, 3] = ns[1:, 1:].ravel()  # northeast
+        elements[:, 4] = ns[1:, :-1].ravel()  # northwest
+
+    if vectorized:
+        return elements
+
+    return elements.tolist()
+
+
+def lattice_connectivity(*, nex: int, ney: int, nez: int, chunk_size: int = 65536):
+    """Given a lattice of nex, ney, and nez elements along the x-, y-, and
+    z-axis, yields the hexahedral element connectivity in chunks of at most
+    chunk_size elements.  The lattice is never materialized; only the
+    connectivity of a single quilt is held in memory, so memory use does not
+    depend on nez.
+
+    Args:
+        nex: The number of elements in the x-axis.
+        ney: The number of elements in the y-axis.
+        nez: The number of elements in the z-axis.
+        chunk_size: The maximum number of elements per chunk.
+
+    Yields:
+        An integer array of shape (n, 9), n <= chunk_size, with the element
+        number followed by the eight global node numbers in the Exodus II
+        local node order: the sw, se, ne, nw nodes of the lower quilt, then
+        the sw, se, ne, nw nodes of the upper quilt.  For example, for
+        nex=1, ney=1, nez=1 the single chunk is [[1, 1, 2, 4, 3, 5, 6, 8, 7]].
+    """
+    assert nez >= 1, f"Error: nez={nez}, but nez>=1 required."
+    err = f"Error: chunk_size={chunk_size}, but chunk_size>=1 required."
+    assert chunk_size >= 1, err
+
+    nel = nex * ney  # number of elements per quilt
+    nnp = (nex + 1) * (ney + 1)  # number of nodal points per quilt
+    nel_total = nel * nez
+    dtype = index_dtype(max(nel_total, nnp * (nez + 1)))
+
+    # the quilt connectivity is the template for every layer
+    template = connectivity(quilt(nex=nex, ney=ney, vectorized=True))
+    template = template[:, 1:].astype(dtype)
+
+    for start in range(0, nel_total, chunk_size):
+        stop = min(start + chunk_size, nel_total)
+        if kernels is not None:
+            chunk = np.empty((stop - start, 9), dtype=np.int64)
+            kernels.grid_connectivity(nex, ney, nez, start, chunk)
+            yield chunk.astype(dtype, copy=False)
+            continue
+
+        ee = np.arange(start, stop, dtype=dtype)  # zero-based element numbers
+        kk, ll = np.divmod(ee, nel)  # layer and element within the layer
+        offset = (kk * nnp)[:, np.newaxis]
+
+        chunk = np.empty((stop - start, 9), dtype=dtype)
+        chunk[:, 0] = ee + 1
+        chunk[:, 1:5] = template[ll] + offset  # lower quilt
+        chunk[:, 5:9] = template[ll] + offset + nnp  # upper quilt
+        yield chunk
+
+
+def lattice_throughput(
+    *, nex: int, ney: int, nez: int, chunk_size: int = 65536
+) -> float:
+    """Benchmarks lattice_connectivity by consuming every chunk.
+
+    Returns:
+        The number of elements generated per second.
+    """
+    start = time.perf_counter()
+    for _ in lattice_connectivity(nex=nex, ney=ney, nez=nez, chunk_size=chunk_size):
+        pass
+    elapsed = time.perf_counter() - start
+
+    return nex * ney * nez / elapsed
+
+
+class GridIndex(NamedTuple):
+    """A virtual structured grid that answers element and node queries in
+    closed form from nex, ney, and nez, without materializing the quilt or
+    lattice.  The numbering matches quilt() and connectivity() when nez=0, and
+    lattice() and lattice_connectivity() when nez>=1.
+
+    Element and node numbers are one-based, as in the module documentation.
+    Grid positions (i, j, k) are zero-based along the x-, y-, and z-axis.
+    The batch (*_array) methods accept an array of numbers and return an
+    integer array, padded with 0 where an element or node has fewer
+    neighbors than the maximum.
+    """
+
+    nex: int
+    ney: int
+    nez: int = 0  # 0 for a quilt of quadrilaterals, >= 1 for a lattice of hexes
+
+    @property
+    def nel(self) -> int:
+        """The number of elements."""
+        return self.nex * self.ney * max(self.nez, 1)
+
+    @property
+    def nnp(self) -> int:
+        """The number of nodal points."""
+        return (self.nex + 1) * (self.ney + 1) * (self.nez + 1)
+
+    @property
+    def offsets(self) -> tuple:
+        """The node number offsets of the local element nodes, in the Exodus
+        II local node order, relative to the southwest node."""
+        nx = self.nex + 1
+        quad = (0, 1, nx + 1, nx)
+        if self.nez == 0:
+            return quad
+        nxy = nx * (self.ney + 1)
+        return quad + tuple(x + nxy for x in quad)
+
+    def element_ijk(self, e: int) -> tuple:
+        """Returns the (i, j) or (i, j, k) grid position of element e."""
+        assert 1 <= e <= self.nel, f"Error: e={e}, but 1<=e<={self.nel} required."
+        j, i = divmod(e - 1, self.nex)
+        k, j = divmod(j, self.ney)
+        return (i, j) if self.nez == 0 else (i, j, k)
+
+    def node_ijk(self, n: int) -> tuple:
+        """Returns the (i, j) or (i, j, k) grid position of node n."""
+        assert 1 <= n <= self.nnp, f"Error: n={n}, but 1<=n<={self.nnp} required."
+        j, i = divmod(n - 1, self.nex + 1)
+        k, j = divmod(j, self.ney + 1)
+        return (i, j) if self.nez == 0 else (i, j, k)
+
+    def element_nodes(self, e: int) -> tuple:
+        """Returns the global node numbers of element e, in the Exodus II local
+        node order.  Same as connectivity() or lattice_connectivity() row e,
+        without the element number."""
+        i, j, *k = self.element_ijk(e)
+        k = k[0] if k else 0
+        sw = 1 + i + (j + k * (self.ney + 1)) * (self.nex + 1)
+        return tuple(sw + x for x in self.offsets)
+
+    def node_elements(self, n: int) -> tuple:
+        """Returns the ascending element numbers of the elements that share
+        node n."""
+        i, j, *k = self.node_ijk(n)
+        k = k[0] if k else 0
+        dks = (1, 0) if self.nez else (0,)
+        result = []
+        for kk in (k - dk for dk in dks):
+            for jj in (j - 1, j):
+                for ii in (i - 1, i):
+                    if (
+                        0 <= ii < self.nex
+                        and 0 <= jj < self.ney
+                        and 0 <= kk < max(self.nez, 1)
+                    ):
+                        result.append(1 + ii + (jj + kk * self.ney) * self.nex)
+        return tuple(result)
+
+    def element_neighbors(self, e: int) -> tuple:
+        """Returns the ascending element numbers of the elements that share a
+        face (3D) or an edge (2D) with element e."""
+        i, j, *k = self.element_ijk(e)
+        k = k[0] if k else 0
+        nexy = self.nex * self.ney
+        candidates = (
+            (k > 0, e - nexy),
+            (j > 0, e - self.nex),
+            (i > 0, e - 1),
+            (i < self.nex - 1, e + 1),
+            (j < self.ney - 1, e + self.nex),
+            (k < self.nez - 1, e + nexy),
+        )
+        return tuple(x for valid, x in candidates if valid)
+
+    def _split(self, numbers, nx: int, ny: int):
+        """Returns the zero-based i, j, k arrays of one-based numbers on an
+        nx by ny by (any) grid."""
+        j, i = np.divmod(np.asarray(numbers, dtype=np.int64) - 1, nx)
+        k, j = np.divmod(j, ny)
+        return i, j, k
+
+    def element_nodes_array(self, ee) -> np.ndarray:
+        """Batch element_nodes().  Returns shape (len(ee), 4) or (len(ee), 8)."""
+        i, j, k = self._split(ee, self.nex, self.ney)
+        sw = 1 + i + (j + k * (self.ney + 1)) * (self.nex + 1)
+        return sw[:, np.newaxis] + np.array(self.offsets, dtype=np.int64)
+
+    def node_ijk_array(self, nn) -> np.ndarray:
+        """Batch node_ijk().  Returns shape (len(nn), 2) or (len(nn), 3)."""
+        ijk = np.stack(self._split(nn, self.nex + 1, self.ney + 1), axis=1)
+        return ijk[:, :2] if self.nez == 0 else ijk
+
+    def node_elements_array(self, nn) -> np.ndarray:
+        """Batch node_elements().  Returns shape (len(nn), 4) or (len(nn), 8),
+        with each row ascending among its nonzero entries."""
+        i, j, k = self._split(nn, self.nex + 1, self.ney + 1)
+        dks = (1, 0) if self.nez else (0,)
+        columns = []
+        for dk in dks:
+            for dj in (1, 0):
+                for di in (1, 0):
+                    ii, jj, kk = i - di, j - dj, k - dk
+                    valid = (0 <= ii) & (ii < self.nex) & (0 <= jj) & (jj < self.ney)
+                    valid &= (0 <= kk) & (kk < max(self.nez, 1))
+                    e = 1 + ii + (jj + kk * self.ney) * self.nex
+                    columns.append(np.where(valid, e, 0))
+        return np.stack(columns, axis=1)
+
+    def element_neighbors_array(self, ee) -> np.ndarray:
+        """Batch element_neighbors().  Returns shape (len(ee), 4) or
+        (len(ee), 6), ordered -z, -y, -x, +x, +y, +z (2D omits z)."""
+        e = np.asarray(ee, dtype=np.int64)
+        i, j, k = self._split(e, self.nex, self.ney)
+        nexy = self.nex * self.ney
+        candidates = [
+            (j > 0, e - self.nex),
+            (i > 0, e - 1),
+            (i < self.nex - 1, e + 1),
+            (j < self.ney - 1, e + self.nex),
+        ]
+        if self.nez:
+            candidates = (
+                [(k > 0, e - nexy)] + candidates + [(k < self.nez - 1, e + nexy)]
+            )
+        return np.stack([np.where(v, x, 0) for v, x in candidates], axis=1)
+
+
+class Renumbering(NamedTuple):
+    """The renumbering of existing elements or nodes when a grid is extended,
+    in closed form: number n becomes n + step * ((n - 1) // stride).  A step
+    of 0 leaves every number unchanged."""
+
+    stride: int
+    step: int
+
+    def __call__(self, numbers):
+        """Returns the new numbers of an integer or an array of old numbers."""
+        if isinstance(numbers, (int, np.integer)):
+            return numbers + self.step * ((numbers - 1) // self.stride)
+        numbers = np.asarray(numbers)
+        return numbers + self.step * ((numbers - 1) // self.stride)
+
+
+class Extension(NamedTuple):
+    """The change of a grid extended by extend()."""
+
+    grid: GridIndex  # the extended grid
+    elements: np.ndarray  # the new element numbers
+    connectivity: np.ndarray  # the nodes of the new elements, Exodus II order
+    nodes: np.ndarray  # the new node numbers
+    coordinates: np.ndarray  # the (i, j) or (i, j, k) positions of new nodes
+    element_map: Renumbering  # old to new numbers of the existing elements
+    node_map: Renumbering  # old to new numbers of the existing nodes
+
+
+def extend(grid: GridIndex, *, axis: str, count: int = 1) -> Extension:
+    """Given a grid, appends count columns (axis "x"), rows (axis "y"), or
+    layers (axis "z") of elements, and returns only the new elements and
+    nodes, numbered in the extended grid, with the renumbering of the
+    existing ones.  The cost is proportional to the number of new elements
+    and nodes, not to the size of the grid.
+
+    Example:
+        A quilt grown from nex=1000 to nex=1001, GridIndex(nex=1000, ney=1)
+        extended along "x", has 1 new element and 2 new nodes.  Existing node
+        n becomes n + (n - 1) // 1001, e.g., node 1002 becomes 1003.
+    """
+    assert axis in ("x", "y", "z"), f"Error: axis={axis}, but x, y, or z required."
+    assert count >= 1, f"Error: count={count}, but count>=1 required."
+    err = "Error: a quilt (nez=0) cannot be extended along z."
+    assert axis != "z" or grid.nez >= 1, err
+
+    nex, ney, nez = grid
+    shape = {"x": 0, "y": 1, "z": 2}[axis]
+    new = GridIndex(
+        nex=nex + count * (shape == 0),
+        ney=ney + count * (shape == 1),
+        nez=nez + count * (shape == 2),
+    )
+
+    # the element and node ranges along each axis, old and new
+    element_ranges = [range(nex), range(ney), range(max(nez, 1))]
+    node_ranges = [range(nex + 1), range(ney + 1), range(nez + 1)]
+    old_size = (nex, ney, nez)[shape]
+    element_ranges[shape] = range(old_size, old_size + count)
+    node_ranges[shape] = range(old_size + 1, old_size + 1 + count)
+
+    def numbers(ranges, nx: int, ny: int) -> np.ndarray:
+        kk, jj, ii = np.meshgrid(*reversed(ranges), indexing="ij")
+        return (1 + ii + (jj + kk * ny) * nx).ravel()
+
+    elements = numbers(element_ranges, new.nex, new.ney)
+    nodes = numbers(node_ranges, new.nex + 1, new.ney + 1)
+
+    # the existing numbers shift by the new items inserted before them
+    if shape == 0:
+        element_map = Renumbering(stride=nex, step=count)
+        node_map = Renumbering(stride=nex + 1, step=count)
+    elif shape == 1:
+        element_map = Renumbering(stride=nex * ney, step=nex * count)
+        node_map = Renumbering(stride=(nex + 1) * (ney + 1), step=(nex + 1) * count)
+    else:
+        element_map = Renumbering(stride=1, step=0)
+        node_map = Renumbering(stride=1, step=0)
+
+    return Extension(
+        grid=new,
+        elements=elements,
+        connectivity=new.element_nodes_array(elements),
+        nodes=nodes,
+        coordinates=new.node_ijk_array(nodes),
+        element_map=element_map,
+        node_map=node_map,
+    )
+
+
+class Adjacency(NamedTuple):
+    """A compressed sparse row (CSR) adjacency.  The neighbors of item i
+    (zero-based) are indices[indptr[i]:indptr[i + 1]]."""
+
+    indptr: np.ndarray
+    indices: np.ndarray
+
+
+class Faces(NamedTuple):
+    """A set of element faces (sides), as used by Exodus II side sets."""
+
+    elements: np.ndarray  # one-based element numbers
+    sides: np.ndarray  # one-based local side numbers
+    nodes: np.ndarray  # global node numbers of each face
+
+
+class Mesh:
+    """A mesh of coordinates and connectivity arrays.
+
+    Derived quantities are computed lazily on first access and cached.
+    Assigning new coordinates invalidates only the quantities that depend on
+    the coordinates, and the node elements if the number of nodes changes;
+    assigning a new connectivity invalidates all of them.  The arrays are
+    copied on assignment and stored read-only, so they cannot change in
+    place behind the cache, through the mesh or through the caller's array.
+    """
+
+    # the local node numbers of each side, in the Exodus II side order
+    sides: tuple
+
+    def __init__(self, *, coordinates, connectivity):
+        self.coordinates = coordinates
+        self.connectivity = connectivity
+
+    @staticmethod
+    def _readonly(array) -> np.ndarray:
+        copy = np.array(array)
+        copy.flags.writeable = False
+        return copy
+
+    def _invalidate(self, *names: str) -> None:
+        for name in names:
+            self.__dict__.pop(name, None)
+
+    @property
+    def coordinates(self) -> np.ndarray:
+        """The (nnp, dim) nodal coordinates, row n-1 for node n."""
+        return self._coordinates
+
+    @coordinates.setter
+    def coordinates(self, value) -> None:
+        old = vars(self).get("_coordinates")
+        self._coordinates = self._readonly(value)
+        self._invalidate("centroids", "bounding_box")
+        if old is None or len(old) != len(self._coordinates):
+            self._invalidate("node_elements")  # sized by the number of nodes
+
+    @property
+    def connectivity(self) -> np.ndarray:
+        """The (nel, nodes per element) one-based global node numbers, in
+        the Exodus II local node order, row e-1 for element e."""
+        return self._connectivity
+
+    @connectivity.setter
+    def connectivity(self, value) -> None:
+        self._connectivity = self._readonly(value)
+        self._invalidate("node_elements", "boundary_faces", "centroids")
+
+    @property
+    def nel(self) -> int:
+        """The number of elements."""
+        return len(self.connectivity)
+
+    @property
+    def nnp(self) -> int:
+        """The number of nodal points."""
+        return len(self.coordinates)
+
+    @functools.cached_property
+    def node_elements(self) -> Adjacency:
+        """The one-based elements of each node, node n in row n-1."""
+        flat = self.connectivity.ravel() - 1
+        order = np.argsort(flat, kind="stable")
+        elements = order // self.connectivity.shape[1] + 1
+        indptr = np.zeros(self.nnp + 1, dtype=np.int64)
+        np.cumsum(np.bincount(flat, minlength=self.nnp), out=indptr[1:])
+        return Adjacency(indptr=indptr, indices=elements)
+
+    @functools.cached_property
+    def boundary_faces(self) -> Faces:
+        """The element sides that belong to exactly one element."""
+        local = np.array(self.sides) - 1
+        nodes = self.connectivity[:, local]  # (nel, nsides, nodes per side)
+        nodes = nodes.reshape(-1, local.shape[1])
+        _, first, counts = np.unique(
+            np.sort(nodes, axis=1), axis=0, return_index=True, return_counts=True
+        )
+        idx = np.sort(first[counts == 1])
+        elements, sides = np.divmod(idx, len(self.sides))
+        return Faces(elements=elements + 1, sides=sides + 1, nodes=nodes[idx])
+
+    @functools.cached_property
+    def centroids(self) -> np.ndarray:
+        """The (nel, dim) element centroids, the mean of the element nodes."""
+        return self.coordinates[self.connectivity - 1].mean(axis=1)
+
+    @functools.cached_property
+    def bounding_box(self) -> np.ndarray:
+        """The (2, dim) minimum and maximum coordinates."""
+        return np.stack([self.coordinates.min(axis=0), self.coordinates.max(axis=0)])
+
+
+class QuadMesh(Mesh):
+    """A mesh composed of quadrilateral elements."""
+
+    sides = ((1, 2), (2, 3), (3, 4), (4, 1))
+
+
+class HexMesh(Mesh):
+    """A mesh composed of hexahedral elements."""
+
+    sides = (
+        (1, 2, 6, 5),
+        (2, 3, 7, 6),
+        (3, 4, 8, 7),
+        (1, 5, 8, 4),
+        (1, 4, 3, 2),
+        (5, 6, 7, 8),
+    )
+
+
+def process(nelx: int, nely: int, nelz: int) -> QuadMesh | HexMesh:
+    """Returns the integer coordinates and connectivity for a quadrilateral (2D)
+    or hexahedral (3D) mesh.
+
+    nelx: The number of elements along the x-axis.
+    nely: The number of elements along the y-axis.
+    nelz: The number of elements along the z-axis, 0 if 2D.
+    """
+    grid = GridIndex(nex=nelx, ney=nely, nez=nelz)
+    nn = np.arange(1, grid.nnp + 1, dtype=index_dtype(grid.nnp))
+    coordinates = grid.node_ijk_array(nn)
+
+    if nelz == 0:
+        conn = connectivity(quilt(nex=nelx, ney=nely, vectorized=True))
+        return QuadMesh(coordinates=coordinates, connectivity=conn[:, 1:])
+
+    # otherwise nelz>=1, then a 3D mesh
+    conn = np.concatenate(list(lattice_connectivity(nex=nelx, ney=nely, nez=nelz)))
+    return HexMesh(coordinates=coordinates, connectivity=conn[:, 1:])
 
 
 if __name__ == "__main__":
 
+    # colorized debugging at breakpoints, pdbp is imported only when one is hit
+    os.environ.setdefault("PYTHONBREAKPOINT", "pdbp.set_trace")
+
     # example
     result = quilt(nex=3, ney=2)
     print(result)
@@ -422,95 +1057,161 @@ if __name__ == "__main__":
         [6, 7, 8, 12, 11],
     ]
 
+    # vectorized mode matches the list mode
+    r1 = quilt(nex=3, ney=2, vectorized=True)
+    assert r1.elements.flags.c_contiguous and r1.nodes.flags.c_contiguous
+    assert r1.tolist() == quilt(nex=3, ney=2)
+    r2 = connectivity(r1)
+    assert r2.shape == (6, 5) and r2.dtype == np.int32
+    assert r2.tolist() == connectivity(quilt(nex=3, ney=2))
+
     a, b, c = 1, 1, 1  # overwrite
     r1 = lattice(nex=a, ney=b, nez=c)
     assert r1 == [[[[1]]], [[[1, 2], [3, 4]], [[5, 6], [7, 8]]]]
-
-
-def QuadMesh(NamedTuple):
-    """A mesh composed of quadrilateral elements."""
-    # coordinates: tuple(Quad, ...)
-    pass
-
-
-def HexMesh(NamedTuple):
-    """A mesh composed of hexahedral elements."""
-    pass
+    r2 = next(lattice_connectivity(nex=a, ney=b, nez=c))
+    assert r2.tolist() == [[1, 1, 2, 4, 3, 5, 6, 8, 7]]
+
+    a, b, c = 2, 1, 1  # overwrite
+    r1 = lattice(nex=a, ney=b, nez=c)  # overwrite
+    assert r1 == [[[[1, 2]]], [[[1, 2, 3], [4, 5, 6]], [[7, 8, 9], [10, 11, 12]]]]
+    r2 = next(lattice_connectivity(nex=a, ney=b, nez=c))  # overwrite
+    assert r2.tolist() == [[1, 1, 2, 5, 4, 7, 8, 11, 10], [2, 2, 3, 6, 5, 8, 9, 12, 11]]
+
+    a, b, c = 1, 2, 1  # overwrite
+    r1 = lattice(nex=a, ney=b, nez=c)  # overwrite
+    assert r1 == [[[[1], [2]]], [[[1, 2], [3, 4], [5, 6]], [[7, 8], [9, 10], [11, 12]]]]
+    r2 = next(lattice_connectivity(nex=a, ney=b, nez=c))  # overwrite
+    assert r2.tolist() == [[1, 1, 2, 4, 3, 7, 8, 10, 9], [2, 3, 4, 6, 5, 9, 10, 12, 11]]
+
+    a, b, c = 1, 1, 2  # overwrite
+    r1 = lattice(nex=a, ney=b, nez=c)  # overwrite
+    assert r1 == [
+        [[[1]], [[2]]],
+        [[[1, 2], [3, 4]], [[5, 6], [7, 8]], [[9, 10], [11, 12]]],
+    ]
+    r2 = next(lattice_connectivity(nex=a, ney=b, nez=c))  # overwrite
+    assert r2.tolist() == [[1, 1, 2, 4, 3, 5, 6, 8, 7], [2, 5, 6, 8, 7, 9, 10, 12, 11]]
+
+    # chunks of fixed size concatenate to the full connectivity
+    a, b, c = 3, 2, 5  # overwrite
+    chunks = list(lattice_connectivity(nex=a, ney=b, nez=c, chunk_size=4))
+    assert [len(x) for x in chunks] == [4] * 7 + [2]
+    full = np.concatenate(chunks)
+    assert full[:, 0].tolist() == list(range(1, a * b * c + 1))
+    r1 = lattice(nex=a, ney=b, nez=c, vectorized=True)  # overwrite
+    assert full[:, 1:].max() == r1.nodes.max()
+
+    # closed-form index matches the generated connectivity
+    gi = GridIndex(nex=3, ney=2)
+    r2 = connectivity(quilt(nex=3, ney=2))
+    assert [list(gi.element_nodes(e)) for e in range(1, 7)] == [x[1:] for x in r2]
+    assert gi.element_nodes_array(range(1, 7)).tolist() == [x[1:] for x in r2]
+    assert gi.node_ijk(7) == (2, 1)
+    assert gi.node_elements(6) == (1, 2, 4, 5)
+    assert gi.node_elements(1) == (1,)
+    assert gi.node_elements_array([6, 1]).tolist() == [[1, 2, 4, 5], [0, 0, 0, 1]]
+    assert gi.element_neighbors(5) == (2, 4, 6)
+    assert gi.element_neighbors_array([5]).tolist() == [[2, 4, 6, 0]]
+
+    gi = GridIndex(nex=3, ney=2, nez=5)
+    r2 = np.concatenate(list(lattice_connectivity(nex=3, ney=2, nez=5)))
+    assert (gi.element_nodes_array(r2[:, 0]) == r2[:, 1:]).all()
+    assert gi.element_nodes(30) == tuple(r2[29, 1:])
+    r1 = lattice(nex=3, ney=2, nez=5, vectorized=True)
+    nn = r1.nodes.ravel()
+    kk, jj, ii = np.unravel_index(np.arange(nn.size), r1.nodes.shape)
+    assert (gi.node_ijk_array(nn) == np.stack([ii, jj, kk], axis=1)).all()
+    for n in (1, 17, 50, 72):
+        found = tuple(e for e in range(1, gi.nel + 1) if n in gi.element_nodes(e))
+        assert gi.node_elements(n) == found
+        assert tuple(x for x in gi.node_elements_array([n])[0] if x) == found
+    assert gi.element_neighbors(8) == (2, 7, 9, 11, 14)
+    assert gi.element_neighbors_array([8]).tolist() == [[2, 0, 7, 9, 11, 14]]
+
+    # struct-of-arrays records
+    qa = quads(nex=3, ney=2)
+    assert len(qa) == 6
+    assert qa[4] == Quad(
+        sw=Point2D(1, 1), se=Point2D(2, 1), ne=Point2D(2, 2), nw=Point2D(1, 2)
+    )
+    assert list(qa[3:5]) == [qa[3], qa[4]]
+    assert np.shares_memory(qa[3:5].sw.x, qa.sw.x)
+    assert list(QuadArray.from_records(list(qa))) == list(qa)
+    ha = hexes(nex=3, ney=2, nez=5)
+    assert ha[29].nwb == Point3D(x=2, y=2, z=5)
+    assert list(HexArray.from_records(list(ha[::7]))) == list(ha[::7])
+    assert ha.nbytes == 3 * 8 * ha.swa.x.nbytes
+
+    # a single quad, coordinates and connectivity
+    qm = process(nelx=1, nely=1, nelz=0)
+    assert qm.coordinates.tolist() == [[0, 0], [1, 0], [0, 1], [1, 1]]
+    assert qm.connectivity.tolist() == [[1, 2, 4, 3]]
+
+    # lazy derived data of a quad mesh
+    qm = process(nelx=3, nely=2, nelz=0)
+    assert qm.bounding_box.tolist() == [[0, 0], [3, 2]]
+    assert qm.centroids[4].tolist() == [1.5, 1.5]
+    ne = qm.node_elements
+    assert ne.indices[ne.indptr[5] : ne.indptr[6]].tolist() == [1, 2, 4, 5]
+    assert len(qm.boundary_faces.elements) == 2 * (3 + 2)
+    assert "centroids" in vars(qm) and "node_elements" in vars(qm)
+    qm.coordinates = qm.coordinates * 2  # invalidates coordinate data only
+    assert "centroids" not in vars(qm) and "node_elements" in vars(qm)
+    assert qm.bounding_box.tolist() == [[0, 0], [6, 4]]
+    try:
+        qm.connectivity[0, 0] = 2
+        raise AssertionError("connectivity must be read-only")
+    except ValueError:
+        pass
+    # the mesh holds a copy, so the caller's array cannot go stale behind it
+    xy = qm.coordinates.copy()
+    qm.coordinates = xy
+    xy[:] = -1
+    assert qm.bounding_box.tolist() == [[0, 0], [6, 4]]
+    # a change in the number of nodes rebuilds the node elements
+    qm.coordinates = np.vstack([qm.coordinates, [[9, 9]]])
+    assert "node_elements" not in vars(qm)
+    assert len(qm.node_elements.indptr) == qm.nnp + 1 == 14
+
+    # lazy derived data of a hex mesh
+    hm = process(nelx=3, nely=2, nelz=5)
+    assert hm.nel == 30 and hm.nnp == 72
+    assert len(hm.boundary_faces.elements) == 2 * (3 * 2 + 3 * 5 + 2 * 5)
+    assert hm.boundary_faces.sides[0] == 1 and hm.boundary_faces.elements[0] == 1
+    assert hm.centroids[29].tolist() == [2.5, 1.5, 4.5]
+    assert np.diff(hm.node_elements.indptr).max() == 8
+
+    # incremental extension matches regeneration
+    for grid in (GridIndex(nex=3, ney=2), GridIndex(nex=3, ney=2, nez=4)):
+        for axis in ("x", "y", "z") if grid.nez else ("x", "y"):
+            ext = extend(grid, axis=axis, count=2)
+            full = ext.grid.element_nodes_array(np.arange(1, ext.grid.nel + 1))
+            old = grid.element_nodes_array(np.arange(1, grid.nel + 1))
+            moved = ext.element_map(np.arange(1, grid.nel + 1))
+            assert (full[moved - 1] == ext.node_map(old)).all()
+            assert (full[ext.elements - 1] == ext.connectivity).all()
+            assert sorted(moved.tolist() + ext.elements.tolist()) == list(
+                range(1, ext.grid.nel + 1)
+            )
+            moved = ext.node_map(np.arange(1, grid.nnp + 1))
+            assert sorted(moved.tolist() + ext.nodes.tolist()) == list(
+                range(1, ext.grid.nnp + 1)
+            )
+            assert (ext.grid.node_ijk_array(ext.nodes) == ext.coordinates).all()
+    ext = extend(GridIndex(nex=1000, ney=1), axis="x")
+    assert ext.elements.tolist() == [1001]
+    assert ext.nodes.tolist() == [1002, 2004]
+    assert ext.node_map(1002) == 1003
+
+    # a virtual mesh of 10^9 elements, never allocated
+    gi = GridIndex(nex=1000, ney=1000, nez=1000)
+    assert gi.element_nodes(gi.nel)[-2] == gi.nnp
+
+    # benchmark
+    rate = lattice_throughput(nex=100, ney=100, nez=100)
+    print(f"lattice_connectivity: {rate:.3e} elements/sec")
 
 
 def flatten(list_of_lists):
     "Flatten one level of nesting."
     return itertools.chain.from_iterable(list_of_lists)
-
-
-# # def process(nelx: int, nely: int, nelz: int) -> QuadMesh | HexMesh:
-# def process(nelx: int, nely: int, nelz: int):
-#     """Returns the integer coordinates and connectivity for a quadrilateral (2D)
-#     or hexahedral (3D) mesh.
-#
-#     nelx: The number of elements along the x-axis.
-#     nely: The number of elements along the y-axis.
-#     nelz: The number of elements along the z-axis, 0 if 2D.
-#
-#     """
-#     if nelz == 0:
-#         nnp = (nelx + 1) * (nely + 1)  # number of nodal points
-#         # nn = tuple(range(1, nnp + 1))  # node numbers
-#         # nnr = tuple(reversed(range(1, nnp + 1)))  # node numbers reversed
-#         row_x = tuple(range(nelx))
-#         row_y = tuple(0 for x in range(nelx))
-#         xs = tuple(row_x for y in range(nely + 1))
-#         x = tuple(flatten(xs))
-#         ys = tuple(map(lambda y: tuple(itertools.repeat(y, nelx)), range(nely + 1)))
-#         # ys = tuple(map(lambda y: itertools.repeat(y, nelx), range(nely + 1)))
-#         y = tuple(flatten(ys))
-#         coordinates = tuple(zip(x, y))
-#
-#         # seed = (0, 1, nelx + 2, nelx + 1)
-#         # seed = (0, 1, nelx + 1, nelx)
-#         # seed = (1, 2, nelx + 3, nelx + 2)
-#         seed = (0, 1, 3, 2)
-#         # tuple(tuple(x + y for x in (0, 1, 3, 2)) for y in range(1, nelx*nely + 1))
-#         # connectivity
-#         aa = tuple(tuple(map(lambda e: e + x, (0, 1, 3, 2))) for x in (1, 2))
-#         net = tuple(tuple(x + y for x in seed) for y in range(1, nelx * nely + 1))
-#         zz = []
-#         for y in range(nely):
-#             for x in range(nelx):
-#                 print(f"(x, y) = ({x}, {y})")
-#                 cc = 1 + x + y * nelx
-#                 breakpoint()
-#         breakpoint()
-#         return QuadMesh
-#
-#     # otherwise nelz>=1, then a 3D mesh
-#
-#     return HexMesh
-#
-#
-# def test_single_quad():
-#     """Tests the pattern for a single quadrilateral element.
-#
-#     nsd = 2
-#     nelx = nely = 1
-#        y
-#        ^
-#       3|      4
-#        *-----*
-#        |4   3|
-#        | (1) |
-#        |1   2|
-#        *-----* --> x
-#       1       2
-#     coordinates
-#     0, 0
-#     1, 0
-#     0, 1
-#     1, 1
-#     connectivity
-#     1 2 4 3
-#     """
-#     known_coor = (((0, 0), (1, 0), (0, 1), (1, 1)),)
-#     known_conn = ((1, 2, 4, 3),)
-#
-#     found = process(nelx=2, nely=2, nelz=0)
@@ -0,0 +1,334 @@
+"""This module compiles a Schema, from https://pypi.org/project/schema/, once
+into a tree of plain Python closures, and validates batches of records with
+it, reporting every failing record instead of stopping at the first.
+
+Schema.validate interprets the schema on every call: it wraps each nested
+part in a new Schema, sorts the dictionary keys by priority, and formats
+error messages as it goes.  The compiled validator does that work once.
+It handles types, callables, literal values, And, Or, Use, Literal, lists,
+and dictionaries whose keys are literals or Optional literals; any other
+part, e.g., Regex, Hook, Forbidden, or a Schema with a custom error, is
+validated by Schema.validate itself.  The message of a failing record comes
+from Schema.validate, so it is the same as without compiling.
+
+Example:
+    validator = Validator(schema)  # schema = Schema([{...}]), as in test.py
+    result = validator.validate(rows)
+    result.data  # the coerced valid rows, as Schema.validate returns them
+    result.failures  # [Failure(index=2, message="Key 'gender' error: ...")]
+"""
+
+# the compiler reads the parts of schema objects, and matches their exact types
+# pylint: disable=protected-access,unidiomatic-typecheck
+
+from typing import Any, Callable, NamedTuple
+
+from schema import And, Literal, Optional, Or, Schema, SchemaError, Use
+
+
+class Failure(NamedTuple):
+    """A record that fails validation."""
+
+    index: int  # zero-based position in the input
+    message: str  # the SchemaError message of Schema.validate
+
+
+class Validation(NamedTuple):
+    """The result of validating a batch of records."""
+
+    data: list  # the coerced valid records, in input order
+    failures: list  # a Failure for each invalid record, in input order
+
+
+class Invalid(Exception):
+    """Raised by compiled validators; cheaper to build than a SchemaError."""
+
+
+def _fallback(part) -> Callable[[Any], Any]:
+    """Returns a validator that defers to Schema.validate."""
+    return Schema(part).validate
+
+
+def _chain(steps: list) -> Callable[[Any], Any]:
+    """Returns a validator that applies the steps in turn, as And does."""
+    if len(steps) == 1:
+        return steps[0]
+
+    def validate(data):
+        for step in steps:
+            data = step(data)
+        return data
+
+    return validate
+
+
+def _first(options: list) -> Callable[[Any], Any]:
+    """Returns a validator that returns the first option that passes, as Or
+    does."""
+
+    def validate(data):
+        for option in options:
+            try:
+                return option(data)
+            except (Invalid, SchemaError):
+                pass
+        raise Invalid
+
+    return validate
+
+
+def _of_type(kind: type) -> Callable[[Any], Any]:
+    """Returns a validator of instances of kind; bool is not an int."""
+
+    def validate(data):
+        if isinstance(data, kind) and not (isinstance(data, bool) and kind is int):
+            return data
+        raise Invalid
+
+    return validate
+
+
+def _predicate(function: Callable) -> Callable[[Any], Any]:
+    """Returns a validator of the data for which function is true."""
+
+    def validate(data):
+        try:
+            valid = function(data)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            raise Invalid from error
+        if valid:
+            return data
+        raise Invalid
+
+    return validate
+
+
+def _use(function: Callable) -> Callable[[Any], Any]:
+    """Returns a validator that converts the data with function, as Use does."""
+
+    def validate(data):
+        try:
+            return function(data)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            raise Invalid from error
+
+    return validate
+
+
+def _equal(value) -> Callable[[Any], Any]:
+    """Returns a validator of data equal to value."""
+
+    def validate(data):
+        if value == data:
+            return data
+        raise Invalid
+
+    return validate
+
+
+def _sequence(kind: type, options: list) -> Callable[[Any], Any]:
+    """Returns a validator of a kind of sequence, each of whose items passes
+    one of the options, as a list schema does."""
+    each = _first(options)
+    check = _of_type(kind)
+
+    def validate(data):
+        data = check(data)
+        return type(data)(each(x) for x in data)
+
+    return validate
+
+
+def _mapping(part: dict):
+    """Returns a validator of a dictionary with literal, or Optional literal,
+    keys, or None if some key is not of that kind."""
+    fields, required, defaults = {}, set(), {}
+    for key, value in part.items():
+        if type(key) is Optional:
+            if key._error is not None:
+                return None
+            literal = key._schema
+            if hasattr(key, "default"):
+                defaults[literal] = key.default
+        elif _is_literal(key):
+            literal = key
+            required.add(literal)
+        else:
+            return None
+        if not _is_literal(literal) or literal in fields:
+            return None
+        fields[literal] = compile_schema(value)
+
+    def validate(data):
+        if not isinstance(data, dict):
+            raise Invalid
+        new = type(data)()
+        # as Schema.validate, values that are dictionaries go last
+        for key, value in sorted(data.items(), key=lambda x: isinstance(x[1], dict)):
+            check = fields.get(key)
+            if check is None:
+                raise Invalid  # a wrong key
+            new[key] = check(value)
+        if not required.issubset(new):
+            raise Invalid  # a missing key
+        for key, default in defaults.items():
+            if key not in new:
+                new[key] = default() if callable(default) else default
+        return new
+
+    return validate
+
+
+def _is_literal(key) -> bool:
+    """Returns True if the dictionary key is matched by equality alone."""
+    return isinstance(key, (str, int, float, bytes)) or key is None
+
+
+def _compile(part, error):
+    """Returns the compiled validator of part, or None if part needs
+    Schema.validate, e.g., because of a custom error message."""
+    # pylint: disable=too-many-return-statements,too-many-branches
+    if error is not None:
+        return None
+    if type(part) is Schema:
+        if part._ignore_extra_keys:
+            return None
+        return _compile(part._schema, part._error)
+    if isinstance(part, Literal):
+        return _compile(part.schema, None)
+    if type(part) in (list, tuple, set, frozenset):
+        return _sequence(type(part), [compile_schema(x) for x in part])
+    if type(part) is dict:
+        return _mapping(part)
+    if isinstance(part, type):
+        return _of_type(part)
+    if type(part) is And:
+        if part._error is not None or part._ignore_extra_keys:
+            return None
+        return _chain([compile_schema(x) for x in part._args])
+    if type(part) is Or:
+        if part._error is not None or part._ignore_extra_keys or part.only_one:
+            return None
+        return _first([compile_schema(x) for x in part._args])
+    if type(part) is Use:
+        return None if part._error is not None else _use(part._callable)
+    if hasattr(part, "validate"):
+        return None
+    if callable(part):
+        return _predicate(part)
+    return _equal(part)
+
+
+def compile_schema(part) -> Callable[[Any], Any]:
+    """Returns a function of the data that returns the same coerced data as
+    Schema(part).validate, or raises Invalid or SchemaError where it would
+    raise SchemaError."""
+    compiled = _compile(part, None)
+    return _fallback(part) if compiled is None else compiled
+
+
+class Validator:  # pylint: disable=too-few-public-methods
+    """A batch validator of records, compiled once from a Schema.
+
+    Args:
+        schema: The Schema, or schema, of a list of records, e.g.,
+            Schema([{...}]), or of a single record, e.g., {...}.
+    """
+
+    def __init__(self, schema):
+        part = schema
+        if type(part) is Schema and part._error is None:
+            part = part._schema
+        if type(part) is list:
+            part = part[0] if len(part) == 1 else Or(*part)
+        self.record = part
+        self.compiled = compile_schema(part)
+
+    def validate(self, records) -> Validation:
+        """Returns the coerced valid records, and the Failure of every invalid
+        record, of the iterable of records."""
+        data, failures = [], []
+        compiled = self.compiled
+        for index, record in enumerate(records):
+            try:
+                data.append(compiled(record))
+            except (Invalid, SchemaError):
+                # the slow path, for the message, and as the final word
+                try:
+                    data.append(Schema(self.record).validate(record))
+                except SchemaError as error:
+                    failures.append(Failure(index=index, message=str(error)))
+        return Validation(data=data, failures=failures)
+
+
+if __name__ == "__main__":
+
+    import timeit  # pylint: disable=ungrouped-imports
+
+    # the schema of test.py
+    person = Schema(
+        [
+            {
+                "name": And(str, len),
+                "age": And(Use(int), lambda n: 18 <= n <= 99),
+                Optional("gender"): And(
+                    str,
+                    Use(str.lower),
+                    lambda s: s in ("squid", "kid"),
+                ),
+            }
+        ]
+    )
+    good = [
+        {"name": "Sue", "age": "28", "gender": "Squid"},
+        {"name": "Sam", "age": "42"},
+        {"name": "Sacha", "age": "20", "gender": "KID"},
+    ]
+    bad = [
+        {"name": "Sue", "age": "18", "gender": "Squid"},
+        {"name": "Sam", "age": "100"},
+        {"name": "Sacha", "age": "20", "gender": "unknown"},
+        {"name": "", "age": "20"},
+        {"name": "Kim", "age": "x"},
+        {"name": "Lee"},
+        {"name": "Ann", "age": "30", "extra": 1},
+        "not a record",
+    ]
+
+    validator = Validator(person)
+    result = validator.validate(good)
+    assert result.data == person.validate(good) and result.failures == []
+
+    result = validator.validate(bad)
+    assert result.data == [{"name": "Sue", "age": 18, "gender": "squid"}]
+    assert [x.index for x in result.failures] == [1, 2, 3, 4, 5, 6, 7]
+    for failure in result.failures:
+        try:
+            Schema(person._schema[0]).validate(bad[failure.index])
+        except SchemaError as error:
+            assert failure.message == str(error)
+    assert result.failures[3].message.startswith("Key 'age' error:")
+
+    # defaults, nesting, alternatives, and a fallback part (a custom error)
+    nested = Schema(
+        {
+            "id": Or(int, Use(int)),
+            Optional("tags", default=list): [str],
+            Optional("size", default=1): int,
+            "owner": {"name": Schema(str, error="a name is a string")},
+            "kind": Literal("point"),
+        }
+    )
+    item = {"id": "7", "owner": {"name": "Ada"}, "kind": "point"}
+    assert Validator(nested).validate([item]).data == [nested.validate(item)]
+    assert Validator(nested).validate([{**item, "id": 1.5}]).data[0]["id"] == 1
+    result = Validator(nested).validate([{**item, "owner": {"name": 3}}])
+    assert result.failures[0].message.endswith("a name is a string")
+
+    # the compiled validator is faster
+    rows = good * 10_000
+    fast = timeit.timeit(lambda: validator.validate(rows), number=1)
+    slow = timeit.timeit(lambda: person.validate(rows), number=1)
+    print(f"rows={len(rows)}, compiled={fast:.3f}s, Schema.validate={slow:.3f}s")
+
+    print("compiled: all tests passed")
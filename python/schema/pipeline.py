@@ -0,0 +1,314 @@
+"""This module validates a large stream of records in chunks, across a
+process pool, and streams the valid records to a sink.
+
+Records are read from any iterable, one chunk at a time, so the input is
+never held in memory at once; at most two chunks per worker are in flight.
+Each worker compiles the schema once, see compiled.Validator, and returns
+the coerced valid records and the failures of its chunk.  Invalid records
+never stop the run.  They are tallied into a bounded ErrorReport: a count
+per rule, e.g., "Key 'age' error", and the first few failures as samples.
+
+The pool starts its workers with forkserver where the platform has it,
+and with its default start method otherwise.  A schema that cannot be
+pickled, e.g., one with lambdas as in test.py, reaches the workers only by
+fork, so it is validated in forked workers where the platform can fork.
+A chunk that stalls past the timeout, or whose worker crashes, does not
+stop the run either: its records are tallied as failures of the TIMEOUT or
+CRASHED rule, the pool is restarted, and the chunks still in flight are
+submitted again.  After a crash, those chunks run one at a time, so that
+only the chunk that crashes its worker is lost.
+
+Example:
+    valid = []
+    report = validate(rows, schema, chunk_size=10_000, sink=valid.extend)
+    print(report.total, report.counts, report.samples)
+"""
+
+import collections
+import itertools
+import multiprocessing
+import os
+import pickle
+from concurrent import futures
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Iterable, NamedTuple, Optional
+
+from compiled import Failure, Validator
+
+OTHER = "other"  # the rule of failures beyond max_rules distinct rules
+TIMEOUT = "Timeout"  # the rule of the records of a chunk past the timeout
+CRASHED = "Worker crashed"  # the rule of the records of a crashed chunk
+
+_validator = None  # the Validator of a pool worker
+
+
+class ErrorReport(NamedTuple):
+    """A bounded summary of the invalid records of a validation run."""
+
+    records: int  # the number of records read
+    total: int  # the number of invalid records
+    counts: dict  # rule -> number of invalid records
+    samples: list  # the first failures, with indices into the whole input
+
+
+def rule(message: str) -> str:
+    """Returns the rule of a SchemaError message, its first line without
+    the offending data, so that similar failures count together."""
+    first = message.splitlines()[0] if message else ""
+    if first in (TIMEOUT, CRASHED):
+        return first
+    if first.startswith("Wrong key"):
+        return "Wrong key"
+    if first.startswith(("Key ", "Missing key")):
+        return first.rstrip(":")
+    return "Invalid record"
+
+
+def _start(schema) -> None:
+    """Compiles the schema once, in each pool worker."""
+    global _validator  # pylint: disable=global-statement
+    _validator = Validator(schema)
+
+
+def _validate_chunk(start: int, records: list) -> tuple:
+    """Returns the coerced valid records and the failures of a chunk whose
+    first record has index start in the whole input."""
+    result = _validator.validate(records)
+    failures = [Failure(start + x.index, x.message) for x in result.failures]
+    return result.data, failures
+
+
+def context(schema):
+    """Returns the multiprocessing context of a pool that validates the
+    schema: forkserver where available, but fork for a schema that cannot
+    be pickled, e.g., one with lambdas."""
+    methods = multiprocessing.get_all_start_methods()
+    try:
+        pickle.dumps(schema)
+    except (pickle.PicklingError, AttributeError, TypeError) as error:
+        err = f"Error: the schema cannot be pickled ({error}), and fork is unavailable."
+        assert "fork" in methods, err
+        return multiprocessing.get_context("fork")
+    return multiprocessing.get_context(
+        "forkserver" if "forkserver" in methods else None
+    )
+
+
+def _lost(start: int, records: list, message: str) -> list:
+    """Returns a Failure of each record of a chunk without a result."""
+    return [Failure(start + i, message) for i in range(len(records))]
+
+
+def _terminate(pool: ProcessPoolExecutor, before: set) -> None:
+    """Shuts down the pool, and terminates its workers, the child processes
+    that are not in before, which a stalled chunk would keep alive."""
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in multiprocessing.active_children():
+        if process not in before:
+            process.terminate()
+            process.join()
+
+
+def _tally(counts: collections.Counter, failures: list, max_rules: int) -> None:
+    """Counts the failures by rule, in at most max_rules rules and OTHER."""
+    for failure in failures:
+        name = rule(failure.message)
+        if name not in counts and len(counts) >= max_rules:
+            name = OTHER
+        counts[name] += 1
+
+
+def validate(
+    records: Iterable,
+    schema,
+    *,
+    chunk_size: int = 10_000,
+    max_workers: Optional[int] = None,
+    sink: Optional[Callable[[list], None]] = None,
+    max_samples: int = 10,
+    max_rules: int = 32,
+    timeout: Optional[float] = 600.0,
+    mp_context=None,
+) -> ErrorReport:
+    """Validates the records against the schema of one record, or of a list
+    of records, and returns the ErrorReport.
+
+    Args:
+        records: An iterable of records, e.g., a generator over a file.
+        schema: The Schema, see compiled.Validator.
+        chunk_size: The number of records validated per task.
+        max_workers: The number of worker processes, by default the number
+            of processors.
+        sink: Called with the list of coerced valid records of each chunk,
+            in input order.
+        max_samples: The number of failures kept as samples.
+        max_rules: The number of distinct rules counted; the failures of any
+            further rules count as OTHER.
+        timeout: The seconds to wait for the result of each chunk, after
+            which its records fail with the TIMEOUT rule.  None waits
+            without limit, so a record that hangs its worker hangs the run.
+        mp_context: The multiprocessing context of the pool, by default
+            context(schema).
+    """
+    err = f"Error: chunk_size={chunk_size}, but chunk_size>=1 required."
+    assert chunk_size >= 1, err
+    iterator = iter(records)
+    chunks = iter(lambda: list(itertools.islice(iterator, chunk_size)), [])
+    counts = collections.Counter()
+    samples, read = [], 0
+    max_workers = max_workers or os.cpu_count() or 1
+
+    before = set(multiprocessing.active_children())
+    mp_context = mp_context or context(schema)
+
+    def new_pool() -> ProcessPoolExecutor:
+        """Returns a pool whose workers compile the schema."""
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp_context,
+            initializer=_start,
+            initargs=(schema,),
+        )
+
+    pool = new_pool()
+    pending = collections.deque()  # (start, records, future, run alone)
+    retry = collections.deque()  # (start, records) to run alone, after a crash
+    try:
+        while True:
+            if retry and not pending:
+                start, chunk = retry.popleft()
+                future = pool.submit(_validate_chunk, start, chunk)
+                pending.append((start, chunk, future, True))
+            # keep two chunks per worker in flight, to bound memory
+            while (
+                not retry
+                and len(pending) < 2 * max_workers
+                and (chunk := next(chunks, []))
+            ):
+                future = pool.submit(_validate_chunk, read, chunk)
+                pending.append((read, chunk, future, False))
+                read += len(chunk)
+            if not pending:
+                break
+            start, chunk, future, alone = pending.popleft()
+            try:
+                data, failures = future.result(timeout=timeout)
+            except (futures.TimeoutError, BrokenProcessPool) as error:
+                _terminate(pool, before)
+                pool = new_pool()
+                stalled = isinstance(error, futures.TimeoutError)
+                if not (stalled or alone):
+                    # any chunk in flight may have crashed the worker
+                    rerun = [(start, chunk)] + [x[:2] for x in pending]
+                    retry.extendleft(reversed(rerun))
+                    pending.clear()
+                    continue
+                data, failures = [], _lost(
+                    start, chunk, TIMEOUT if stalled else CRASHED
+                )
+                pending = collections.deque(
+                    (x, y, pool.submit(_validate_chunk, x, y), z)
+                    for x, y, _, z in pending
+                )
+            if sink is not None and data:
+                sink(data)
+            _tally(counts, failures, max_rules)
+            samples.extend(failures[: max(max_samples - len(samples), 0)])
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+    return ErrorReport(
+        records=read, total=sum(counts.values()), counts=dict(counts), samples=samples
+    )
+
+
+if __name__ == "__main__":
+
+    import time
+
+    from schema import And, Optional as Maybe, Schema, Use
+
+    person = Schema(
+        {
+            "name": And(str, len),
+            "age": And(Use(int), lambda n: 18 <= n <= 99),
+            Maybe("gender"): And(str, Use(str.lower), lambda s: s in ("squid", "kid")),
+        }
+    )
+
+    def people(n: int):
+        """Yields n records, every seventh with a bad age, every eleventh
+        with an unknown gender, and every thirteenth with an extra key."""
+        for i in range(n):
+            row = {"name": f"P{i}", "age": str(18 + i % 80), "gender": "Kid"}
+            if i % 7 == 0:
+                row["age"] = "101"
+            if i % 11 == 0:
+                row["gender"] = "unknown"
+            if i % 13 == 0:
+                row[f"extra{i}"] = i
+            yield row
+
+    N = 10_001
+    valid = []
+    report = validate(
+        people(N), person, chunk_size=500, max_workers=2, sink=valid.extend
+    )
+    expected = [i for i in range(N) if i % 7 and i % 11 and i % 13]
+    assert report.records == N
+    assert report.total == N - len(expected)
+    assert [x["name"] for x in valid] == [f"P{i}" for i in expected]
+    assert valid[0] == {"name": "P1", "age": 19, "gender": "kid"}
+    assert len(report.samples) == 10 and report.samples[0].index == 0
+    invalid = sorted(set(range(N)) - set(expected))
+    assert [x.index for x in report.samples] == invalid[:10]
+    assert sum(report.counts.values()) == report.total
+    assert set(report.counts) == {"Key 'age' error", "Key 'gender' error", "Wrong key"}
+
+    # the rules are bounded
+    report = validate(people(N), person, chunk_size=500, max_workers=2, max_rules=1)
+    assert len(report.counts) == 2 and OTHER in report.counts
+
+    # a schema that pickles runs on forkserver, one with lambdas on fork
+    plain = Schema({"name": And(str, len), "age": Use(int)})
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        assert context(plain).get_start_method() == "forkserver"
+    assert context(person).get_start_method() == "fork"
+    rows = [{"name": "P", "age": "1"}, {"name": "", "age": "2"}]
+    report = validate(rows, plain, chunk_size=1, max_workers=2)
+    assert report.records == 2 and report.total == 1
+
+    # a chunk that stalls, or crashes its worker, fails, and the run goes on
+    def stall(n: int) -> int:
+        """Returns n, but hangs on record 7."""
+        if n == 7:
+            time.sleep(60)
+        return n
+
+    def crash(n: int) -> int:
+        """Returns n, but exits the worker on record 13."""
+        if n == 13:
+            os._exit(1)
+        return n
+
+    for function, rule_, bad in ((stall, TIMEOUT, 5), (crash, CRASHED, 10)):
+        valid = []
+        rows = [{"n": i} for i in range(40)]
+        tic = time.perf_counter()
+        report = validate(
+            rows,
+            Schema({"n": Use(function)}),
+            chunk_size=5,
+            max_workers=2,
+            sink=valid.extend,
+            timeout=1.0,
+            mp_context=multiprocessing.get_context("fork"),  # for local functions
+        )
+        assert time.perf_counter() - tic < 30
+        lost = list(range(bad, bad + 5))  # the chunk of the bad record
+        assert [x["n"] for x in valid] == [i for i in range(40) if i not in lost]
+        assert report.records == 40 and report.counts == {rule_: 5}
+        assert [x.index for x in report.samples] == lost
+
+    print("pipeline: all tests passed")
@@ -1,9 +1,14 @@
 """This module runs a Schema test from https://pypi.org/project/schema/"""
 
-import pdbp  # colorized debugger with pip install pdbp
+import os
+
+# colorized debugger with pip install pdbp, imported only at a breakpoint
+os.environ.setdefault("PYTHONBREAKPOINT", "pdbp.set_trace")
 
 from schema import Schema, And, Use, Optional, SchemaError
 
+import pipeline
+
 schema = Schema(
     [
         {
@@ -42,8 +47,12 @@ bad_data = [
     {"name": "Sacha", "age": "20", "gender": "unknown"},
 ]
 
-validation_2 = schema.validate(bad_data)
+# Schema.validate would raise on the first bad record, so validate the
+# records in chunks instead, and report every bad record.
+report = pipeline.validate(bad_data, schema, chunk_size=2, max_workers=2)
 
-breakpoint()
+assert report.records == 3 and report.total == 1
+assert [x.index for x in report.samples] == [2]
+assert report.counts == {"Key 'gender' error": 1}
 
-print("Second tests are valid.")
+print("Second tests report every invalid record.")
@@ -0,0 +1,115 @@
+"""This module loads yml files into dictionaries on first access, and caches
+the result, so repeated loads of an unchanged file do not parse it again.
+
+Parsing uses the libyaml CSafeLoader when PyYAML is built with libyaml,
+and the pure-Python SafeLoader otherwise.  A cached result is reused while
+the file keeps its path, modification time, and size; a change to any of
+them parses the file again.  The cached dictionary is shared between
+callers, so treat it as read-only.
+
+Example:
+    db = load("example.yml")  # parses
+    db = load("example.yml")  # a hit, no parsing
+    config = Config("example.yml")  # no parsing until config.db is read
+"""
+
+import os
+import pathlib
+import tempfile
+from typing import NamedTuple
+
+import yaml
+
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class CacheKey(NamedTuple):
+    """The identity of a file's contents, as used to validate the cache."""
+
+    path: str  # resolved absolute path
+    mtime_ns: int
+    size: int
+
+
+_cache: dict = {}  # path -> (CacheKey, parsed result)
+
+
+def cache_key(path) -> CacheKey:
+    """Returns the CacheKey of the file at path."""
+    resolved = pathlib.Path(path).expanduser().resolve()
+    stat = os.stat(resolved)
+    return CacheKey(path=str(resolved), mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+
+
+def load(path):
+    """Returns the parsed contents of the yml file at path, from the cache if
+    the file is unchanged since it was last parsed.
+
+    Raises:
+        OSError: If the file cannot be opened or decoded.
+    """
+    key = cache_key(path)
+    cached = _cache.get(key.path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+
+    try:
+        with open(file=key.path, mode="r", encoding="utf-8") as stream:
+            db = yaml.load(stream, Loader=Loader)
+    except yaml.YAMLError as error:
+        print(f"Error with yml module: {error}")
+        print(f"Could not open or decode: {path}")
+        raise OSError from error
+
+    _cache[key.path] = (key, db)
+    return db
+
+
+def clear_cache() -> None:
+    """Forgets every parsed file."""
+    _cache.clear()
+
+
+class Config:
+    """A yml file that is parsed on the first access of db, through load."""
+
+    def __init__(self, path):
+        self.path = path
+
+    @property
+    def db(self):
+        """The parsed contents of the file, reloaded if the file changed."""
+        return load(self.path)
+
+
+if __name__ == "__main__":
+
+    with tempfile.TemporaryDirectory() as scratch:
+        fin = pathlib.Path(scratch) / "config.yml"
+        fin.write_text("a: 1\n", encoding="utf-8")
+
+        config = Config(fin)
+        assert not _cache  # nothing parsed yet
+        db = config.db
+        assert db == {"a": 1}
+        assert load(fin) is db  # a hit
+
+        # a change of size, or of modification time, parses again
+        fin.write_text("a: 22\n", encoding="utf-8")
+        assert config.db == {"a": 22}
+        stat = os.stat(fin)
+        fin.write_text("a: 33\n", encoding="utf-8")
+        os.utime(fin, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert load(fin) == {"a": 33}
+
+        fin.write_text("a: [1\n", encoding="utf-8")
+        try:
+            load(fin)
+            assert False, "Error: invalid yml was accepted."
+        except OSError:
+            pass
+
+        clear_cache()
+        assert not _cache
+
+    print(f"loader: all tests passed, Loader={Loader.__name__}")
@@ -1,33 +1,19 @@
 """This module demonstrates reading in a yml file into a dictionary,
-and creating various NamedTuples from the dictionary."""
+and creating various NamedTuples from the dictionary.
 
-from typing import Final, NamedTuple
-
-import yaml
-
-FIN: Final[str] = "example.yml"
-
-print(f"processing file: {FIN}")
+The file is parsed, through loader.load, only when main runs, so importing
+this module has no side effects.
 
-db = []  # empty database
-
-try:
-    with open(file=FIN, mode="r", encoding="utf-8") as stream:
-        db = yaml.load(stream, Loader=yaml.SafeLoader)  # overwrite
-except yaml.YAMLError as error:
-
-    print(f"Error with yml module: {error}")
-    print(f"Could not open or decode: {FIN}")
-    raise OSError from error
+Example:
+    python run.py
+"""
 
+import pathlib
+from typing import Final, NamedTuple
 
-print(f"\nSuccess: database created from file: {FIN}")
-print("key, value, type")
-print("---, -----, ----")
-for key, value in db.items():
-    print(f"{key}, {value}, {type(value)}")
+import loader
 
-print(db)
+FIN: Final[str] = str(pathlib.Path(__file__).with_name("example.yml"))
 
 
 class City(NamedTuple):
@@ -48,78 +34,103 @@ class State(NamedTuple):
 # ---------------------
 # Method 1: loop method
 # ---------------------
-city_names_v1 = db["state"]["cities"].keys()
-cities_v1 = []  # accumlator
-for city, item in zip(city_names_v1, db["state"]["cities"].values()):
-
-    cc = City(name=city, population=item["population"], nickname=item["nickname"])
-    cities_v1.append(cc)
+def state_loop(db: dict) -> State:
+    """Returns the State of the database, built with a loop."""
+    city_names_v1 = db["state"]["cities"].keys()
+    cities_v1 = []  # accumlator
+    for city, item in zip(city_names_v1, db["state"]["cities"].values()):
 
-    print(cc)
+        cc = City(name=city, population=item["population"], nickname=item["nickname"])
+        cities_v1.append(cc)
 
-state_v1 = State(name=db["state"]["name"], cities=cities_v1)
-
-print(f"{state_v1.name} has the following cities:")
-for item in state_v1.cities:
-    print(f"{item.name}, population: {item.population}, nickname: {item.nickname}")
+    return State(name=db["state"]["name"], cities=cities_v1)
 
 
 # -----------------------------------
 # Method 2: list comprehension method
 # leaves, branches, then trunk
 # -----------------------------------
+def state_comprehension(db: dict) -> State:
+    """Returns the State of the database, built from a list of cities."""
+    cities_v2 = [
+        City(name=x, population=y["population"], nickname=y["nickname"])
+        for (x, y) in zip(db["state"]["cities"].keys(), db["state"]["cities"].values())
+    ]
 
-cities_v2 = [
-    City(name=x, population=y["population"], nickname=y["nickname"])
-    for (x, y) in zip(db["state"]["cities"].keys(), db["state"]["cities"].values())
-]
-
-assert cities_v2 == state_v1.cities
-
-state_v2 = State(name=db["state"]["name"], cities=cities_v2)
+    return State(name=db["state"]["name"], cities=cities_v2)
 
-assert state_v2 == state_v1
 
 # -------------------------
 # Method 3: all-at-once
 # list comprehension method
 # -------------------------
-state_v3 = State(
-    name=db["state"]["name"],
-    cities=[
-        City(name=x, population=y["population"], nickname=y["nickname"])
-        for (x, y) in zip(db["state"]["cities"].keys(), db["state"]["cities"].values())
-    ],
-)
+def state_all_at_once(db: dict) -> State:
+    """Returns the State of the database, built in a single expression."""
+    return State(
+        name=db["state"]["name"],
+        cities=[
+            City(name=x, population=y["population"], nickname=y["nickname"])
+            for (x, y) in zip(
+                db["state"]["cities"].keys(), db["state"]["cities"].values()
+            )
+        ],
+    )
 
-assert state_v3 == state_v1
 
 # ------------------------------------------------------
 # Method 4: dictionary unpacking with list comprehension
 # pythonic dictionary to namedtuple
 # ------------------------------------------------------
-
-# cc = [
-#     City(name=x, population=y["population"], nickname=y["nickname"])
-#     for (x, y) in zip(db["state"]["cities"].keys(), db["state"]["cities"].values())
-# ]
-
-state_v4 = State(
-    name=db["state"]["name"],
-    cities=[
-        City(**y)
-        for y in [
-            {
-                "name": x,
-                "population": db["state"]["cities"][x]["population"],
-                "nickname": db["state"]["cities"][x]["nickname"],
-            }
-            for x in db["state"]["cities"].keys()
-        ]
-    ],
-)
-
-assert state_v4 == state_v1
+def state_unpacking(db: dict) -> State:
+    """Returns the State of the database, built by dictionary unpacking."""
+    return State(
+        name=db["state"]["name"],
+        cities=[
+            City(**y)
+            for y in [
+                {
+                    "name": x,
+                    "population": db["state"]["cities"][x]["population"],
+                    "nickname": db["state"]["cities"][x]["nickname"],
+                }
+                for x in db["state"]["cities"].keys()
+            ]
+        ],
+    )
+
+
+def main(fin: str = FIN) -> State:
+    """Loads the yml file, prints its contents, and returns its State,
+    built four ways."""
+    print(f"processing file: {fin}")
+
+    db = loader.load(fin)
+
+    print(f"\nSuccess: database created from file: {fin}")
+    print("key, value, type")
+    print("---, -----, ----")
+    for key, value in db.items():
+        print(f"{key}, {value}, {type(value)}")
+
+    print(db)
+
+    state_v1 = state_loop(db)
+    for cc in state_v1.cities:
+        print(cc)
+
+    print(f"{state_v1.name} has the following cities:")
+    for item in state_v1.cities:
+        print(f"{item.name}, population: {item.population}, nickname: {item.nickname}")
+
+    assert state_comprehension(db) == state_v1
+    assert state_all_at_once(db) == state_v1
+    assert state_unpacking(db) == state_v1
+
+    return state_v1
+
+
+if __name__ == "__main__":
+    main()
 
 # breakpoint()
 #
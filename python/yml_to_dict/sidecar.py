@@ -0,0 +1,248 @@
+"""This module keeps a binary sidecar cache of each parsed yml file, so that
+short-lived processes skip yml parsing when the file is unchanged.
+
+The sidecar of example.yml is example.yml.cache, in the same directory, or
+<digest>-example.yml.cache in a given cache directory, where <digest> is
+from the resolved path of the source, so that sources of the same name in
+different directories do not share a sidecar.  It holds the parsed
+dictionary and, if the file has a "state", its State and City records,
+serialized with marshal.  The dates and datetimes of yml timestamps, which
+marshal cannot store, are stored as tagged ISO 8601 strings, and restored
+on load.  A fixed header records the format version, the marshal and
+Python versions, the modification time, size, and SHA-256 digest of the
+resolved path of the source file, and a SHA-256 checksum of the payload.
+A sidecar that is missing, stale, truncated, corrupt, written for another
+source, or written by another version is ignored, and the file is parsed
+again, through loader.load, and its sidecar rewritten.
+
+Example:
+    cached = load("example.yml")  # parses, and writes example.yml.cache
+    cached = load("example.yml")  # in a new process, reads the sidecar
+    print(cached.db, cached.state)
+"""
+
+import datetime
+import hashlib
+import marshal
+import mmap
+import os
+import pathlib
+import struct
+import sys
+import tempfile
+from typing import NamedTuple, Optional
+
+import loader
+import run
+
+MAGIC = b"MWEYML\0\0"
+VERSION = 3
+# magic, version, marshal version, python major, minor, mtime_ns, size,
+# source path sha256, payload bytes, payload sha256
+HEADER = struct.Struct("<8sIIHHqQ32sQ32s")
+PREFIX = HEADER.size - struct.calcsize("<Q32s")  # identifies format and source
+_DATE = "\0mwe-sidecar-date\0"  # tags (_DATE, isoformat) for a date or datetime
+
+
+class Cached(NamedTuple):
+    """The parsed contents of a yml file, and its typed records."""
+
+    db: object
+    state: Optional[run.State]  # None if the file has no "state"
+
+
+def sidecar_path(path, directory=None) -> pathlib.Path:
+    """Returns the path of the sidecar of the yml file at path."""
+    path = pathlib.Path(path).expanduser().resolve()
+    name = path.name + ".cache"
+    if directory is None:
+        return path.with_name(name)
+    digest = hashlib.sha256(str(path).encode("utf-8")).hexdigest()[:16]
+    return pathlib.Path(directory).expanduser() / f"{digest}-{name}"
+
+
+def _encode(node):
+    """Returns the node, with each date and datetime as a tagged tuple."""
+    if isinstance(node, datetime.date):  # a datetime is a date
+        return (_DATE, node.isoformat())
+    if isinstance(node, dict):
+        return {_encode(k): _encode(v) for k, v in node.items()}
+    if isinstance(node, (list, tuple, set, frozenset)):
+        return type(node)(_encode(x) for x in node)
+    return node
+
+
+def _decode(node):
+    """Returns the node, with each tagged tuple as its date or datetime."""
+    if isinstance(node, tuple) and len(node) == 2 and node[0] == _DATE:
+        if "T" in node[1]:
+            return datetime.datetime.fromisoformat(node[1])
+        return datetime.date.fromisoformat(node[1])
+    if isinstance(node, dict):
+        return {_decode(k): _decode(v) for k, v in node.items()}
+    if isinstance(node, (list, tuple, set, frozenset)):
+        return type(node)(_decode(x) for x in node)
+    return node
+
+
+def _header(key: loader.CacheKey, payload: bytes) -> bytes:
+    """Returns the header of a sidecar of the payload for the source key."""
+    return HEADER.pack(
+        MAGIC,
+        VERSION,
+        marshal.version,
+        *sys.version_info[:2],
+        key.mtime_ns,
+        key.size,
+        hashlib.sha256(key.path.encode("utf-8")).digest(),
+        len(payload),
+        hashlib.sha256(payload).digest(),
+    )
+
+
+def write(path, cached: Cached, directory=None) -> pathlib.Path:
+    """Writes the sidecar of the yml file at path, and returns its path."""
+    key = loader.cache_key(path)
+    state = None
+    if cached.state is not None:
+        state = (cached.state.name, [tuple(x) for x in cached.state.cities])
+    contents = (cached.db, state)
+    encoded = _encode(contents)
+    # only a file with dates pays for decoding them on read
+    payload = marshal.dumps((encoded != contents, encoded))
+    target = sidecar_path(path, directory)
+    # write to a temporary file, then rename, so readers never see a
+    # partial file
+    fd, temp = tempfile.mkstemp(dir=target.parent, suffix=".cache")
+    with os.fdopen(fd, "wb") as stream:
+        stream.write(_header(key, payload))
+        stream.write(payload)
+    os.replace(temp, target)
+    return target
+
+
+def read(path, directory=None) -> Optional[Cached]:
+    """Returns the Cached contents of the sidecar of the yml file at path, or
+    None if the sidecar is missing, stale, or invalid."""
+    key = loader.cache_key(path)
+    try:
+        with open(sidecar_path(path, directory), mode="rb") as stream:
+            with mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                if len(buffer) < HEADER.size:
+                    return None
+                if buffer[:PREFIX] != _header(key, b"")[:PREFIX]:
+                    return None  # another format or source, or a stale sidecar
+                *_, length, digest = HEADER.unpack_from(buffer)
+                payload = memoryview(buffer)[HEADER.size :]
+                try:
+                    if len(payload) != length:
+                        return None
+                    if hashlib.sha256(payload).digest() != digest:
+                        return None
+                    dated, contents = marshal.loads(payload)
+                finally:
+                    payload.release()
+    except (OSError, ValueError, EOFError, TypeError):
+        return None
+
+    db, state = _decode(contents) if dated else contents
+    if state is not None:
+        name, cities = state
+        state = run.State(name=name, cities=[run.City(*x) for x in cities])
+    return Cached(db=db, state=state)
+
+
+def load(path, directory=None) -> Cached:
+    """Returns the Cached contents of the yml file at path, from its sidecar
+    if the file is unchanged, otherwise parsed and written to its sidecar.
+    An unwritable sidecar location is not an error; contents that marshal
+    cannot store are reported, and parsed on every load."""
+    cached = read(path, directory)
+    if cached is not None:
+        return cached
+
+    db = loader.load(path)
+    state = run.state_loop(db) if isinstance(db, dict) and "state" in db else None
+    cached = Cached(db=db, state=state)
+    try:
+        write(path, cached, directory)
+    except OSError:
+        pass
+    except ValueError as error:
+        print(f"Warning: no sidecar for {path}: {error}")
+    return cached
+
+
+if __name__ == "__main__":
+
+    with tempfile.TemporaryDirectory() as scratch:
+        fin = pathlib.Path(scratch) / "example.yml"
+        fin.write_bytes(pathlib.Path(run.FIN).read_bytes())
+
+        assert read(fin) is None  # no sidecar yet
+        first = load(fin)
+        assert sidecar_path(fin).exists()
+        assert first.db == loader.load(run.FIN)
+        assert first.state == run.state_loop(first.db)
+
+        loader.clear_cache()
+        second = read(fin)
+        assert second == first and isinstance(second.state.cities[0], run.City)
+
+        # a corrupt payload fails the checksum, and is replaced on load
+        data = bytearray(sidecar_path(fin).read_bytes())
+        data[-2] ^= 0xFF
+        sidecar_path(fin).write_bytes(bytes(data))
+        assert read(fin) is None
+        assert load(fin) == first and read(fin) == first
+
+        # a changed source makes the sidecar stale, even at the same mtime
+        stat = os.stat(fin)
+        fin.write_text("groceries: [cabbage]\n", encoding="utf-8")
+        os.utime(fin, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert read(fin) is None
+        assert load(fin) == Cached(db={"groceries": ["cabbage"]}, state=None)
+
+        # dates and datetimes, as values and as keys, round trip
+        timestamps = pathlib.Path(scratch) / "timestamps.yml"
+        timestamps.write_text(
+            "opened: 2024-01-02\n"
+            "updated: 2024-01-02 10:11:12+05:00\n"
+            "2024-05-06: holiday\n"
+            "log: [{at: 2024-01-02T10:11:12}]\n",
+            encoding="utf-8",
+        )
+        fresh = load(timestamps)
+        assert sidecar_path(timestamps).exists()
+        assert (
+            read(timestamps) == fresh == Cached(db=loader.load(timestamps), state=None)
+        )
+        assert isinstance(read(timestamps).db["opened"], datetime.date)
+        assert read(timestamps).db["updated"].utcoffset().total_seconds() == 5 * 3600
+        assert read(timestamps).db[datetime.date(2024, 5, 6)] == "holiday"
+
+        # a separate cache directory
+        elsewhere = pathlib.Path(scratch) / "caches"
+        elsewhere.mkdir()
+        load(fin, elsewhere)
+        assert read(fin, elsewhere) == load(fin)
+
+        # sources of the same name, size, and mtime, e.g., after cp -p, do
+        # not share a sidecar, nor read one written for the other
+        twins = []
+        for text in ("x: 1\n", "x: 2\n"):
+            twin = pathlib.Path(scratch) / f"twin{len(twins)}" / "config.yml"
+            twin.parent.mkdir()
+            twin.write_text(text, encoding="utf-8")
+            os.utime(twin, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            twins.append(twin)
+        assert load(twins[0], elsewhere).db == {"x": 1}
+        assert load(twins[1], elsewhere).db == {"x": 2}
+        assert sidecar_path(twins[0], elsewhere) != sidecar_path(twins[1], elsewhere)
+        shared = sidecar_path(twins[1], elsewhere)
+        shared.write_bytes(sidecar_path(twins[0], elsewhere).read_bytes())
+        assert read(twins[1], elsewhere) is None
+        loader.clear_cache()
+        assert load(twins[1], elsewhere).db == {"x": 2}
+
+    print("sidecar: all tests passed")
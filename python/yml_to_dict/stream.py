@@ -0,0 +1,242 @@
+"""This module streams City and State records out of multi-document yml
+files, one record at a time, without loading a whole document.
+
+Each document has the layout of example.yml: a top-level "state" mapping
+with a "name" and a "cities" mapping of city name to population and
+nickname.  The file is read through the yaml event API, so only the events
+of the current city are held in memory; other top-level keys are skipped.
+Anchors and aliases are supported within a single value, e.g., a city.
+
+The readers are generators, and compose into a pipeline of generator
+stages, each a function of an iterable that returns an iterable.
+
+Example:
+    for city in cities("inventory.yml"):
+        print(city.name)
+    for chunk in cities("inventory.yml", batch_size=10_000):
+        write(chunk)  # a list of at most 10_000 City records
+    big = pipeline(cities("inventory.yml"), large, lambda x: batched(x, 100))
+"""
+
+import io
+import itertools
+import os
+from typing import Iterable, Iterator, Optional
+
+import yaml
+
+import loader
+import run
+from run import City, State
+
+_COLLECTIONS = {
+    yaml.SequenceStartEvent: (yaml.SequenceNode, yaml.SequenceEndEvent),
+    yaml.MappingStartEvent: (yaml.MappingNode, yaml.MappingEndEvent),
+}
+
+
+def _compose(parser, event, anchors: dict) -> yaml.Node:
+    """Returns the node that starts with event, reading the rest of its
+    events from the parser."""
+    if isinstance(event, yaml.AliasEvent):
+        if event.anchor not in anchors:
+            raise yaml.composer.ComposerError(
+                None, None, f"found undefined alias {event.anchor}", event.start_mark
+            )
+        return anchors[event.anchor]
+
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = parser.resolve(yaml.ScalarNode, event.value, event.implicit)
+        node = yaml.ScalarNode(
+            tag, event.value, event.start_mark, event.end_mark, style=event.style
+        )
+    else:
+        kind, end = _COLLECTIONS[type(event)]
+        tag = event.tag
+        if tag is None or tag == "!":
+            tag = parser.resolve(kind, None, event.implicit)
+        node = kind(tag, [], event.start_mark, None, flow_style=event.flow_style)
+        items = []
+        while not isinstance(child := parser.get_event(), end):
+            items.append(_compose(parser, child, anchors))
+        node.end_mark = child.end_mark
+        node.value = (
+            items if kind is yaml.SequenceNode else list(zip(*[iter(items)] * 2))
+        )
+
+    if event.anchor is not None:
+        anchors[event.anchor] = node
+    return node
+
+
+def _value(parser, event):
+    """Returns the Python object of the node that starts with event."""
+    return parser.construct_document(_compose(parser, event, {}))
+
+
+def _skip(parser, event) -> None:
+    """Reads, and discards, the events of the node that starts with event."""
+    depth = int(isinstance(event, tuple(_COLLECTIONS)))
+    while depth:
+        event = parser.get_event()
+        if isinstance(event, (yaml.SequenceStartEvent, yaml.MappingStartEvent)):
+            depth += 1
+        elif isinstance(event, (yaml.SequenceEndEvent, yaml.MappingEndEvent)):
+            depth -= 1
+
+
+def _pairs(parser) -> Iterator[tuple]:
+    """After a MappingStartEvent, yields the key and the first event of the
+    value of each entry.  The caller reads the rest of the value, with
+    _value or _skip, before asking for the next entry."""
+    while not isinstance(event := parser.get_event(), yaml.MappingEndEvent):
+        yield _value(parser, event), parser.get_event()
+
+
+def _records(parser) -> Iterator[tuple]:
+    """Yields ("state", name), ("city", City), and, at the end of each
+    document, ("end", None)."""
+    while not parser.check_event(yaml.StreamEndEvent):
+        event = parser.get_event()
+        if isinstance(event, (yaml.StreamStartEvent, yaml.DocumentStartEvent)):
+            continue
+        if isinstance(event, yaml.DocumentEndEvent):
+            yield "end", None
+            continue
+        if not isinstance(event, yaml.MappingStartEvent):
+            _skip(parser, event)
+            continue
+        for key, event in _pairs(parser):
+            if key != "state" or not isinstance(event, yaml.MappingStartEvent):
+                _skip(parser, event)
+                continue
+            for skey, event in _pairs(parser):
+                if skey == "name":
+                    yield "state", _value(parser, event)
+                elif skey == "cities" and isinstance(event, yaml.MappingStartEvent):
+                    for name, event in _pairs(parser):
+                        item = _value(parser, event)
+                        yield "city", City(
+                            name=name,
+                            population=item["population"],
+                            nickname=item["nickname"],
+                        )
+                else:
+                    _skip(parser, event)
+
+
+def read(fin) -> Iterator[tuple]:
+    """Yields the ("state", name), ("city", City), and ("end", None) records
+    of the yml file at path fin, or of the open text stream fin.
+
+    Raises:
+        OSError: If the file cannot be opened or decoded.
+    """
+    stream = fin
+    if isinstance(fin, (str, os.PathLike)):
+        stream = open(file=fin, mode="r", encoding="utf-8")
+    parser = loader.Loader(stream)
+    try:
+        yield from _records(parser)
+    except yaml.YAMLError as error:
+        print(f"Error with yml module: {error}")
+        print(f"Could not open or decode: {fin}")
+        raise OSError from error
+    finally:
+        parser.dispose()
+        if stream is not fin:
+            stream.close()
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """Yields lists of at most size items of the iterable."""
+    assert size >= 1, f"Error: size={size}, but size>=1 required."
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+def pipeline(source: Iterable, *stages) -> Iterable:
+    """Returns the source passed through each generator stage in turn."""
+    for stage in stages:
+        source = stage(source)
+    return source
+
+
+def cities(fin, batch_size: Optional[int] = None) -> Iterator:
+    """Yields the City records of every document of the yml file, or, given
+    batch_size, lists of at most batch_size City records."""
+    records = (x for kind, x in read(fin) if kind == "city")
+    return records if batch_size is None else batched(records, batch_size)
+
+
+def states(fin, batch_size: Optional[int] = None) -> Iterator:
+    """Yields the State of each document of the yml file, or, given
+    batch_size, lists of at most batch_size States.  Only the cities of the
+    current State are held in memory."""
+
+    def assemble():
+        name, members = None, []
+        for kind, x in read(fin):
+            if kind == "state":
+                name = x
+            elif kind == "city":
+                members.append(x)
+            elif name is not None or members:
+                yield State(name=name, cities=members)
+                name, members = None, []
+
+    return assemble() if batch_size is None else batched(assemble(), batch_size)
+
+
+if __name__ == "__main__":
+
+    # a single document matches run.py
+    assert list(states(run.FIN)) == [run.state_loop(loader.load(run.FIN))]
+    assert [x.name for x in cities(run.FIN)] == ["Albuquerque", "Santa Fe"]
+
+    TEXT = """\
+state:
+  name: New Mexico
+  cities:
+    Albuquerque: {population: 500, nickname: Duke City}
+    Santa Fe: &capital
+      population: 90
+      nickname: City Different
+---
+flag: [skipped, {nested: true}]
+state:
+  cities:
+    Austin: {population: 960, nickname: Live Music Capital}
+    Dallas: {population: 1300, nickname: Big D}
+    Houston: {population: 2300, nickname: Space City}
+  name: Texas
+---
+state: {name: Utah, cities: {}}
+"""
+    found = list(states(io.StringIO(TEXT)))
+    assert [x.name for x in found] == ["New Mexico", "Texas", "Utah"]
+    assert [len(x.cities) for x in found] == [2, 3, 0]
+    assert found[1].cities[2] == City("Houston", 2300, "Space City")
+
+    chunks = list(cities(io.StringIO(TEXT), batch_size=2))
+    assert [len(x) for x in chunks] == [2, 2, 1]
+
+    def large(records):
+        """A pipeline stage that keeps the cities of over 900 people."""
+        return (x for x in records if x.population > 900)
+
+    names = pipeline(
+        cities(io.StringIO(TEXT)), large, lambda x: (y.name for y in x), list
+    )
+    assert names == ["Austin", "Dallas", "Houston"]
+
+    try:
+        list(cities(io.StringIO("state: {cities: [1\n")))
+        assert False, "Error: invalid yml was accepted."
+    except OSError:
+        pass
+
+    print("stream: all tests passed")
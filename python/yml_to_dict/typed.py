@@ -0,0 +1,314 @@
+"""This module converts parsed yml nodes into NamedTuples, with a converter
+derived once from the NamedTuple annotations, so the four hand-written
+methods of run.py become a single declaration:
+
+    state = convert(State, db["state"])
+
+A converter checks the type of every value as it builds the records, and
+visits each node exactly once.  Converters are cached per annotation.
+
+The annotations map to yml nodes as follows:
+    str, int, float, bool: a scalar of that type; an int is a float.
+    a NamedTuple: a mapping of field name to value; fields with a default
+        may be missing, and other keys are an error.
+    list[X]: a sequence of X, or, if X is a NamedTuple, a mapping whose keys
+        are the first field of each X, e.g., the cities of example.yml.
+    dict[K, V]: a mapping of K to V.
+    Optional[X]: None, or X.
+    Any: any node, unchanged.
+
+Example:
+    to_state = converter(State)  # derived, then cached
+    state = to_state(db["state"])
+"""
+
+import functools
+import timeit
+import types
+import typing
+from typing import Any, Callable
+
+_MISSING = object()
+
+
+class ConversionError(TypeError):
+    """A node that does not match its annotation, with the path to it."""
+
+    def __init__(self, message: str, path: tuple = ()):
+        super().__init__(message, path)
+        self.message = message
+        self.path = path
+
+    def at(self, step) -> "ConversionError":
+        """Returns the error, one step further from the node."""
+        return ConversionError(self.message, (step,) + self.path)
+
+    def __str__(self) -> str:
+        where = "".join(f"[{x!r}]" for x in self.path)
+        return f"{where}: {self.message}" if where else self.message
+
+
+def _is_record(kind) -> bool:
+    """Returns True if kind is a NamedTuple class."""
+    return (
+        isinstance(kind, type) and issubclass(kind, tuple) and hasattr(kind, "_fields")
+    )
+
+
+def _scalar(kind: type) -> Callable[[Any], Any]:
+    """Returns the converter of a scalar of the kind."""
+    accepted = (int, float) if kind is float else kind
+
+    def build(node):
+        if isinstance(node, accepted) and (kind is bool or not isinstance(node, bool)):
+            return kind(node) if kind is float else node
+        raise ConversionError(f"{node!r} should be {kind.__name__}")
+
+    return build
+
+
+def _record(kind: type) -> Callable[..., Any]:
+    """Returns the converter of a mapping into the NamedTuple kind.  Given a
+    key, the key is the first field, as in a keyed list."""
+    hints = typing.get_type_hints(kind)
+    specs = [
+        (name, hints[name], kind._field_defaults.get(name, _MISSING))
+        for name in kind._fields
+    ]
+    slow = _checked_record(kind, specs)
+
+    # the generated fast path: every field present, and every scalar of the
+    # exact type; anything else takes the slow path, which reports errors
+    lines, checks = [], []
+    namespace = {"_kind": kind, "_new": tuple.__new__, "_slow": slow}
+    namespace.update({"_MISSING": _MISSING, "ConversionError": ConversionError})
+    for i, (name, hint, _) in enumerate(specs):
+        raw = "key" if i == 0 else f"node[{name!r}]"
+        if hint in (str, int, float, bool):
+            lines.append(f"v{i} = {raw}")
+            checks.append(f"type(v{i}) is {hint.__name__}")
+        else:
+            namespace[f"_c{i}"] = _converter(hint)
+            lines.append(f"v{i} = _c{i}({raw})")
+    first = lines[0].replace("key", f"node[{specs[0][0]!r}]")
+    values = ", ".join(f"v{i}" for i in range(len(specs)))
+    source = f"""\
+def build(node, key=_MISSING):
+    if type(node) is not dict or len(node) != {len(specs)} - (key is not _MISSING):
+        return _slow(node, key)
+    try:
+        if key is _MISSING:
+            {first}
+        else:
+            {lines[0]}
+        {"; ".join(lines[1:]) or "pass"}
+    except (KeyError, ConversionError):
+        return _slow(node, key)
+    if {" and ".join(checks) or "True"}:
+        return _new(_kind, ({values},))
+    return _slow(node, key)
+"""
+    exec(source, namespace)  # pylint: disable=exec-used
+    return namespace["build"]
+
+
+def _checked_record(kind: type, specs: list) -> Callable[..., Any]:
+    """Returns the converter of a record that checks each field in turn, and
+    reports the first mismatch with its path."""
+    specs = [(name, _converter(hint), default) for name, hint, default in specs]
+    fields = frozenset(kind._fields)
+    new = tuple.__new__
+
+    def build(node, key=_MISSING):
+        if not isinstance(node, dict):
+            raise ConversionError(f"{type(node).__name__} should be {kind.__name__}")
+        if key is not _MISSING and specs[0][0] in node:
+            raise ConversionError(f"field {specs[0][0]!r} is given by its key")
+        values, used = [], 0
+        for name, field, default in specs:
+            if key is not _MISSING:
+                raw, key = key, _MISSING
+            elif name in node:
+                raw = node[name]
+                used += 1
+            elif default is not _MISSING:
+                values.append(default)
+                continue
+            else:
+                raise ConversionError(f"missing field {name!r} of {kind.__name__}")
+            try:
+                values.append(field(raw))
+            except ConversionError as error:
+                raise error.at(name) from None
+        if used != len(node):
+            unknown = sorted(map(str, node.keys() - fields))
+            raise ConversionError(f"unknown fields {unknown} of {kind.__name__}")
+        return new(kind, values)
+
+    return build
+
+
+def _sequence(item_kind) -> Callable[[Any], list]:
+    """Returns the converter of a list of item_kind."""
+    item = _converter(item_kind)
+    keyed = _is_record(item_kind)
+
+    def build(node):
+        result = []
+        if isinstance(node, list):
+            for index, value in enumerate(node):
+                try:
+                    result.append(item(value))
+                except ConversionError as error:
+                    raise error.at(index) from None
+        elif keyed and isinstance(node, dict):
+            for key, value in node.items():
+                try:
+                    result.append(item(value, key))
+                except ConversionError as error:
+                    raise error.at(key) from None
+        else:
+            raise ConversionError(f"{type(node).__name__} should be a list")
+        return result
+
+    return build
+
+
+def _mapping(key_kind, value_kind) -> Callable[[Any], dict]:
+    """Returns the converter of a dict of key_kind to value_kind."""
+    key_of, value_of = _converter(key_kind), _converter(value_kind)
+
+    def build(node):
+        if not isinstance(node, dict):
+            raise ConversionError(f"{type(node).__name__} should be a dict")
+        result = {}
+        for key, value in node.items():
+            try:
+                result[key_of(key)] = value_of(value)
+            except ConversionError as error:
+                raise error.at(key) from None
+        return result
+
+    return build
+
+
+def _optional(kind) -> Callable[[Any], Any]:
+    """Returns the converter of None, or of a kind."""
+    build = _converter(kind)
+    return lambda node: None if node is None else build(node)
+
+
+@functools.cache
+def _converter(kind) -> Callable:
+    """Returns the cached converter of an annotation."""
+    # pylint: disable=too-many-return-statements
+    origin, args = typing.get_origin(kind), typing.get_args(kind)
+    if kind is Any:
+        return lambda node: node
+    if _is_record(kind):
+        return _record(kind)
+    if kind in (str, int, float, bool):
+        return _scalar(kind)
+    if origin is list:
+        return _sequence(args[0])
+    if origin is dict:
+        return _mapping(*args)
+    if origin in (typing.Union, types.UnionType) and type(None) in args:
+        rest = [x for x in args if x is not type(None)]
+        if len(rest) == 1:
+            return _optional(rest[0])
+    raise TypeError(f"Error: the annotation {kind} is not supported.")
+
+
+def converter(kind: type) -> Callable[[Any], Any]:
+    """Returns the converter of parsed yml nodes into the NamedTuple kind,
+    derived from its annotations on the first call, and cached."""
+    assert _is_record(kind), f"Error: {kind} is not a NamedTuple."
+    return _converter(kind)
+
+
+def convert(kind: type, node):
+    """Returns the NamedTuple kind of the parsed yml node.
+
+    Raises:
+        ConversionError: A TypeError, if the node does not match the
+            annotations of kind, with the path to the mismatch.
+    """
+    return converter(kind)(node)
+
+
+def benchmark(cities: int = 10_000, number: int = 20) -> dict:
+    """Returns the seconds per call of each run.py method, and of convert,
+    building the State of a database with the given number of cities."""
+    # pylint: disable-next=import-outside-toplevel
+    import run
+
+    db = {
+        "state": {
+            "name": "New Mexico",
+            "cities": {
+                f"City {i}": {"population": i, "nickname": f"Nickname {i}"}
+                for i in range(cities)
+            },
+        }
+    }
+    methods = {
+        "loop": run.state_loop,
+        "comprehension": run.state_comprehension,
+        "all_at_once": run.state_all_at_once,
+        "unpacking": run.state_unpacking,
+        "typed": lambda db: convert(run.State, db["state"]),
+    }
+    expected = run.state_loop(db)
+    result = {}
+    for name, method in methods.items():
+        assert method(db) == expected, f"Error: method {name} differs."
+        result[name] = timeit.timeit(lambda m=method: m(db), number=number) / number
+    return result
+
+
+if __name__ == "__main__":
+
+    import loader
+    import run
+
+    db = loader.load(run.FIN)
+    state = convert(run.State, db["state"])
+    assert state == run.state_loop(db)
+    assert isinstance(state.cities[0], run.City)
+    assert converter(run.State) is converter(run.State)  # cached
+
+    class Box(typing.NamedTuple):
+        """A record of every supported annotation."""
+
+        label: str
+        size: float
+        tags: list[str]
+        limits: dict[str, int]
+        owner: typing.Optional[run.City] = None
+        extra: Any = None
+
+    box = convert(Box, {"label": "a", "size": 2, "tags": ["x"], "limits": {"n": 1}})
+    assert box == Box("a", 2.0, ["x"], {"n": 1}) and isinstance(box.size, float)
+
+    bad = {"name": "NM", "cities": {"Taos": {"population": "6k", "nickname": "T"}}}
+    for invalid, text in (
+        (bad, "['cities']['Taos']['population']: '6k' should be int"),
+        ({"name": "NM"}, "missing field 'cities' of State"),
+        ({"name": "NM", "cities": [], "x": 1}, "unknown fields ['x'] of State"),
+        ({"name": True, "cities": []}, "['name']: True should be str"),
+        (
+            {"name": "NM", "cities": {"Taos": {"name": "T", **bad["cities"]["Taos"]}}},
+            "['cities']['Taos']: field 'name' is given by its key",
+        ),
+    ):
+        try:
+            convert(run.State, invalid)
+            assert False, "Error: an invalid node was converted."
+        except ConversionError as error:
+            assert str(error) == text, str(error)
+
+    for method, seconds in benchmark().items():
+        print(f"{method:>13}: {seconds * 1e3:.2f} ms")
+
+    print("typed: all tests passed")